@@ -0,0 +1,48 @@
+from typing import Dict, List, Optional, Tuple
+from src.dv.interfaces import Judge
+from src.dv.models.entities import Chunk
+
+# Coalition scores carried between runs, keyed by chunk ids in context order
+CoalitionScores = Dict[Tuple[str, ...], float]
+
+class CoalitionScorer:
+    """Scores coalitions (tuples of chunk indices, in context order) in judge batches.
+
+    Coalitions already scored during the run are reused, as are those found in
+    `known`, scores from an earlier run keyed by chunk ids. `calls` counts the
+    distinct coalitions actually sent to the judge, `reused` those taken from
+    `known`.
+    """
+
+    def __init__(self, judge: Judge, query: str, chunks: List[Chunk], answer: str, known: Optional[CoalitionScores] = None):
+        self.judge = judge
+        self.query = query
+        self.ids = [c.id for c in chunks]
+        self.texts = [c.text for c in chunks]
+        self.answer = answer
+        self.known = known or {}
+        self.scores: Dict[Tuple[int, ...], float] = {}
+        self.calls = 0
+        self.reused = 0
+
+    def __call__(self, coalitions: List[Tuple[int, ...]]) -> List[float]:
+        missing = []
+        for c in dict.fromkeys(coalitions):
+            if c in self.scores:
+                continue
+            if self.known:
+                key = tuple(self.ids[i] for i in c)
+                if key in self.known:
+                    self.scores[c] = self.known[key]
+                    self.reused += 1
+                    continue
+            missing.append(c)
+        if missing:
+            batch_scores = self.judge.get_faithfulness_coalitions(self.query, self.texts, missing, self.answer)
+            self.scores.update(zip(missing, batch_scores))
+            self.calls += len(missing)
+        return [self.scores[c] for c in coalitions]
+
+    def by_id(self) -> CoalitionScores:
+        """Every score seen this run, keyed by chunk ids for use in a later run."""
+        return {tuple(self.ids[i] for i in c): score for c, score in self.scores.items()}
@@ -1,30 +1,206 @@
-from typing import List
+import itertools
+from typing import Any, Dict, List, Optional, Tuple
+from src.dv.algorithms.coalitions import CoalitionScorer, CoalitionScores
 from src.dv.interfaces import Valuator, Judge
-from src.dv.models.entities import Chunk, ValuationResult, ValuationMethod
+from src.dv.models.entities import Chunk, ExperimentRun, ValuationMethod
+from src.dv.models.results import ValuationResults
 
 class LOOValuator(Valuator):
-    def __init__(self, judge: Judge):
+    """Leave-one-out valuation.
+
+    With `hierarchical=True`, contiguous groups of chunks are removed first
+    (group testing): a group whose removal moves the score by at most
+    `tolerance` is not split further, and each of its chunks gets the group's
+    score change divided by the group size. Any other group is split into
+    `branching` parts, level by level, down to single chunks, which get exact
+    LOO values. This takes roughly O(k log N) judge calls when only k chunks
+    matter. A group is only kept whole once it has been split off at least
+    `min_depth` times.
+
+    `last_group_deltas` gives, per chunk, the absolute score change of the
+    group its value was averaged over (0 for exact values). It is a heuristic
+    error indicator, not a bound: chunks with opposite effects cancel inside a
+    group, so a group change near 0 can hide large individual values, which
+    are then reported as about 0. Raise `min_depth` (ceil(log2 N) with branching
+    2 makes every value exact) or lower `tolerance` where that matters.
+
+    In hierarchical mode `evaluate_incremental` applies the same group testing
+    to what changed since a previous run, so a re-ask costs about one judge
+    call per added chunk while the values of unchanged chunks stay put. Plain
+    LOO recomputes every value exactly and only reuses coalition scores that
+    are still valid.
+    """
+
+    def __init__(self, judge: Judge, hierarchical: bool = False, tolerance: float = 0.01, branching: int = 2, min_depth: int = 0):
         self.judge = judge
+        self.hierarchical = hierarchical
+        self.tolerance = tolerance
+        self.branching = branching
+        self.min_depth = min_depth
+        self.last_run_stats: Dict[str, Any] = {}
+        self.last_group_deltas: Dict[str, float] = {}
+        self.last_state: Dict[str, Any] = {}
+        self._last_scorer: Optional[CoalitionScorer] = None
+
+    @property
+    def last_coalition_scores(self) -> CoalitionScores:
+        """Coalition scores of the last run, keyed by chunk ids."""
+        return self._last_scorer.by_id() if self._last_scorer is not None else {}
+
+    def _finish(self, score: CoalitionScorer, chunks: List[Chunk], values: List[float], deltas: List[float], **stats) -> ValuationResults:
+        ids = [c.id for c in chunks]
+        self._last_scorer = score
+        self.last_run_stats = {"judge_calls": score.calls, **stats}
+        self.last_group_deltas = dict(zip(ids, deltas))
+        self.last_state = {"values": dict(zip(ids, values)), "group_deltas": dict(self.last_group_deltas)}
+        return ValuationResults.from_scores(ids, ValuationMethod.LOO, values)
+
+    def evaluate(self, query: str, chunks: List[Chunk], answer: str) -> ValuationResults:
+        if self.hierarchical:
+            return self._evaluate_hierarchical(query, chunks, answer)
+
+        n = len(chunks)
+        score = CoalitionScorer(self.judge, query, chunks, answer)
+
+        # Gather the full coalition plus each leave-one-out coalition, then score in one batch
+        coalitions = [tuple(range(n))]
+        for i in range(n):
+            coalitions.append(self._coalition_without(n, i, i + 1))
+
+        batch_scores = score(coalitions)
+        full_score = batch_scores[0]
+
+        # Value is the marginal contribution
+        scores = [full_score - partial_score for partial_score in batch_scores[1:]]
+        return self._finish(score, chunks, scores, [0.0] * n)
+
+    def evaluate_targets(self, query: str, chunks: List[Chunk], answer: str, targets: List[int]) -> ValuationResults:
+        """Exact LOO values for the target chunks only: one judge call per target plus the full set."""
+        n = len(chunks)
+        score = CoalitionScorer(self.judge, query, chunks, answer)
+        coalitions = [tuple(range(n))] + [self._coalition_without(n, i, i + 1) for i in targets]
+        batch_scores = score(coalitions)
+        scores = [batch_scores[0] - partial_score for partial_score in batch_scores[1:]]
+        return self._finish(score, [chunks[i] for i in targets], scores, [0.0] * len(targets))
+
+    @staticmethod
+    def _coalition_without(n: int, start: int, end: int) -> Tuple[int, ...]:
+        """Indices of every chunk outside [start, end)."""
+        return tuple(itertools.chain(range(start), range(end, n)))
+
+    def _split(self, start: int, end: int) -> List[Tuple[int, int]]:
+        size = end - start
+        parts = min(self.branching, size)
+        bounds = [start + (size * k) // parts for k in range(parts + 1)]
+        return [(bounds[k], bounds[k + 1]) for k in range(parts)]
+
+    def _evaluate_hierarchical(self, query: str, chunks: List[Chunk], answer: str) -> ValuationResults:
+        n = len(chunks)
+        score = CoalitionScorer(self.judge, query, chunks, answer)
+        scores = [0.0] * n
+        deltas = [0.0] * n
+
+        full_score = score([tuple(range(n))])[0]
+
+        # Breadth-first: every group on a level is scored in one batch
+        level = self._split(0, n) if n else []
+        exact = 0
+        depth = 1 # times the chunks of each group on this level have been split off
+        while level:
+            batch_scores = score([self._coalition_without(n, start, end) for start, end in level])
+
+            next_level = []
+            for (start, end), partial_score in zip(level, batch_scores):
+                delta = full_score - partial_score
+                if end - start == 1:
+                    scores[start] = delta
+                    exact += 1
+                elif depth >= self.min_depth and abs(delta) <= self.tolerance:
+                    for i in range(start, end):
+                        scores[i] = delta / (end - start)
+                        deltas[i] = abs(delta)
+                else:
+                    next_level.extend(self._split(start, end))
+            level = next_level
+            depth += 1
+
+        return self._finish(score, chunks, scores, deltas, exact=exact, estimated=n - exact)
+
+    def evaluate_incremental(self, query: str, chunks: List[Chunk], answer: str, previous: ExperimentRun, state: Optional[Dict[str, Any]] = None) -> ValuationResults:
+        """LOO values after the chunk set changed from `previous.retrieved_chunks`.
+
+        Without `hierarchical`, values are recomputed exactly; only coalitions
+        already scored for `previous` (e.g. the new full set when chunks were
+        only removed) are skipped. In hierarchical mode added chunks get exact values. For a group S of unchanged chunks, the
+        change in its group LOO value between the old context N and the new
+        context N' is g(S) = [v(N') - v(N' - S)] - [v(N) - v(N - S)]. Starting
+        from all unchanged chunks as one group, a group with |g(S)| <= tolerance
+        keeps its old values, shifted by g(S) / |S| (group delta grows by |g(S)|);
+        other groups are split as in hierarchical mode, down to exact single
+        chunks. Coalition scores from `previous` are reused, so an unchanged
+        set costs no judge calls and a small change about
+        O(added + changed * log n).
+        """
+        if not state or "values" not in state:
+            return self.evaluate(query, chunks, answer)
+        old_values, old_deltas = state["values"], state.get("group_deltas", {})
+        new_ids = [c.id for c in chunks]
+        new_set = set(new_ids)
+        old_chunks = [c for c in previous.retrieved_chunks if c.id not in new_set]
+
+        # One scorer over new and removed chunks, so both contexts' coalitions hit the same store
+        n = len(chunks)
+        score = CoalitionScorer(self.judge, query, list(chunks) + old_chunks, answer, known=state.get("coalition_scores"))
+        index = {cid: i for i, cid in enumerate(score.ids)}
+        new_full = tuple(range(n))
+        old_full = tuple(index[c.id] for c in previous.retrieved_chunks)
+        old_set = set(old_full)
+        unchanged = [i for i in new_full if i in old_set and new_ids[i] in old_values]
+        targets = [i for i in new_full if i not in set(unchanged)]
+
+        def without(full: Tuple[int, ...], group: set) -> Tuple[int, ...]:
+            return tuple(i for i in full if i not in group)
+
+        if not targets and new_full == old_full:
+            # Same chunks in the same order: nothing to re-value
+            return self._finish(score, chunks, [old_values[i] for i in new_ids], [old_deltas.get(i, 0.0) for i in new_ids], reused=0, exact=0, estimated=n)
+
+        if not self.hierarchical:
+            # Group testing would label approximate values as exact LOO
+            batch_scores = score([new_full] + [without(new_full, {i}) for i in new_full])
+            values = [batch_scores[0] - partial_score for partial_score in batch_scores[1:]]
+            return self._finish(score, chunks, values, [0.0] * n, reused=score.reused, exact=n, estimated=0)
+
+        values = [0.0] * n
+        deltas = [0.0] * n
+        first = [new_full, old_full] + [without(new_full, {t}) for t in targets]
+        level = [(0, len(unchanged))] if unchanged else []
+        exact = len(targets)
+        depth = 0
+        while first or level:
+            groups = [set(unchanged[start:end]) for start, end in level]
+            batch_scores = score(first + [c for g in groups for c in (without(new_full, g), without(old_full, g))])
+            if first:
+                new_score, old_score = batch_scores[0], batch_scores[1]
+                for t, partial_score in zip(targets, batch_scores[2:len(first)]):
+                    values[t] = new_score - partial_score
+                batch_scores = batch_scores[len(first):]
+                first = []
+
+            next_level = []
+            for k, (start, end) in enumerate(level):
+                new_delta = new_score - batch_scores[2 * k]
+                change = new_delta - (old_score - batch_scores[2 * k + 1])
+                if end - start == 1:
+                    values[unchanged[start]] = new_delta
+                    exact += 1
+                elif depth >= self.min_depth and abs(change) <= self.tolerance:
+                    for i in unchanged[start:end]:
+                        values[i] = old_values[new_ids[i]] + change / (end - start)
+                        deltas[i] = old_deltas.get(new_ids[i], 0.0) + abs(change)
+                else:
+                    next_level.extend(self._split(start, end))
+            level = next_level
+            depth += 1
 
-    def evaluate(self, query: str, chunks: List[Chunk], answer: str) -> List[ValuationResult]:
-        full_context = " ".join([c.text for c in chunks])
-        full_score = self.judge.get_faithfulness(query, full_context, answer)
-        
-        results = []
-        for i, chunk in enumerate(chunks):
-            # Create context without current chunk
-            partial_chunks = chunks[:i] + chunks[i+1:]
-            partial_context = " ".join([c.text for c in partial_chunks])
-            
-            partial_score = self.judge.get_faithfulness(query, partial_context, answer)
-            
-            # Value is the marginal contribution
-            score = full_score - partial_score
-            
-            results.append(ValuationResult(
-                chunk_id=chunk.id,
-                method=ValuationMethod.LOO,
-                score=score
-            ))
-            
-        return results
+        return self._finish(score, chunks, values, deltas, reused=score.reused, exact=exact, estimated=n - exact)
@@ -1,34 +1,204 @@
-from typing import List
-from sklearn.linear_model import LinearRegression
-from sklearn.feature_extraction.text import TfidfVectorizer
-from src.dv.models.entities import Chunk, ValuationResult
+import math
+import pickle
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+import numpy as np
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.linear_model import SGDRegressor
+from src.dv.interfaces import Valuator
+from src.dv.models.entities import Chunk, ValuationMethod, ValuationResult
+from src.dv.models.results import ValuationResults
 
 class ProxyFilter:
-    def __init__(self):
-        self.vectorizer = TfidfVectorizer()
-        self.model = LinearRegression()
+    """Cheap text model that predicts a chunk's valuation score.
 
-    def train(self, chunks: List[Chunk], results: List[ValuationResult], threshold: float = 0.0):
-        """Trains a proxy filter to predict chunk value score."""
-        # Map results to chunks
+    Features come from a stateless HashingVectorizer, so nothing is refit when
+    new text arrives, and an SGDRegressor is updated online with `partial_fit`
+    as valuation results come in. Prediction runs on the whole sparse batch at
+    once. `residual_std` tracks the recent error on each new batch before the
+    model learns from it, which `prefilter` uses to drop only chunks that are
+    confidently below the threshold. A lock guards the model and statistics,
+    so one filter can be shared by concurrent valuators (e.g. server requests).
+    """
+
+    def __init__(self, n_features: int = 1 << 18, alpha: float = 1e-4, eta0: float = 0.1, error_decay: float = 0.9, seed: Optional[int] = None):
+        self.vectorizer = HashingVectorizer(n_features=n_features, ngram_range=(1, 2), alternate_sign=False, norm="l2")
+        self.model = SGDRegressor(alpha=alpha, eta0=eta0, random_state=seed)
+        self.error_decay = error_decay
+        self.n_samples = 0
+        # Exponentially weighted mean of squared held-out residuals, per batch
+        self._sq_error: Optional[float] = None
+        # Hashed features seen in training, and Welford stats of the targets
+        self._seen = np.zeros(n_features, dtype=bool)
+        self._y_mean = 0.0
+        self._y_m2 = 0.0
+        self._lock = threading.RLock()
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]):
+        self.__dict__.update(state)
+        self._lock = threading.RLock()
+
+    @property
+    def is_trained(self) -> bool:
+        return self.n_samples > 0
+
+    @property
+    def residual_std(self) -> float:
+        """Recent RMS error on results seen before the model trained on them (inf until measured)."""
+        if self._sq_error is None:
+            return math.inf
+        return math.sqrt(self._sq_error)
+
+    @staticmethod
+    def _texts(items: Sequence[Union[str, Chunk]]) -> List[str]:
+        return [item if isinstance(item, str) else item.text for item in items]
+
+    def partial_fit(self, chunks: List[Chunk], results: Sequence[ValuationResult], epochs: int = 1):
+        """Updates the model with one batch of (chunk, score) pairs, making `epochs` passes over it.
+
+        The residual error and target statistics see the batch once, before
+        the first pass, so extra epochs neither leak training data into the
+        error estimate nor count samples twice.
+        """
         chunk_map = {c.id: c.text for c in chunks}
-        
-        X_texts = []
-        y = []
-        
-        for res in results:
-            if res.chunk_id in chunk_map:
-                X_texts.append(chunk_map[res.chunk_id])
-                y.append(res.score)
-        
-        if not X_texts:
+        pairs = [(chunk_map[r.chunk_id], r.score) for r in results if r.chunk_id in chunk_map]
+        if not pairs:
             return
-            
-        X = self.vectorizer.fit_transform(X_texts)
-        self.model.fit(X, y)
+
+        X = self.vectorizer.transform([text for text, _ in pairs])
+        y = np.array([score for _, score in pairs], dtype=np.float64)
+        with self._lock:
+            if self.is_trained:
+                batch_error = float(np.mean((self.model.predict(X) - y) ** 2))
+                if self._sq_error is None:
+                    self._sq_error = batch_error
+                else:
+                    self._sq_error = self.error_decay * self._sq_error + (1 - self.error_decay) * batch_error
+            self._seen[X.indices] = True
+            for value in y:
+                self.n_samples += 1
+                delta = value - self._y_mean
+                self._y_mean += delta / self.n_samples
+                self._y_m2 += delta * (value - self._y_mean)
+            for _ in range(epochs):
+                self.model.partial_fit(X, y)
+
+    def train(self, chunks: List[Chunk], results: Sequence[ValuationResult], threshold: float = 0.0, epochs: int = 5):
+        """Trains a proxy filter to predict chunk value score.
+
+        Incremental: the model keeps what it learned from earlier calls and
+        makes `epochs` passes over this data.
+        """
+        self.partial_fit(chunks, results, epochs=epochs)
+
+    def predict_batch(self, items: Sequence[Union[str, Chunk]]) -> np.ndarray:
+        """Predicted scores for many texts or chunks in one sparse transform."""
+        if not items:
+            return np.empty(0)
+        X = self.vectorizer.transform(self._texts(items))
+        with self._lock:
+            return self.model.predict(X)
+
+    def predict_with_uncertainty(self, items: Sequence[Union[str, Chunk]]) -> Tuple[np.ndarray, np.ndarray]:
+        """Predictions with a per-item standard deviation.
+
+        Each item's feature weight splits into features seen in training, whose
+        error is `residual_std`, and unseen ones, about which the model knows
+        nothing beyond the spread of training targets. The std mixes the two
+        variances by that split. Everything is inf until the proxy has been
+        scored on at least one batch it had not trained on.
+        """
+        if not items:
+            return np.empty(0), np.empty(0)
+        X = self.vectorizer.transform(self._texts(items))
+        with self._lock:
+            if self._sq_error is None:
+                return np.zeros(len(items)), np.full(len(items), math.inf)
+            # Share of each row's (L2-normalized) squared weight on unseen features
+            sq = X.multiply(X).tocsr()
+            sq.data[self._seen[sq.indices]] = 0.0
+            unseen = np.asarray(sq.sum(axis=1)).ravel()
+            target_var = self._y_m2 / self.n_samples
+            std = np.sqrt((1.0 - unseen) * self._sq_error + unseen * target_var)
+            return self.model.predict(X), std
 
     def predict_value(self, text: str) -> float:
         """Predicts the valuation score of a chunk."""
-        X = self.vectorizer.transform([text])
-        return float(self.model.predict(X)[0])
+        return float(self.predict_batch([text])[0])
+
+    def prefilter(self, chunks: List[Chunk], threshold: float = 0.0, z: float = 2.0) -> Tuple[List[Chunk], List[Chunk]]:
+        """Splits chunks into (kept, dropped) before any judge call.
+
+        A chunk is dropped only if its prediction plus `z` residual standard
+        deviations is still below `threshold`. An untrained or unmeasured
+        proxy keeps everything.
+        """
+        if not self.is_trained or not chunks:
+            return list(chunks), []
+        with self._lock:
+            upper = self.predict_batch(chunks) + z * self.residual_std
+        keep = upper >= threshold
+        return [c for c, k in zip(chunks, keep) if k], [c for c, k in zip(chunks, keep) if not k]
+
+    def save(self, path: str):
+        with self._lock, open(path, "wb") as f:
+            pickle.dump(self, f)
+
+    @classmethod
+    def load(cls, path: str) -> "ProxyFilter":
+        with open(path, "rb") as f:
+            proxy = pickle.load(f)
+        if not isinstance(proxy, cls):
+            raise TypeError(f"{path} does not contain a {cls.__name__}")
+        return proxy
+
+class ProxyValuator(Valuator):
+    """Valuator that answers from a ProxyFilter and asks a real valuator only when unsure.
+
+    Every chunk first gets the proxy's prediction and uncertainty. Chunks whose
+    std exceeds `max_uncertainty` (at most `max_fallback` of them, most
+    uncertain first) are valued by `fallback` through `evaluate_targets`. Their
+    exact scores replace the predictions and, with `retrain`, update the proxy.
+    Results carry ValuationMethod.PROXY. `last_uncertainty` holds each chunk's
+    std, which is 0 for chunks valued exactly.
+    """
+
+    def __init__(self, proxy: ProxyFilter, fallback: Valuator, max_uncertainty: float = 0.1, max_fallback: Optional[int] = None, retrain: bool = True):
+        self.proxy = proxy
+        self.fallback = fallback
+        self.max_uncertainty = max_uncertainty
+        self.max_fallback = max_fallback
+        self.retrain = retrain
+        self.last_run_stats: Dict[str, Any] = {}
+        self.last_uncertainty: Dict[str, float] = {}
+
+    def evaluate(self, query: str, chunks: List[Chunk], answer: str) -> ValuationResults:
+        predictions, uncertainty = self.proxy.predict_with_uncertainty(chunks)
+        scores = predictions.astype(np.float64)
+
+        # Most uncertain first, so a capped budget goes where the proxy knows least
+        order = np.argsort(-uncertainty, kind="stable")
+        targets = [int(i) for i in order if uncertainty[i] > self.max_uncertainty]
+        if self.max_fallback is not None:
+            targets = targets[:self.max_fallback]
+        targets.sort()
+
+        fallback_stats: Dict[str, Any] = {}
+        if targets:
+            exact = self.fallback.evaluate_targets(query, chunks, answer, targets)
+            position = {c.id: i for i, c in enumerate(chunks)}
+            for r in exact:
+                scores[position[r.chunk_id]] = r.score
+                uncertainty[position[r.chunk_id]] = 0.0
+            fallback_stats = dict(getattr(self.fallback, "last_run_stats", {}))
+            if self.retrain:
+                self.proxy.partial_fit([chunks[i] for i in targets], exact)
 
+        self.last_run_stats = {"predicted": len(chunks) - len(targets), "valuated": len(targets), **fallback_stats}
+        self.last_uncertainty = {c.id: float(u) for c, u in zip(chunks, uncertainty)}
+        return ValuationResults.from_scores([c.id for c in chunks], ValuationMethod.PROXY, scores)
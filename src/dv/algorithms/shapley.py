@@ -1,83 +1,383 @@
 import itertools
 import math
-from typing import List
+import random
+from statistics import NormalDist
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+from src.dv.algorithms.coalitions import CoalitionScorer, CoalitionScores
 from src.dv.interfaces import Valuator, Judge
-from src.dv.models.entities import Chunk, ValuationResult, ValuationMethod
+from src.dv.models.entities import Chunk, ExperimentRun, ValuationMethod
+from src.dv.models.results import ValuationResults
 
 class ShapleyValuator(Valuator):
-    def __init__(self, judge: Judge, mc_samples: int = 100):
+    """Shapley valuation of chunks with a choice of estimator.
+
+    - "exact": all 2^n coalitions.
+    - "permutation": Monte Carlo over random permutations (optionally truncated).
+    - "kernel": KernelSHAP weighted least squares over sampled coalitions.
+    - "stratified": coalition-size stratified sampling.
+    - "auto": exact up to `exact_max_chunks` chunks, permutation beyond.
+
+    The sampling estimators stop at `budget` judge calls when it is set.
+    Results carry `method`, ValuationMethod.SHAPLEY unless told otherwise
+    (e.g. SHAPLEY_MC, to tell estimators apart in one output).
+
+    `evaluate_incremental` reuses the coalition scores of a previous run that
+    involve only unchanged chunks. Monte Carlo also carries the previous
+    permutations over: removed chunks are dropped and added ones inserted at
+    uniformly random positions, which keeps each permutation uniform over the
+    new set, so every prefix before the first added chunk is already scored.
+    """
+
+    ESTIMATORS = ("auto", "exact", "permutation", "kernel", "stratified")
+
+    def __init__(
+        self,
+        judge: Judge,
+        mc_samples: int = 100,
+        estimator: str = "auto",
+        budget: Optional[int] = None,
+        exact_max_chunks: int = 10,
+        exact_batch_size: int = 4096,
+        batch_permutations: int = 10,
+        ci_width: Optional[float] = None,
+        truncation_tol: Optional[float] = None,
+        confidence: float = 0.95,
+        seed: Optional[int] = None,
+        method: ValuationMethod = ValuationMethod.SHAPLEY,
+    ):
+        if estimator not in self.ESTIMATORS:
+            raise ValueError(f"Unknown Shapley estimator '{estimator}', expected one of {self.ESTIMATORS}")
         self.judge = judge
         self.mc_samples = mc_samples
+        self.estimator = estimator
+        self.budget = budget
+        self.exact_max_chunks = exact_max_chunks
+        self.exact_batch_size = exact_batch_size
+        self.batch_permutations = batch_permutations
+        self.ci_width = ci_width
+        self.truncation_tol = truncation_tol
+        self.confidence = confidence
+        self.seed = seed
+        self.method = method
+        self.last_run_stats: Dict[str, Any] = {}
+        self.last_state: Dict[str, Any] = {}
+        # Either the last run's scorer or, for exact runs, (chunk ids, scores by bitmask)
+        self._last_scorer: Optional[CoalitionScorer] = None
+        self._last_exact: Optional[Tuple[List[str], np.ndarray]] = None
 
-    def evaluate(self, query: str, chunks: List[Chunk], answer: str) -> List[ValuationResult]:
-        n = len(chunks)
-        if n <= 10:
-            return self._evaluate_exact(query, chunks, answer)
+    @property
+    def last_coalition_scores(self) -> CoalitionScores:
+        """Coalition scores of the last run, keyed by chunk ids."""
+        if self._last_exact is not None:
+            ids, scores = self._last_exact
+            return {tuple(cid for i, cid in enumerate(ids) if mask >> i & 1): float(s) for mask, s in enumerate(scores)}
+        return self._last_scorer.by_id() if self._last_scorer is not None else {}
+
+    def _estimator_for(self, n: int) -> str:
+        if self.estimator == "auto":
+            return "exact" if n <= self.exact_max_chunks else "permutation"
+        return self.estimator
+
+    def evaluate(self, query: str, chunks: List[Chunk], answer: str) -> ValuationResults:
+        return self._evaluate(query, chunks, answer)
+
+    def evaluate_incremental(self, query: str, chunks: List[Chunk], answer: str, previous: ExperimentRun, state: Optional[Dict[str, Any]] = None) -> ValuationResults:
+        """Shapley values after the chunk set changed, reusing the previous run's coalitions and permutations."""
+        permutations = None
+        if self._estimator_for(len(chunks)) == "permutation" and state and state.get("permutations"):
+            permutations = self._carry_permutations(state["permutations"], chunks)
+        return self._evaluate(query, chunks, answer, (state or {}).get("coalition_scores"), permutations)
+
+    def _carry_permutations(self, old_permutations: List[List[str]], chunks: List[Chunk]) -> List[List[int]]:
+        """Maps permutations of the old chunk set onto the new one (at most `mc_samples`)."""
+        rng = random.Random(None if self.seed is None else self.seed + 1)
+        index = {c.id: i for i, c in enumerate(chunks)}
+        old_ids = set(old_permutations[0])
+        added = [i for i, c in enumerate(chunks) if c.id not in old_ids]
+        carried = []
+        for old in old_permutations[:self.mc_samples]:
+            perm = [index[cid] for cid in old if cid in index]
+            for i in added:
+                perm.insert(rng.randint(0, len(perm)), i)
+            carried.append(perm)
+        return carried
+
+    def _evaluate(self, query: str, chunks: List[Chunk], answer: str, known: Optional[CoalitionScores] = None, permutations: Optional[List[List[int]]] = None) -> ValuationResults:
+        estimator = self._estimator_for(len(chunks))
+        self._last_scorer = None
+        self._last_exact = None
+        self.last_state = {}
+        
+        if estimator == "exact":
+            return self._evaluate_exact(query, chunks, answer, known)
+        elif estimator == "permutation":
+            return self._evaluate_mc(query, chunks, answer, known, permutations)
+        elif estimator == "kernel":
+            return self._evaluate_kernel(query, chunks, answer, known)
         else:
-            return self._evaluate_mc(query, chunks, answer)
+            return self._evaluate_stratified(query, chunks, answer, known)
+
+    def _evaluate_exact(self, query: str, chunks: List[Chunk], answer: str, known: Optional[CoalitionScores] = None) -> ValuationResults:
+        """Exact Shapley values over all 2^n coalitions.
 
-    def _evaluate_exact(self, query: str, chunks: List[Chunk], answer: str) -> List[ValuationResult]:
+        Coalition scores live in a NumPy array indexed by bitmask (bit i set means
+        chunk i is in the coalition), so each chunk's value is one vectorized
+        weighted sum over the masks that exclude it.
+        """
         n = len(chunks)
-        scores = {}
-        
-        # Prepare all queries/contexts/answers for batching if supported
-        subset_definitions = []
-        for r in range(n + 1):
-            for subset_indices in itertools.combinations(range(n), r):
-                subset_chunks = [chunks[i] for i in subset_indices]
-                context = " ".join([c.text for c in subset_chunks])
-                subset_definitions.append((subset_indices, context))
-        
-        if hasattr(self.judge, "get_faithfulness_batch"):
-            contexts = [ctx for _, ctx in subset_definitions]
-            queries = [query] * len(contexts)
-            answers = [answer] * len(contexts)
-            batch_scores = self.judge.get_faithfulness_batch(queries, contexts, answers)
-            for (subset_indices, _), score in zip(subset_definitions, batch_scores):
-                scores[subset_indices] = score
-        else:
-            for subset_indices, context in subset_definitions:
-                scores[subset_indices] = self.judge.get_faithfulness(query, context, answer)
+        n_masks = 1 << n
+        masks = np.arange(n_masks, dtype=np.int64)
+        
+        # Score coalitions in blocks so at most `exact_batch_size` contexts are held at once
+        texts = [c.text for c in chunks]
+        ids = [c.id for c in chunks]
+        scores = np.empty(n_masks, dtype=np.float64)
+        judge_calls = 0
+        for start in range(0, n_masks, self.exact_batch_size):
+            block = range(start, min(start + self.exact_batch_size, n_masks))
+            coalitions = [tuple(i for i in range(n) if mask >> i & 1) for mask in block]
+            # Coalitions scored in an earlier run are looked up instead of judged
+            cached = [known.get(tuple(ids[i] for i in c)) for c in coalitions] if known else [None] * len(coalitions)
+            missing = [c for c, s in zip(coalitions, cached) if s is None]
+            fresh = iter(self.judge.get_faithfulness_coalitions(query, texts, missing, answer) if missing else [])
+            scores[block.start:block.stop] = [s if s is not None else next(fresh) for s in cached]
+            judge_calls += len(missing)
+        self.last_run_stats = {"judge_calls": judge_calls, "reused": n_masks - judge_calls}
+        self._last_exact = (ids, scores)
+        
+        # Coalition sizes (popcounts) and the Shapley weight |S|!(n-|S|-1)!/n! per size
+        sizes = np.zeros(n_masks, dtype=np.int64)
+        for i in range(n):
+            sizes += (masks >> i) & 1
+        weights = np.array(
+            [math.factorial(k) * math.factorial(n - k - 1) / math.factorial(n) for k in range(n)]
+        )
         
-        shapley_values = [0.0] * n
+        shapley_values = []
         for i in range(n):
-            for subset_indices in scores:
-                if i not in subset_indices:
-                    # S is a subset not containing i
-                    # S_with_i is S + {i}
-                    S = subset_indices
-                    S_with_i = tuple(sorted(subset_indices + (i,)))
-                    
-                    weight = (math.factorial(len(S)) * math.factorial(n - len(S) - 1)) / math.factorial(n)
-                    shapley_values[i] += weight * (scores[S_with_i] - scores[S])
-        
-        return [
-            ValuationResult(chunk_id=chunks[i].id, method=ValuationMethod.SHAPLEY, score=shapley_values[i])
-            for i in range(n)
-        ]
-
-    def _evaluate_mc(self, query: str, chunks: List[Chunk], answer: str) -> List[ValuationResult]:
-        # Simple Monte Carlo approximation via random permutations
-        import random
+            bit = 1 << i
+            without_i = masks[(masks & bit) == 0]
+            marginals = scores[without_i | bit] - scores[without_i]
+            shapley_values.append(float(np.dot(weights[sizes[without_i]], marginals)))
+        
+        return ValuationResults.from_scores([c.id for c in chunks], self.method, shapley_values)
+
+    def _evaluate_mc(self, query: str, chunks: List[Chunk], answer: str, known: Optional[CoalitionScores] = None, permutations: Optional[List[List[int]]] = None) -> ValuationResults:
+        """Permutation-sampling Monte Carlo Shapley.
+
+        Permutations are drawn in rounds of `batch_permutations` and their prefixes
+        are scored together in judge batches. Prefixes already scored earlier in the
+        run are reused. Sampling stops after `mc_samples` permutations, once the
+        judge-call `budget` is spent, or earlier once
+        every chunk's confidence interval is narrower than `ci_width`. With
+        `truncation_tol` set, a permutation stops being walked once its prefix
+        score is within the tolerance of the full-context score (TMC-Shapley).
+        Given `permutations`, those are walked before any new ones are drawn.
+        A round takes only as many permutations as fit in the remaining budget
+        at n judge calls each, so the budget is never exceeded.
+        """
         n = len(chunks)
-        shapley_values = [0.0] * n
+        rng = random.Random(self.seed)
+        z = NormalDist().inv_cdf(0.5 + self.confidence / 2)
+        
+        score_prefixes = CoalitionScorer(self.judge, query, chunks, answer, known)
+        empty_score, full_score = score_prefixes([(), tuple(range(n))])
         
-        for _ in range(self.mc_samples):
-            perm = list(range(n))
-            random.shuffle(perm)
+        # Welford running mean/variance per chunk
+        counts = [0] * n
+        means = [0.0] * n
+        m2 = [0.0] * n
+        
+        def update(idx, value):
+            counts[idx] += 1
+            delta = value - means[idx]
+            means[idx] += delta / counts[idx]
+            m2[idx] += delta * (value - means[idx])
+        
+        carried = list(reversed(permutations or []))
+        walked: List[List[int]] = []
+        sampled = 0
+        ci = float("inf")
+        while sampled < self.mc_samples:
+            round_size = min(self.batch_permutations, self.mc_samples - sampled)
+            if self.budget is not None:
+                round_size = min(round_size, (self.budget - score_prefixes.calls) // max(n, 1))
+                if round_size <= 0:
+                    break
+            perms = []
+            for _ in range(round_size):
+                if carried:
+                    perms.append(carried.pop())
+                    continue
+                perm = list(range(n))
+                rng.shuffle(perm)
+                perms.append(perm)
+            walked.extend(perms)
+            sampled += round_size
             
-            prev_score = self.judge.get_faithfulness(query, "", answer) # Score of empty context
-            current_context_list = []
+            if self.truncation_tol is None:
+                # Every prefix of every permutation in the round goes out in one batch
+                prefixes = [tuple(perm[:k + 1]) for perm in perms for k in range(n)]
+                flat_scores = score_prefixes(prefixes)
+                for p, perm in enumerate(perms):
+                    prev_score = empty_score
+                    for k, idx in enumerate(perm):
+                        current_score = flat_scores[p * n + k]
+                        update(idx, current_score - prev_score)
+                        prev_score = current_score
+            else:
+                # Walk permutations in lockstep so each position is one batch; truncated
+                # permutations drop out and their remaining chunks get zero marginal
+                prev_scores = [empty_score] * round_size
+                active = list(range(round_size))
+                for k in range(n):
+                    if not active:
+                        break
+                    step_scores = score_prefixes([tuple(perms[p][:k + 1]) for p in active])
+                    still_active = []
+                    for p, current_score in zip(active, step_scores):
+                        update(perms[p][k], current_score - prev_scores[p])
+                        prev_scores[p] = current_score
+                        if abs(full_score - current_score) < self.truncation_tol:
+                            for idx in perms[p][k + 1:]:
+                                update(idx, 0.0)
+                        else:
+                            still_active.append(p)
+                    active = still_active
             
-            for idx in perm:
-                current_context_list.append(chunks[idx].text)
-                current_context = " ".join(current_context_list)
-                current_score = self.judge.get_faithfulness(query, current_context, answer)
-                
-                shapley_values[idx] += (current_score - prev_score)
-                prev_score = current_score
-        
-        return [
-            ValuationResult(chunk_id=chunks[i].id, method=ValuationMethod.SHAPLEY, score=shapley_values[i] / self.mc_samples)
-            for i in range(n)
-        ]
+            if sampled >= 2:
+                ci = max(2 * z * math.sqrt(m2[i] / (counts[i] - 1) / counts[i]) for i in range(n))
+                if self.ci_width is not None and ci <= self.ci_width:
+                    break
+        
+        self.last_run_stats = {
+            "judge_calls": score_prefixes.calls,
+            "permutations": sampled,
+            "ci_width": ci,
+            "converged": self.ci_width is not None and ci <= self.ci_width,
+            "reused": score_prefixes.reused,
+        }
+        self._last_scorer = score_prefixes
+        ids = [c.id for c in chunks]
+        self.last_state = {"permutations": [[ids[i] for i in perm] for perm in walked]}
+        
+        return ValuationResults.from_scores([c.id for c in chunks], self.method, means)
+
+    def _default_budget(self, n: int) -> int:
+        # Same number of coalition evaluations as `mc_samples` untruncated permutations
+        return self.budget if self.budget is not None else self.mc_samples * n
+
+    def _evaluate_kernel(self, query: str, chunks: List[Chunk], answer: str, known: Optional[CoalitionScores] = None) -> ValuationResults:
+        """KernelSHAP: constrained least squares over kernel-sampled coalitions.
+
+        Coalition sizes are drawn with probability proportional to the Shapley
+        kernel (n-1)/(s(n-s)), members uniformly within a size, each sample paired
+        with its complement. Since sampling already follows the kernel, the
+        regression is unweighted; the efficiency constraint sum(phi) = v(N) - v(0)
+        is enforced by eliminating the last chunk's coefficient.
+        """
+        n = len(chunks)
+        if n == 0:
+            self.last_run_stats = {"judge_calls": 0}
+            return ValuationResults.from_scores([], self.method, [])
+        budget = self._default_budget(n)
+        score = CoalitionScorer(self.judge, query, chunks, answer, known)
+        empty_score, full_score = score([(), tuple(range(n))])
+        if n == 1:
+            self.last_run_stats = {"judge_calls": score.calls}
+            self._last_scorer = score
+            return ValuationResults.from_scores([chunks[0].id], self.method, [full_score - empty_score])
+        
+        rng = np.random.default_rng(self.seed)
+        sizes = np.arange(1, n)
+        size_probs = (n - 1) / (sizes * (n - sizes))
+        size_probs /= size_probs.sum()
+        
+        coalitions = []
+        n_pairs = max(1, (budget - 2) // 2)
+        for s in rng.choice(sizes, size=n_pairs, p=size_probs):
+            members = np.zeros(n, dtype=bool)
+            members[rng.choice(n, size=s, replace=False)] = True
+            coalitions.append(tuple(np.flatnonzero(members).tolist()))
+            coalitions.append(tuple(np.flatnonzero(~members).tolist()))
+        
+        y = np.array(score(coalitions)) - empty_score
+        Z = np.zeros((len(coalitions), n))
+        for row, coalition in enumerate(coalitions):
+            Z[row, list(coalition)] = 1.0
+        
+        # phi_last = total - sum(phi_others)  =>  y - z_last * total = (z_j - z_last) . phi_others
+        total = full_score - empty_score
+        X = Z[:, :-1] - Z[:, -1:]
+        target = y - Z[:, -1] * total
+        phi_others, *_ = np.linalg.lstsq(X, target, rcond=None)
+        shapley_values = np.append(phi_others, total - phi_others.sum())
+        
+        self.last_run_stats = {"judge_calls": score.calls, "coalitions_sampled": len(coalitions)}
+        self._last_scorer = score
+        return ValuationResults.from_scores([c.id for c in chunks], self.method, shapley_values)
+
+    def _evaluate_stratified(self, query: str, chunks: List[Chunk], answer: str, known: Optional[CoalitionScores] = None) -> ValuationResults:
+        """Stratified-by-coalition-size Shapley (stratified SVARM).
+
+        phi_i = (1/n) * sum_s ( E[v(S) | |S|=s+1, i in S] - E[v(S) | |S|=s, i not in S] ).
+        Every sampled coalition updates the "in" estimate of each member and the
+        "out" estimate of each non-member, so one judge call informs all chunks.
+        The budget is split over all n + 1 sizes, smallest strata first: a size
+        whose share covers all of its coalitions is enumerated exactly and passes
+        what it leaves over to the larger ones, so at most `budget` coalitions are
+        scored. Every size needs at least one, so a budget below n + 1 raises
+        ValueError.
+        """
+        n = len(chunks)
+        if n == 0:
+            self.last_run_stats = {"judge_calls": 0, "coalitions_sampled": 0}
+            return ValuationResults.from_scores([], self.method, [])
+        budget = self._default_budget(n) if self.budget is not None else max(self._default_budget(n), n + 1)
+        if budget < n + 1:
+            raise ValueError(f"Stratified Shapley needs a budget of at least {n + 1} judge calls for {n} chunks, got {budget}")
+        rng = np.random.default_rng(self.seed)
+        score = CoalitionScorer(self.judge, query, chunks, answer, known)
+        
+        # Per size: the coalitions (sorted index tuples) sampled at that size
+        samples: Dict[int, List[Tuple[int, ...]]] = {}
+        remaining = budget
+        sizes = sorted(range(n + 1), key=lambda s: math.comb(n, s))
+        for k, s in enumerate(sizes):
+            share = min(remaining // (len(sizes) - k), math.comb(n, s))
+            remaining -= share
+            if share == math.comb(n, s):
+                samples[s] = [tuple(c) for c in itertools.combinations(range(n), s)]
+            else:
+                drawn = set()
+                while len(drawn) < share:
+                    drawn.add(tuple(sorted(rng.choice(n, size=s, replace=False).tolist())))
+                samples[s] = sorted(drawn)
+        
+        flat = [c for s in sorted(samples) for c in samples[s]]
+        flat_scores = dict(zip(flat, score(flat)))
+        
+        shapley_values = np.zeros(n)
+        for s in range(n):
+            in_rows = samples[s + 1]
+            out_rows = samples[s]
+            in_members = np.zeros((len(in_rows), n), dtype=bool)
+            for row, c in enumerate(in_rows):
+                in_members[row, list(c)] = True
+            out_members = np.zeros((len(out_rows), n), dtype=bool)
+            for row, c in enumerate(out_rows):
+                out_members[row, list(c)] = True
+            in_scores = np.array([flat_scores[c] for c in in_rows])
+            out_scores = np.array([flat_scores[c] for c in out_rows])
+            
+            in_counts = in_members.sum(axis=0)
+            out_counts = (~out_members).sum(axis=0)
+            # Strata no sample happened to cover fall back to the size's overall mean
+            in_mean = np.where(in_counts > 0, in_scores @ in_members / np.maximum(in_counts, 1), in_scores.mean())
+            out_mean = np.where(out_counts > 0, out_scores @ ~out_members / np.maximum(out_counts, 1), out_scores.mean())
+            shapley_values += (in_mean - out_mean) / n
+        
+        self.last_run_stats = {"judge_calls": score.calls, "coalitions_sampled": len(flat)}
+        self._last_scorer = score
+        return ValuationResults.from_scores([c.id for c in chunks], self.method, shapley_values)
@@ -0,0 +1,228 @@
+import copy
+import math
+import platform
+import random
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from src.dv.algorithms.attention import AttentionValuator
+from src.dv.algorithms.loo import LOOValuator
+from src.dv.algorithms.proxy import ProxyFilter, ProxyValuator
+from src.dv.algorithms.shapley import ShapleyValuator
+from src.dv.evaluation.metrics import calculate_agreement_kendall, calculate_mae
+from src.dv.interfaces import Judge, Signaler, Valuator
+from src.dv.models.entities import Chunk
+
+DEFAULT_CHUNK_COUNTS = (3, 5, 10, 20, 50, 100)
+DEFAULT_METHODS = ("loo", "shapley-exact", "shapley-mc", "attention", "proxy")
+
+class SyntheticJudge(Judge):
+    """Deterministic judge over a hidden per-word value table.
+
+    A context scores 1 - exp(-s), where s is the summed value of the distinct
+    vocabulary words it contains, so chunks sharing a key word are redundant
+    and LOO and Shapley disagree as they do on real judges. `noise` adds
+    Gaussian noise seeded by the context's words, so the same context always
+    gets the same score. Each batch call sleeps `latency` plus `item_latency`
+    per input to mimic a model. `calls` counts inputs scored, `batches` calls.
+    """
+
+    def __init__(self, word_values: Dict[str, float], noise: float = 0.0, latency: float = 0.0, item_latency: float = 0.0, seed: int = 0):
+        self.word_values = word_values
+        self.noise = noise
+        self.latency = latency
+        self.item_latency = item_latency
+        self.seed = seed
+        self.calls = 0
+        self.batches = 0
+
+    def _score(self, words: set) -> float:
+        # Sorted so the float sum doesn't depend on set (hash) order
+        words = sorted(words)
+        total = sum(self.word_values.get(w, 0.0) for w in words)
+        score = 1.0 - math.exp(-max(total, 0.0))
+        if self.noise:
+            rng = random.Random(f"{self.seed}:{' '.join(words)}")
+            score = min(1.0, max(0.0, score + rng.gauss(0.0, self.noise)))
+        return score
+
+    def _wait(self, n: int):
+        if self.latency or self.item_latency:
+            time.sleep(self.latency + self.item_latency * n)
+
+    def get_faithfulness(self, query: str, context: str, answer: str) -> float:
+        return self.get_faithfulness_batch([query], [context], [answer])[0]
+
+    def get_faithfulness_batch(self, queries: List[str], contexts: List[str], answers: List[str]) -> List[float]:
+        self.calls += len(contexts)
+        self.batches += 1
+        self._wait(len(contexts))
+        return [self._score(set(c.split())) for c in contexts]
+
+    def get_faithfulness_coalitions(self, query: str, chunk_texts: List[str], coalitions: List[Tuple[int, ...]], answer: str) -> List[float]:
+        # Same scores as joining the texts, without building the contexts
+        self.calls += len(coalitions)
+        self.batches += 1
+        self._wait(len(coalitions))
+        words = [set(t.split()) for t in chunk_texts]
+        return [self._score(set().union(*(words[i] for i in c))) for c in coalitions]
+
+class SyntheticSignaler(Signaler):
+    """Attention stand-in: each chunk's summed word value plus seeded noise, in one call."""
+
+    def __init__(self, word_values: Dict[str, float], noise: float = 0.0, latency: float = 0.0, seed: int = 0):
+        self.word_values = word_values
+        self.noise = noise
+        self.latency = latency
+        self.rng = np.random.default_rng(seed)
+        self.calls = 0
+
+    def get_signals(self, query: str, context: str, answer: str, chunk_spans: Optional[List[Tuple[int, int]]] = None) -> Dict[str, Any]:
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        scores = np.array([sum(self.word_values.get(w, 0.0) for w in sorted(set(context[s:e].split()))) for s, e in chunk_spans or []])
+        if self.noise:
+            scores = scores + self.rng.normal(0.0, self.noise, len(scores))
+        return {"chunk_scores": scores.tolist()}
+
+def make_vocabulary(size: int = 200, key_words: int = 10, seed: int = 0) -> Dict[str, float]:
+    """Word -> hidden value: a few key words carry most of the value, the rest are near zero."""
+    rng = np.random.default_rng(seed)
+    values = np.abs(rng.normal(0.0, 0.02, size))
+    values[rng.choice(size, size=key_words, replace=False)] = rng.uniform(0.2, 1.0, key_words)
+    return {f"w{i}": float(v) for i, v in enumerate(values)}
+
+def make_chunks(n: int, vocabulary: Sequence[str], words_per_chunk: int = 8, seed: int = 0) -> List[Chunk]:
+    """`n` chunks of random vocabulary words; deterministic for a given seed."""
+    rng = np.random.default_rng(seed)
+    texts = [" ".join(rng.choice(vocabulary, size=words_per_chunk)) for _ in range(n)]
+    return [Chunk(id=f"s{seed}-c{i}", text=t) for i, t in enumerate(texts)]
+
+def reference_shapley(judge: Judge, chunks: List[Chunk], exact_max_chunks: int, samples: int, seed: int) -> Tuple[Dict[str, float], str]:
+    """Ground-truth Shapley values: exact when small enough, else many-permutation MC."""
+    if len(chunks) <= exact_max_chunks:
+        valuator, kind = ShapleyValuator(judge, estimator="exact"), "exact"
+    else:
+        valuator, kind = ShapleyValuator(judge, estimator="permutation", mc_samples=samples, seed=seed), f"permutation-{samples}"
+    return {r.chunk_id: r.score for r in valuator.evaluate("q", chunks, "a")}, kind
+
+def _agreement(values: Dict[str, float], reference: Dict[str, float]) -> Dict[str, Optional[float]]:
+    ids = list(reference)
+    tau = calculate_agreement_kendall([values[i] for i in ids], [reference[i] for i in ids])
+    return {
+        "kendall_tau": None if tau is None or math.isnan(tau) else float(tau),
+        "mae": calculate_mae([reference[i] for i in ids], [values[i] for i in ids]),
+    }
+
+def run_benchmark(
+    chunk_counts: Sequence[int] = DEFAULT_CHUNK_COUNTS,
+    methods: Sequence[str] = DEFAULT_METHODS,
+    noise: float = 0.01,
+    latency: float = 0.0,
+    item_latency: float = 0.0,
+    repeats: int = 1,
+    mc_samples: int = 100,
+    exact_max_chunks: int = 12,
+    reference_samples: int = 500,
+    proxy_warmup: int = 20,
+    seed: int = 0,
+    progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+) -> Dict[str, Any]:
+    """Times each method on synthetic workloads of each size and scores it against Shapley.
+
+    Per (method, chunk count) row: best-of-`repeats` wall time, judge inputs
+    and batches, tracemalloc peak (from a separate traced run, so tracing does
+    not skew the timing), and Kendall tau / MAE against the reference Shapley
+    values of a noise-free judge. shapley-exact is skipped above
+    `exact_max_chunks`. The proxy is warmed on `proxy_warmup` other workloads
+    from the same vocabulary before it is measured.
+    """
+    values = make_vocabulary(seed=seed)
+    vocabulary = list(values)
+
+    def judge() -> SyntheticJudge:
+        return SyntheticJudge(values, noise=noise, latency=latency, item_latency=item_latency, seed=seed)
+
+    proxy = None
+    if "proxy" in methods:
+        proxy = ProxyFilter(seed=seed)
+        warm = ProxyValuator(proxy, LOOValuator(judge()))
+        for i in range(proxy_warmup):
+            warm.evaluate("q", make_chunks(20, vocabulary, seed=seed + 1000 + i), "a")
+
+    factories: Dict[str, Callable[[SyntheticJudge], Valuator]] = {
+        "loo": lambda j: LOOValuator(j),
+        "loo-hierarchical": lambda j: LOOValuator(j, hierarchical=True),
+        "shapley-exact": lambda j: ShapleyValuator(j, estimator="exact"),
+        "shapley-mc": lambda j: ShapleyValuator(j, estimator="permutation", mc_samples=mc_samples, seed=seed),
+        "shapley-kernel": lambda j: ShapleyValuator(j, estimator="kernel", mc_samples=mc_samples, seed=seed),
+        "shapley-stratified": lambda j: ShapleyValuator(j, estimator="stratified", mc_samples=mc_samples, seed=seed),
+        "attention": lambda j: AttentionValuator(SyntheticSignaler(values, noise=noise, latency=latency, seed=seed)),
+        # A copy per run, so every repeat starts from the same warmed proxy
+        "proxy": lambda j: ProxyValuator(copy.deepcopy(proxy), LOOValuator(j)),
+    }
+    unknown = [m for m in methods if m not in factories]
+    if unknown:
+        raise ValueError(f"Unknown benchmark method(s) {unknown}, expected some of {tuple(factories)}")
+
+    rows = []
+    for n in chunk_counts:
+        chunks = make_chunks(n, vocabulary, seed=seed + n)
+        reference, reference_kind = reference_shapley(
+            SyntheticJudge(values, seed=seed), chunks, exact_max_chunks, reference_samples, seed
+        )
+        for method in methods:
+            if method == "shapley-exact" and n > exact_max_chunks:
+                continue
+            best = math.inf
+            for _ in range(max(repeats, 1)):
+                run_judge = judge()
+                valuator = factories[method](run_judge)
+                start = time.perf_counter()
+                results = valuator.evaluate("q", chunks, "a")
+                best = min(best, time.perf_counter() - start)
+
+            traced = factories[method](judge())
+            tracemalloc.start()
+            traced.evaluate("q", chunks, "a")
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            row = {
+                "method": method,
+                "n_chunks": n,
+                "wall_time_s": best,
+                "judge_calls": run_judge.calls,
+                "judge_batches": run_judge.batches,
+                "peak_memory_bytes": peak,
+                "reference": reference_kind,
+                **_agreement({r.chunk_id: r.score for r in results}, reference),
+                "stats": dict(getattr(valuator, "last_run_stats", {})),
+            }
+            rows.append(row)
+            if progress is not None:
+                progress(row)
+
+    return {
+        "config": {
+            "chunk_counts": list(chunk_counts),
+            "methods": list(methods),
+            "noise": noise,
+            "latency": latency,
+            "item_latency": item_latency,
+            "repeats": repeats,
+            "mc_samples": mc_samples,
+            "exact_max_chunks": exact_max_chunks,
+            "reference_samples": reference_samples,
+            "proxy_warmup": proxy_warmup,
+            "seed": seed,
+        },
+        "environment": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+        },
+        "results": rows,
+    }
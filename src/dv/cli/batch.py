@@ -0,0 +1,173 @@
+import glob
+import json
+import os
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence, Tuple
+from src.dv.core import ValuationSuite
+from src.dv.models.entities import Chunk, ExperimentRun, ValuationResult
+from src.utils.hashing import calculate_chunk_hash
+from src.utils.io import iter_jsonl
+
+if TYPE_CHECKING:
+    from src.dv.evaluation.value_index import ChunkValueIndex
+
+def parse_record(record: Dict[str, Any]) -> List[Chunk]:
+    """Builds Chunks from a batch record; plain strings get a content-hash id."""
+    chunks = []
+    for c in record["chunks"]:
+        if isinstance(c, str):
+            chunks.append(Chunk(id=calculate_chunk_hash(c), text=c))
+        else:
+            chunks.append(Chunk(id=c.get("id") or calculate_chunk_hash(c["text"]), text=c["text"], metadata=c.get("metadata", {})))
+    return chunks
+
+class JsonlResultWriter:
+    """Appends one JSON line per finished record.
+
+    On open, a trailing partial line left by a crash is truncated and the run
+    resumes after the last complete record. Results are added to `index` once
+    their line is written, so a resumed run never counts a record twice.
+    """
+
+    def __init__(self, path: str, index: Optional["ChunkValueIndex"] = None):
+        self.path = path
+        self.index = index
+        self.next_record = 0
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        valid_end = 0
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                offset = 0
+                for line in f:
+                    offset += len(line)
+                    if not line.endswith(b"\n"):
+                        break
+                    try:
+                        self.next_record = json.loads(line)["record"] + 1
+                    except (ValueError, KeyError):
+                        break
+                    valid_end = offset
+            with open(path, "rb+") as f:
+                f.truncate(valid_end)
+        self._file = open(path, "a", encoding="utf-8")
+
+    def write(self, record_index: int, record_id: Optional[str], results: Sequence[ValuationResult], chunks: Sequence[Chunk] = ()):
+        line = {
+            "record": record_index,
+            "record_id": record_id,
+            "results": results.to_records() if hasattr(results, "to_records") else [
+                {"chunk_id": r.chunk_id, "method": r.method.value, "score": r.score} for r in results
+            ],
+        }
+        self._file.write(json.dumps(line) + "\n")
+        self._file.flush()
+        if self.index is not None:
+            self.index.update(chunks, results)
+
+    def close(self):
+        self._file.close()
+
+class ParquetResultWriter:
+    """Writes flattened result rows as Parquet part files of `flush_every` records.
+
+    Records are kept as columnar ValuationResults until a flush, which
+    concatenates them into one Arrow table.
+
+    Each part is written to a temporary name and renamed once complete, and its
+    name carries the last record it covers, so resuming only needs a directory
+    listing. Buffered records reach `index` only once their part is in place,
+    so records a resumed run values again were never counted.
+    """
+
+    def __init__(self, path: str, flush_every: int = 1000, index: Optional["ChunkValueIndex"] = None):
+        self.path = path
+        self.flush_every = flush_every
+        self.index = index
+        os.makedirs(path, exist_ok=True)
+        self._records: List[Tuple[int, Optional[str], Sequence[ValuationResult]]] = []
+        self._chunks: List[Sequence[Chunk]] = []
+        self._pending_records = 0
+
+        parts = sorted(glob.glob(os.path.join(path, "part-*.parquet")))
+        self.next_record = int(os.path.basename(parts[-1])[len("part-"):-len(".parquet")]) + 1 if parts else 0
+        self._last_record = self.next_record - 1
+
+    def write(self, record_index: int, record_id: Optional[str], results: Sequence[ValuationResult], chunks: Sequence[Chunk] = ()):
+        self._records.append((record_index, record_id, results))
+        self._chunks.append(chunks)
+        self._last_record = record_index
+        self._pending_records += 1
+        if self._pending_records >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+        if not self._pending_records:
+            return
+        import numpy as np
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        from src.dv.models.results import ValuationResults
+
+        results = ValuationResults.concat([r for _, _, r in self._records])
+        counts = [len(r) for _, _, r in self._records]
+        table = results.to_arrow().drop_columns(["timestamp"])
+        table = table.add_column(0, "record", pa.array(np.repeat([i for i, _, _ in self._records], counts).astype(np.int64)))
+        table = table.add_column(1, "record_id", pa.array(np.repeat(np.array([rid for _, rid, _ in self._records], dtype=object), counts), type=pa.string()))
+
+        final_path = os.path.join(self.path, f"part-{self._last_record:010d}.parquet")
+        tmp_path = final_path + ".tmp"
+        pq.write_table(table, tmp_path)
+        os.replace(tmp_path, final_path)
+        if self.index is not None:
+            for chunks, (_, _, records_results) in zip(self._chunks, self._records):
+                self.index.update(chunks, records_results)
+        self._records = []
+        self._chunks = []
+        self._pending_records = 0
+
+    def close(self):
+        self.flush()
+
+def run_batch(
+    input_path: str,
+    output_path: str,
+    suite: ValuationSuite,
+    fmt: Optional[str] = None,
+    flush_every: int = 1000,
+    incremental: int = 0,
+    index: Optional["ChunkValueIndex"] = None,
+) -> int:
+    """Streams records from a JSONL file through the suite, writing results as each finishes.
+
+    Records are identified by their line number in the input, so rerunning with
+    the same output resumes after the last record that was fully written.
+    With `incremental`, the runs of that many recent (query, answer) pairs are
+    kept, and a re-ask is valued incrementally from its previous run. Each
+    record's results are also added to `index` when given, as soon as they
+    are durably written.
+    Returns the number of records evaluated in this call.
+    """
+    fmt = fmt or ("parquet" if output_path.endswith(".parquet") else "jsonl")
+    writer = ParquetResultWriter(output_path, flush_every, index) if fmt == "parquet" else JsonlResultWriter(output_path, index)
+
+    runs: "OrderedDict[Tuple[str, str], ExperimentRun]" = OrderedDict()
+    processed = 0
+    try:
+        for record_index, record in iter_jsonl(input_path, start=writer.next_record):
+            chunks = parse_record(record)
+            if incremental:
+                key = (record["query"], record["answer"])
+                run = suite.evaluate_run(record["query"], chunks, record["answer"], previous=runs.pop(key, None))
+                runs[key] = run
+                if len(runs) > incremental:
+                    runs.popitem(last=False)
+                results = run.valuation_reports
+            else:
+                results = suite.evaluate_all(record["query"], chunks, record["answer"])
+            writer.write(record_index, record.get("id"), results, chunks)
+            processed += 1
+    finally:
+        writer.close()
+    return processed
@@ -1,23 +1,24 @@
 import argparse
 import json
+from typing import Optional
 from src.dv.models.entities import Chunk, ExperimentRun
-from src.dv.algorithms.loo import LOOValuator
-from src.dv.evaluation.judges import MNLIJudge, LLMJudge
+from src.dv.evaluation.cache import CachedJudge
 from src.dv.evaluation.filtering import filter_negative_chunks
 from src.dv.core import ValuationSuite
-from src.utils.io import save_json
+from src.dv.registry import get_judge, get_valuator
+from src.utils.io import save_json, save_valuation_results
 
-def run_experiment(query: str, chunks_file: str, answer: str, judge_type: str = "mnli"):
+def run_experiment(query: str, chunks_file: str, answer: str, judge_type: str = "mnli", cache_db: Optional[str] = None):
     # Load chunks
     with open(chunks_file, "r") as f:
         chunks_data = json.load(f)
     chunks = [Chunk(id=c["id"], text=c["text"], metadata=c.get("metadata", {})) for c in chunks_data]
     
-    # Initialize Judge
-    judge = MNLIJudge() if judge_type == "mnli" else LLMJudge()
+    # Initialize Judge (cached: the full context is scored by LOO and again below)
+    judge = CachedJudge(get_judge("mnli" if judge_type == "mnli" else "llm")(), db_path=cache_db)
     
     # Initialize Valuators
-    loo = LOOValuator(judge)
+    loo = get_valuator("loo")(judge)
     suite = ValuationSuite({"loo": loo})
     
     # Initial Evaluation
@@ -38,12 +39,16 @@ def run_experiment(query: str, chunks_file: str, answer: str, judge_type: str =
     )
     
     run_dir = f"experiments/{run.id}"
-    save_json(run.__dict__, f"{run_dir}/metadata.json")
+    # Results go to a columnar file; the metadata only points at it
+    save_valuation_results(results, f"{run_dir}/valuation_reports.parquet")
+    save_json({**run.__dict__, "valuation_reports": "valuation_reports.parquet"}, f"{run_dir}/metadata.json")
     
     print(f"Experiment {run.id} completed.")
     print(f"Initial Faithfulness: {initial_faithfulness:.4f}")
     print(f"Post-Filter Faithfulness: {post_filter_faithfulness:.4f}")
     print(f"Improvement: {(post_filter_faithfulness - initial_faithfulness):.4f}")
+    print(f"Judge cache: {judge.stats}")
+    judge.close()
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
@@ -51,6 +56,7 @@ if __name__ == "__main__":
     parser.add_argument("--chunks-file", required=True)
     parser.add_argument("--answer", required=True)
     parser.add_argument("--judge", default="mnli")
+    parser.add_argument("--cache-db", default=None)
     args = parser.parse_args()
     
-    run_experiment(args.query, args.chunks_file, args.answer, args.judge)
+    run_experiment(args.query, args.chunks_file, args.answer, args.judge, args.cache_db)
@@ -1,12 +1,218 @@
 import argparse
 import json
+import os
+import sys
+from functools import partial
+from typing import Dict, List, Optional
 from src.dv.core import ValuationSuite
-from src.dv.algorithms.loo import LOOValuator
-from src.dv.algorithms.shapley import ShapleyValuator
-from src.dv.evaluation.judges import MNLIJudge, LLMJudge
-from src.dv.models.entities import Chunk
+from src.dv.interfaces import Judge, Valuator
+from src.dv.evaluation.cache import CachedJudge
+from src.dv.cli.batch import run_batch
+from src.dv.parallel import ParallelJudge
+from src.dv.profiling import Profiler, ProfiledJudge, profile_valuators
+from src.dv.models.entities import Chunk, ValuationMethod
+from src.dv.registry import get_judge, get_valuator
+from src.dv.server import MicroBatchingJudge, RemoteSuite, ValuationServer
+from src.utils.hashing import DIGESTS, set_chunk_digest
 from src.utils.io import save_valuation_results_csv
 
+# --methods names for each Shapley estimator
+# Method name -> (estimator, method recorded on its results)
+SHAPLEY_ESTIMATORS = {
+    "shapley": ("auto", ValuationMethod.SHAPLEY),
+    "shapley-exact": ("exact", ValuationMethod.SHAPLEY_EXACT),
+    "shapley-mc": ("permutation", ValuationMethod.SHAPLEY_MC),
+    "shapley-kernel": ("kernel", ValuationMethod.SHAPLEY_KERNEL),
+    "shapley-stratified": ("stratified", ValuationMethod.SHAPLEY_STRATIFIED),
+}
+
+def add_valuation_arguments(parser: argparse.ArgumentParser):
+    """Judge and valuator options shared by the evaluate and batch commands."""
+    parser.add_argument("--methods", default="loo", help="Comma-separated methods (loo, loo-hierarchical, shapley, shapley-exact, shapley-mc, shapley-kernel, shapley-stratified, proxy)")
+    parser.add_argument("--judge", default="mnli", choices=["mnli", "mnli-window", "llm", "llm-async", "likelihood"], help="mnli-window scores long contexts in windows aligned to chunks")
+    parser.add_argument("--concurrency", type=int, default=32, help="In-flight requests for the llm-async judge")
+    parser.add_argument("--surrogate", default="gpt2", help="Causal LM used by the likelihood judge")
+    parser.add_argument("--loo-tol", type=float, default=0.01, help="Score change below which loo-hierarchical stops splitting a group")
+    parser.add_argument("--loo-min-depth", type=int, default=0, help="Times loo-hierarchical always splits a group before --loo-tol may stop it")
+    parser.add_argument("--mc-samples", type=int, default=100, help="Max permutations for Monte Carlo Shapley")
+    parser.add_argument("--budget", type=int, default=None, help="Judge-call budget for sampling Shapley estimators")
+    parser.add_argument("--exact-max-chunks", type=int, default=10, help="Largest chunk count valued with exact Shapley")
+    parser.add_argument("--ci-width", type=float, default=None, help="Stop MC Shapley once every chunk's CI is narrower than this")
+    parser.add_argument("--truncation-tol", type=float, default=None, help="Truncate MC permutations once the prefix score is this close to the full score")
+    parser.add_argument("--proxy-model", default=None, help="Proxy model file, loaded if present and saved after the run")
+    parser.add_argument("--proxy-uncertainty", type=float, default=0.1, help="Proxy std above which a chunk is valued with LOO")
+    parser.add_argument("--proxy-max-fallback", type=int, default=None, help="Most chunks per query sent to LOO by the proxy")
+    parser.add_argument("--cache-db", default=None, help="SQLite file for persisting judge scores across runs")
+    parser.add_argument("--value-index", default=None, help="SQLite chunk value index that accumulates per-chunk score statistics across queries")
+    parser.add_argument("--chunk-digest", default="md5", choices=DIGESTS, help="Hash for chunk ids made from text; md5 matches ids from earlier runs, fast uses xxh3 when installed, else blake2b")
+    parser.add_argument("--workers", type=int, default=1, help="Judge worker processes (each loads the model once)")
+    parser.add_argument("--seed", type=int, default=None, help="Base seed for sampling valuators")
+
+def add_server_argument(parser: argparse.ArgumentParser):
+    parser.add_argument("--server", default=None, help="URL of a running `rag-dv serve` to send jobs to instead of loading a judge")
+
+def make_base_judge(kind: str, surrogate: str, concurrency: int = 32) -> Judge:
+    """Builds an uncached judge; top-level so worker processes can call it."""
+    # Resolved through the registry so model libraries load only once a judge is built
+    judge_cls = get_judge(kind)
+    if kind == "likelihood":
+        return judge_cls(surrogate)
+    elif kind == "llm-async":
+        return judge_cls(max_concurrency=concurrency)
+    return judge_cls()
+
+def build_judge(args: argparse.Namespace, micro_batch: bool = False, profiler: Optional[Profiler] = None) -> CachedJudge:
+    if args.workers > 1:
+        # Each worker process loads the judge model once; coalition batches are sharded across them
+        base_judge = ParallelJudge(partial(make_base_judge, args.judge, args.surrogate, args.concurrency), executor="process", max_workers=args.workers, seed=args.seed)
+    else:
+        base_judge = make_base_judge(args.judge, args.surrogate, args.concurrency)
+    if micro_batch:
+        if not args.judge.startswith("llm"):
+            # Warm-up pass so the first job doesn't pay for kernel selection and allocator growth
+            base_judge.get_faithfulness("warm-up", "warm-up", "warm-up")
+        base_judge = MicroBatchingJudge(base_judge, max_batch=args.max_batch, max_wait=args.max_wait_ms / 1000)
+    if profiler is not None:
+        base_judge = ProfiledJudge(base_judge, profiler, layer="inference")
+    # Explicit namespace so cached scores are shared between serial and parallel runs
+    # (both LLM judges use the same prompt and model, so they share entries)
+    namespace = f"{args.judge}:{args.surrogate}" if args.judge == "likelihood" else args.judge.removesuffix("-async")
+    judge = CachedJudge(base_judge, db_path=args.cache_db, namespace=namespace)
+    if profiler is not None:
+        # Forwards stats/close, so callers can keep treating it as the CachedJudge
+        judge = ProfiledJudge(judge, profiler, layer="judge")
+    return judge
+
+def build_proxy_filter(args: argparse.Namespace):
+    """The ProxyFilter behind --methods proxy: loaded from --proxy-model when it exists."""
+    from src.dv.algorithms.proxy import ProxyFilter
+
+    if args.proxy_model and os.path.exists(args.proxy_model):
+        return ProxyFilter.load(args.proxy_model)
+    return ProxyFilter(seed=args.seed)
+
+def open_value_index(args: argparse.Namespace):
+    """The --value-index store, or None; imported lazily since it needs NumPy."""
+    if not getattr(args, "value_index", None):
+        return None
+    from src.dv.evaluation.value_index import ChunkValueIndex
+
+    return ChunkValueIndex(args.value_index)
+
+def save_proxy(args: argparse.Namespace, valuators: Dict[str, Valuator]):
+    if args.proxy_model and "proxy" in valuators:
+        valuators["proxy"].proxy.save(args.proxy_model)
+
+def build_valuators(args: argparse.Namespace, judge: Judge, methods: Optional[List[str]] = None, proxy_filter=None) -> Dict[str, Valuator]:
+    methods = methods or args.methods.split(",")
+    valuators = {}
+    if "loo" in methods:
+        valuators["loo"] = get_valuator("loo")(judge)
+    if "loo-hierarchical" in methods:
+        valuators["loo-hierarchical"] = get_valuator("loo")(judge, hierarchical=True, tolerance=args.loo_tol, min_depth=args.loo_min_depth)
+    if "proxy" in methods:
+        proxy_filter = proxy_filter or build_proxy_filter(args)
+        valuators["proxy"] = get_valuator("proxy")(
+            proxy_filter,
+            get_valuator("loo")(judge),
+            max_uncertainty=args.proxy_uncertainty,
+            max_fallback=args.proxy_max_fallback,
+        )
+    for method in methods:
+        if method in SHAPLEY_ESTIMATORS:
+            estimator, recorded = SHAPLEY_ESTIMATORS[method]
+            valuators[method] = get_valuator("shapley")(
+                judge,
+                mc_samples=args.mc_samples,
+                estimator=estimator,
+                method=recorded,
+                budget=args.budget,
+                exact_max_chunks=args.exact_max_chunks,
+                ci_width=args.ci_width,
+                truncation_tol=args.truncation_tol,
+            )
+    return valuators
+
+def build_suite(args: argparse.Namespace, judge: Judge) -> ValuationSuite:
+    # Independent valuators share the judge pool from threads of this process
+    executor = "thread" if args.workers > 1 else "serial"
+    return ValuationSuite(build_valuators(args, judge), executor=executor, max_workers=args.workers, seed=args.seed)
+
+# Options that act on the judge or valuators of this process, which --server replaces
+_LOCAL_ONLY_OPTIONS = {"profile": "--profile", "profile_output": "--profile-output", "proxy_model": "--proxy-model", "incremental": "--incremental"}
+
+def check_server_options(parser: argparse.ArgumentParser, args: argparse.Namespace):
+    """Rejects local-only options combined with --server instead of silently ignoring them."""
+    if not getattr(args, "server", None):
+        return
+    used = [flag for name, flag in _LOCAL_ONLY_OPTIONS.items() if getattr(args, name, None)]
+    if used:
+        parser.error(f"{', '.join(used)} cannot be combined with --server; give them to `rag-dv serve` or run locally")
+
+def build_remote_suite(args: argparse.Namespace) -> RemoteSuite:
+    return RemoteSuite(args.server, methods=args.methods.split(","))
+
+def serve(args: argparse.Namespace):
+    """Loads the judge once and serves valuation jobs until interrupted."""
+    judge = build_judge(args, micro_batch=True)
+    # One proxy learns from every job the server runs
+    proxy_filter = build_proxy_filter(args) if "proxy" in args.methods.split(",") else None
+    server = ValuationServer(
+        (args.host, args.port),
+        judge,
+        partial(build_valuators, args, judge, proxy_filter=proxy_filter),
+        default_methods=args.methods.split(","),
+        seed=args.seed,
+        verbose=args.verbose,
+        index=open_value_index(args),
+    )
+    print(f"Serving valuation jobs on {server.url} (judge: {args.judge})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if args.proxy_model and proxy_filter is not None:
+            proxy_filter.save(args.proxy_model)
+        if server.index is not None:
+            server.index.close()
+        print(f"Judge cache: {judge.stats}")
+        judge.close()
+
+def bench(args: argparse.Namespace):
+    """Runs the synthetic benchmark, printing a line per row and writing the JSON report."""
+    # Imported here: the benchmark pulls in numpy and scikit-learn
+    from src.dv.bench import run_benchmark
+
+    def progress(row):
+        tau = "n/a" if row["kendall_tau"] is None else f"{row['kendall_tau']:.3f}"
+        print(
+            f"{row['method']:>18} n={row['n_chunks']:<4} {row['wall_time_s']:.4f}s "
+            f"calls={row['judge_calls']:<6} peak={row['peak_memory_bytes'] / 1e6:.1f}MB tau={tau} mae={row['mae']:.4f}",
+            file=sys.stderr,
+        )
+
+    report = run_benchmark(
+        chunk_counts=[int(n) for n in args.chunk_counts.split(",")],
+        methods=args.methods.split(","),
+        noise=args.noise,
+        latency=args.latency,
+        item_latency=args.item_latency,
+        repeats=args.repeats,
+        mc_samples=args.mc_samples,
+        exact_max_chunks=args.exact_max_chunks,
+        reference_samples=args.reference_samples,
+        seed=args.seed,
+        progress=progress,
+    )
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Benchmark report written to {args.output}", file=sys.stderr)
+    else:
+        print(json.dumps(report, indent=2))
+
 def main():
     parser = argparse.ArgumentParser(prog="rag-dv")
     subparsers = parser.add_subparsers(dest="command", help="sub-command help")
@@ -16,38 +222,132 @@ def main():
     eval_parser.add_argument("--query", required=True)
     eval_parser.add_argument("--chunks-file", required=True)
     eval_parser.add_argument("--answer", required=True)
-    eval_parser.add_argument("--methods", default="loo", help="Comma-separated methods (loo, shapley)")
-    eval_parser.add_argument("--judge", default="mnli", choices=["mnli", "llm"])
+    add_valuation_arguments(eval_parser)
+    add_server_argument(eval_parser)
+    eval_parser.add_argument("--profile", action="store_true", help="Print a per-method cost breakdown (judge calls, batches, time, cache hits)")
+    eval_parser.add_argument("--profile-output", default=None, help="Also write the profiling trace to this file (implies --profile)")
+    eval_parser.add_argument("--profile-format", default="json", choices=["json", "chrome"], help="Trace format; chrome loads in chrome://tracing or Perfetto")
+
+    # batch command
+    batch_parser = subparsers.add_parser("batch", help="Evaluate a JSONL stream of {query, answer, chunks} records")
+    batch_parser.add_argument("--input", required=True, help="JSONL file, one record per line")
+    batch_parser.add_argument("--output", required=True, help="Results file (.jsonl) or Parquet directory (.parquet)")
+    batch_parser.add_argument("--format", default=None, choices=["jsonl", "parquet"], help="Defaults to the --output extension")
+    batch_parser.add_argument("--flush-every", type=int, default=1000, help="Records per Parquet part file")
+    batch_parser.add_argument("--incremental", type=int, default=0, help="Keep runs of this many recent (query, answer) pairs and re-value re-asks incrementally")
+    add_valuation_arguments(batch_parser)
+    add_server_argument(batch_parser)
+
+    # serve command
+    serve_parser = subparsers.add_parser("serve", help="Keep a judge loaded and serve valuation jobs over localhost HTTP")
+    serve_parser.add_argument("--host", default="127.0.0.1")
+    serve_parser.add_argument("--port", type=int, default=8765)
+    serve_parser.add_argument("--max-batch", type=int, default=256, help="Most judge inputs merged into one micro-batch")
+    serve_parser.add_argument("--max-wait-ms", type=float, default=5.0, help="How long a micro-batch waits for concurrent jobs")
+    serve_parser.add_argument("--verbose", action="store_true", help="Log every request")
+    add_valuation_arguments(serve_parser)
+
+    # bench command
+    bench_parser = subparsers.add_parser("bench", help="Benchmark valuators on synthetic judges and report JSON")
+    bench_parser.add_argument("--chunk-counts", default="3,5,10,20,50,100", help="Comma-separated chunk counts")
+    bench_parser.add_argument("--methods", default="loo,shapley-exact,shapley-mc,attention,proxy", help="Comma-separated methods (also loo-hierarchical, shapley-kernel, shapley-stratified)")
+    bench_parser.add_argument("--noise", type=float, default=0.01, help="Std of the synthetic judge's score noise")
+    bench_parser.add_argument("--latency", type=float, default=0.0, help="Seconds per judge batch call")
+    bench_parser.add_argument("--item-latency", type=float, default=0.0, help="Extra seconds per input in a judge batch")
+    bench_parser.add_argument("--repeats", type=int, default=1, help="Timed runs per row; the fastest is reported")
+    bench_parser.add_argument("--mc-samples", type=int, default=100, help="Permutations for sampling Shapley estimators")
+    bench_parser.add_argument("--exact-max-chunks", type=int, default=12, help="Largest chunk count with exact Shapley (method and reference)")
+    bench_parser.add_argument("--reference-samples", type=int, default=500, help="Permutations for the reference Shapley values above --exact-max-chunks")
+    bench_parser.add_argument("--seed", type=int, default=0)
+    bench_parser.add_argument("--output", default=None, help="JSON report file (default: stdout)")
 
     args = parser.parse_args()
+    check_server_options(parser, args)
+    if getattr(args, "chunk_digest", None):
+        set_chunk_digest(args.chunk_digest)
 
     if args.command == "evaluate":
         # Load chunks
         with open(args.chunks_file, "r") as f:
             chunks_data = json.load(f)
         chunks = [Chunk(id=c["id"], text=c["text"], metadata=c.get("metadata", {})) for c in chunks_data]
-        
-        # Initialize Judge
-        judge = MNLIJudge() if args.judge == "mnli" else LLMJudge()
-        
-        # Initialize Valuators
-        methods = args.methods.split(",")
-        valuators = {}
-        if "loo" in methods:
-            valuators["loo"] = LOOValuator(judge)
-        if "shapley" in methods:
-            valuators["shapley"] = ShapleyValuator(judge)
-            
-        suite = ValuationSuite(valuators)
-        
-        # Execute
-        results = suite.evaluate_all(args.query, chunks, args.answer)
-        
+
+        if args.server:
+            # The server already holds a warm judge; just send it the job
+            suite = build_remote_suite(args)
+            results = suite.evaluate_all(args.query, chunks, args.answer)
+        else:
+            # Initialize Judge and Valuators; profiling wrappers are only installed when asked for
+            profiler = Profiler() if args.profile or args.profile_output else None
+            judge = build_judge(args, profiler=profiler)
+            suite = build_suite(args, judge)
+            if profiler is not None:
+                suite.valuators = profile_valuators(suite.valuators, profiler)
+            results = suite.evaluate_all(args.query, chunks, args.answer)
+
         # Output
         save_valuation_results_csv(results, "experiments/latest/scores.csv")
         print("Evaluation complete. Results saved to experiments/latest/scores.csv")
         for res in results:
             print(f"Chunk: {res.chunk_id} | Method: {res.method.value} | Score: {res.score:.4f}")
+        if args.server:
+            for name, stats in suite.last_run_stats.items():
+                print(f"{name} run: {stats}")
+            print(f"Server: {suite.health()}")
+            # The index is local, so results from the server are added here
+            index = open_value_index(args)
+            if index is not None:
+                index.update(chunks, results)
+                index.close()
+        else:
+            for name, valuator in suite.valuators.items():
+                if hasattr(valuator, "last_run_stats"):
+                    print(f"{name} run: {valuator.last_run_stats}")
+            print(f"Judge cache: {judge.stats}")
+            if profiler is not None:
+                print(profiler.format_breakdown())
+                if args.profile_output:
+                    profiler.save(args.profile_output, fmt=args.profile_format)
+                    print(f"Profile trace written to {args.profile_output}")
+            index = open_value_index(args)
+            if index is not None:
+                index.update(chunks, results)
+                index.close()
+            save_proxy(args, suite.valuators)
+            suite.close()
+            judge.close()
+
+    elif args.command == "batch":
+        if args.server:
+            suite = build_remote_suite(args)
+            index = open_value_index(args)
+            processed = run_batch(args.input, args.output, suite, fmt=args.format, flush_every=args.flush_every, index=index)
+            print(f"Batch complete. {processed} records evaluated, results in {args.output}")
+            print(f"Server: {suite.health()}")
+            if index is not None:
+                print(f"Value index: {len(index)} chunk/method rows in {args.value_index}")
+                index.close()
+        else:
+            # One judge (and model load) serves every record in the stream
+            judge = build_judge(args)
+            suite = build_suite(args, judge)
+
+            index = open_value_index(args)
+            processed = run_batch(args.input, args.output, suite, fmt=args.format, flush_every=args.flush_every, incremental=args.incremental, index=index)
+            print(f"Batch complete. {processed} records evaluated, results in {args.output}")
+            print(f"Judge cache: {judge.stats}")
+            if index is not None:
+                print(f"Value index: {len(index)} chunk/method rows in {args.value_index}")
+                index.close()
+            save_proxy(args, suite.valuators)
+            suite.close()
+            judge.close()
+
+    elif args.command == "serve":
+        serve(args)
+
+    elif args.command == "bench":
+        bench(args)
 
 if __name__ == "__main__":
     main()
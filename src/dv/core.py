@@ -1,15 +1,167 @@
-from typing import List, Dict
+import zlib
+from functools import partial
+from typing import TYPE_CHECKING, Any, Callable, List, Dict, Optional, Sequence, Tuple
 from src.dv.interfaces import Valuator
-from src.dv.models.entities import Chunk, ValuationResult
+from src.dv.models.entities import Chunk, ExperimentRun, ValuationResult
+from src.dv.parallel import EXECUTORS, make_executor, seed_worker, worker_counter
+from src.utils.hashing import get_chunk_digest, set_chunk_digest
+
+if TYPE_CHECKING:
+    from src.dv.models.results import ValuationResults
+
+# Valuators owned by the current worker process of a "process" suite, built once by `_init_suite_worker`
+_WORKER_VALUATORS: Dict[str, Valuator] = {}
+
+def _seed_valuators(valuators: Dict[str, Valuator], seed: Optional[int]) -> Dict[str, Valuator]:
+    if seed is not None:
+        # Each sampling valuator gets its own stable seed, independent of which worker runs it
+        for name, valuator in valuators.items():
+            if getattr(valuator, "seed", False) is None:
+                valuator.seed = seed + zlib.crc32(name.encode("utf-8"))
+    return valuators
+
+def _init_suite_worker(factory: Callable[[], Dict[str, Valuator]], seed: Optional[int], counter, digest: str = "md5"):
+    global _WORKER_VALUATORS
+    seed_worker(seed, counter)
+    set_chunk_digest(digest)
+    _WORKER_VALUATORS = _seed_valuators(factory(), seed)
+
+def _evaluate_valuator(valuator: Valuator, query: str, chunks: List[Chunk], answer: str) -> Tuple[Sequence[ValuationResult], Dict[str, Any]]:
+    results = valuator.evaluate(query, chunks, answer)
+    return results, dict(getattr(valuator, "last_run_stats", {}))
+
+def _run_valuator(
+    valuator: Valuator, query: str, chunks: List[Chunk], answer: str, previous: Optional[ExperimentRun], state: Optional[Dict[str, Any]]
+) -> Tuple[Sequence[ValuationResult], Dict[str, Any], Dict[Tuple[str, ...], float], Dict[str, Any]]:
+    """One valuator's results, run stats, coalition scores and state."""
+    if previous is None:
+        results = valuator.evaluate(query, chunks, answer)
+    else:
+        results = valuator.evaluate_incremental(query, chunks, answer, previous, state)
+    stats = dict(getattr(valuator, "last_run_stats", {}))
+    return results, stats, getattr(valuator, "last_coalition_scores", {}), dict(getattr(valuator, "last_state", {}))
+
+def _evaluate_in_worker(name: str, query: str, chunks: List[Chunk], answer: str):
+    return _evaluate_valuator(_WORKER_VALUATORS[name], query, chunks, answer)
+
+def _run_in_worker(name: str, query: str, chunks: List[Chunk], answer: str, previous: Optional[ExperimentRun], state: Optional[Dict[str, Any]]):
+    return _run_valuator(_WORKER_VALUATORS[name], query, chunks, answer, previous, state)
 
 class ValuationSuite:
-    def __init__(self, valuators: Dict[str, Valuator]):
-        self.valuators = valuators
+    """Runs several valuators on the same query, serially or on a thread/process pool.
+
+    With the "process" executor every worker builds its own valuators (and
+    judge) once, in the pool initializer, from `factory`, a picklable callable
+    returning the same names as `valuators`; jobs then send only the query,
+    chunks, answer and method name. Without a factory the valuators are
+    pickled once per worker, which needs picklable judges (a CachedJudge is
+    not). `last_run_stats` holds each valuator's stats from the last run,
+    whichever process ran it.
+    """
+
+    def __init__(
+        self,
+        valuators: Dict[str, Valuator],
+        executor: str = "serial",
+        max_workers: Optional[int] = None,
+        seed: Optional[int] = None,
+        factory: Optional[Callable[[], Dict[str, Valuator]]] = None,
+    ):
+        if executor not in EXECUTORS:
+            raise ValueError(f"Unknown executor '{executor}', expected one of {EXECUTORS}")
+        self.valuators = _seed_valuators(valuators, seed)
+        self.executor = executor
+        self.max_workers = max_workers
+        self.seed = seed
+        self.factory = factory
+        self.last_run_stats: Dict[str, Dict[str, Any]] = {}
+        self._pool = None
 
-    def evaluate_all(self, query: str, chunks: List[Chunk], answer: str) -> List[ValuationResult]:
-        """Runs all configured valuation methods and aggregates results."""
-        all_results = []
+    def _get_pool(self):
+        # The pool is kept across calls so batch runs don't pay worker start-up per query
+        if self._pool is None:
+            if self.executor == "process":
+                factory = self.factory or partial(dict, self.valuators)
+                # The chunk digest is passed explicitly: spawned workers start from the md5 default
+                initargs = (factory, self.seed, worker_counter(), get_chunk_digest())
+                self._pool = make_executor("process", self.max_workers, initializer=_init_suite_worker, initargs=initargs)
+            else:
+                self._pool = make_executor(self.executor, self.max_workers)
+        return self._pool
+
+    def _record_stats(self, stats: Dict[str, Dict[str, Any]]):
+        self.last_run_stats = stats
+        if self.executor == "process":
+            # The parent's valuators did not run; mirror what the workers recorded
+            for name, valuator in self.valuators.items():
+                if hasattr(valuator, "last_run_stats"):
+                    valuator.last_run_stats = stats[name]
+
+    def evaluate_all(self, query: str, chunks: List[Chunk], answer: str) -> "ValuationResults":
+        """Runs all configured valuation methods and aggregates results.
+
+        With a "thread" or "process" executor the valuators run concurrently;
+        results are always returned in valuator order, as one columnar
+        ValuationResults.
+        """
+        # Imported here so the CLI can start without loading NumPy
+        from src.dv.models.results import ValuationResults
+
+        if self.executor == "serial":
+            outputs = [_evaluate_valuator(valuator, query, chunks, answer) for valuator in self.valuators.values()]
+        elif self.executor == "process":
+            pool = self._get_pool()
+            outputs = [f.result() for f in [pool.submit(_evaluate_in_worker, name, query, chunks, answer) for name in self.valuators]]
+        else:
+            pool = self._get_pool()
+            outputs = [f.result() for f in [pool.submit(_evaluate_valuator, v, query, chunks, answer) for v in self.valuators.values()]]
+        self._record_stats({name: stats for name, (_, stats) in zip(self.valuators, outputs)})
+        return ValuationResults.concat([results for results, _ in outputs])
+
+    def evaluate_run(self, query: str, chunks: List[Chunk], answer: str, previous: Optional[ExperimentRun] = None) -> ExperimentRun:
+        """Like `evaluate_all`, but returns an ExperimentRun that keeps coalition scores and valuator state.
+
+        Pass the run of an earlier ask of the same query and answer as
+        `previous` and valuators update their values from it instead of
+        starting over, so the judge cost follows the size of the change in
+        the chunk set. A `previous` for another query or answer is ignored.
+        """
+        from src.dv.models.results import ValuationResults
+
+        if previous is not None and (previous.query != query or previous.generated_answer != answer):
+            previous = None
+        # Earlier scores stay available while all of their chunks are still retrieved
+        current = {c.id for c in chunks}
+        known: Dict[str, Dict[Tuple[str, ...], float]] = {}
+        args = []
         for name, valuator in self.valuators.items():
-            results = valuator.evaluate(query, chunks, answer)
-            all_results.extend(results)
-        return all_results
+            state = None
+            if previous is not None:
+                scores = previous.coalition_scores.get(name, {})
+                known[name] = {k: v for k, v in scores.items() if current.issuperset(k)}
+                state = {**previous.valuation_state.get(name, {}), "coalition_scores": known[name]}
+            args.append((name, query, chunks, answer, previous, state))
+
+        if self.executor == "serial":
+            outputs = [_run_valuator(self.valuators[name], *a) for name, *a in args]
+        elif self.executor == "process":
+            pool = self._get_pool()
+            outputs = [f.result() for f in [pool.submit(_run_in_worker, *a) for a in args]]
+        else:
+            pool = self._get_pool()
+            outputs = [f.result() for f in [pool.submit(_run_valuator, self.valuators[name], *a) for name, *a in args]]
+        self._record_stats({name: stats for name, (_, stats, _, _) in zip(self.valuators, outputs)})
+
+        return ExperimentRun(
+            query=query,
+            retrieved_chunks=list(chunks),
+            generated_answer=answer,
+            valuation_reports=ValuationResults.concat([results for results, _, _, _ in outputs]),
+            coalition_scores={name: {**known.get(name, {}), **scores} for name, (_, _, scores, _) in zip(self.valuators, outputs)},
+            valuation_state={name: state for name, (_, _, _, state) in zip(self.valuators, outputs)},
+        )
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
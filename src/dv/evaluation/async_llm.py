@@ -0,0 +1,180 @@
+import asyncio
+import os
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+from openai import AsyncOpenAI, APIConnectionError, APITimeoutError, APIStatusError, RateLimitError
+from src.dv.interfaces import Judge
+from src.dv.evaluation.prompts import build_faithfulness_prompt, parse_score
+
+class TokenBucket:
+    """Async token-bucket rate limiter: `rate` requests per second, bursts up to `capacity`."""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock: Optional[asyncio.Lock] = None
+        self._loop = None
+
+    async def acquire(self):
+        # Locks are bound to an event loop; each asyncio.run() gets a fresh one
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._lock = asyncio.Lock()
+            self._loop = loop
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    return
+                await asyncio.sleep((1.0 - self._tokens) / self.rate)
+
+class AsyncLLMJudge(Judge):
+    """LLM-as-a-judge that scores whole batches concurrently.
+
+    Requests are bounded by a semaphore (`max_concurrency`) and optionally a
+    token bucket (`requests_per_second`). Rate limits, timeouts, connection and
+    5xx errors, and unparseable replies are retried with jittered exponential
+    backoff. Identical prompts share a single in-flight request. If a reply still
+    cannot be parsed after the retries, `fallback_score` is returned when set,
+    and a ValueError is raised otherwise. `base_url` lets tests point the judge
+    at a local stand-in server.
+
+    One API client per event loop is shared by every batch on it, so a batch
+    that fails cannot close the client under requests other batches joined.
+    Async callers close it with `aclose`; the blocking wrappers close it when
+    their call finishes.
+    """
+
+    RETRYABLE = (RateLimitError, APIConnectionError, APITimeoutError)
+
+    def __init__(
+        self,
+        model_name: str = "gpt-4o-mini",
+        api_key: Optional[str] = None,
+        base_url: Optional[str] = None,
+        max_concurrency: int = 32,
+        requests_per_second: Optional[float] = None,
+        max_retries: int = 5,
+        backoff_base: float = 0.5,
+        backoff_max: float = 30.0,
+        timeout: float = 60.0,
+        fallback_score: Optional[float] = None,
+    ):
+        self.model_name = model_name
+        self.api_key = api_key or os.getenv("OPENAI_API_KEY")
+        self.base_url = base_url
+        self.max_concurrency = max_concurrency
+        self.bucket = TokenBucket(requests_per_second) if requests_per_second else None
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.timeout = timeout
+        self.fallback_score = fallback_score
+        self.requests = 0
+        self.retries = 0
+        self.coalesced = 0
+        # Client, semaphore and in-flight table live on one event loop; rebuilt when the loop changes
+        self._loop = None
+        self._client: Optional[AsyncOpenAI] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._in_flight: Dict[str, asyncio.Task] = {}
+
+    def _bind_loop(self) -> AsyncOpenAI:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._client is None:
+            self._loop = loop
+            self._client = AsyncOpenAI(api_key=self.api_key, base_url=self.base_url, max_retries=0, timeout=self.timeout)
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._in_flight = {}
+        return self._client
+
+    async def aclose(self):
+        """Closes this loop's client; the next batch opens a new one."""
+        client, self._client = self._client, None
+        if client is not None and self._loop is asyncio.get_running_loop():
+            await client.close()
+
+    def _is_retryable(self, error: Exception) -> bool:
+        if isinstance(error, self.RETRYABLE):
+            return True
+        return isinstance(error, APIStatusError) and error.status_code >= 500
+
+    async def _request(self, client: AsyncOpenAI, prompt: str) -> float:
+        for attempt in range(self.max_retries + 1):
+            try:
+                async with self._semaphore:
+                    if self.bucket is not None:
+                        await self.bucket.acquire()
+                    self.requests += 1
+                    response = await client.chat.completions.create(
+                        model=self.model_name,
+                        messages=[{"role": "user", "content": prompt}],
+                        temperature=0,
+                    )
+                score = parse_score(response.choices[0].message.content)
+                if score is not None:
+                    return score
+                error: Exception = ValueError(f"Unparseable judge reply: {response.choices[0].message.content!r}")
+            except Exception as e:
+                if not self._is_retryable(e):
+                    raise
+                error = e
+
+            if attempt < self.max_retries:
+                self.retries += 1
+                delay = min(self.backoff_max, self.backoff_base * 2 ** attempt)
+                await asyncio.sleep(delay * (0.5 + random.random() / 2))
+
+        if isinstance(error, ValueError) and self.fallback_score is not None:
+            return self.fallback_score
+        raise error
+
+    async def aget_faithfulness_batch(self, queries: List[str], contexts: List[str], answers: List[str]) -> List[float]:
+        """Scores all triples concurrently.
+
+        A prompt already being requested, by this batch or a concurrent call on
+        the same loop, joins that request instead of sending another.
+        """
+        client = self._bind_loop()
+        tasks = []
+        for q, c, a in zip(queries, contexts, answers):
+            prompt = build_faithfulness_prompt(q, c, a)
+            if prompt in self._in_flight:
+                self.coalesced += 1
+            else:
+                task = asyncio.ensure_future(self._request(client, prompt))
+                self._in_flight[prompt] = task
+                task.add_done_callback(lambda _, p=prompt: self._in_flight.pop(p, None))
+            tasks.append(self._in_flight[prompt])
+        return list(await asyncio.gather(*tasks))
+
+    async def aget_faithfulness(self, query: str, context: str, answer: str) -> float:
+        return (await self.aget_faithfulness_batch([query], [context], [answer]))[0]
+
+    def get_faithfulness(self, query: str, context: str, answer: str) -> float:
+        """Determines faithfulness using an LLM-as-a-judge prompt."""
+        return self.get_faithfulness_batch([query], [context], [answer])[0]
+
+    def get_faithfulness_batch(self, queries: List[str], contexts: List[str], answers: List[str]) -> List[float]:
+        """Blocking wrapper around `aget_faithfulness_batch`."""
+        async def run() -> List[float]:
+            try:
+                return await self.aget_faithfulness_batch(queries, contexts, answers)
+            finally:
+                await self.aclose()
+
+        coro = run()
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(coro)
+        # Already inside an event loop (e.g. Jupyter): run on a helper thread
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            return pool.submit(asyncio.run, coro).result()
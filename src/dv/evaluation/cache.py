@@ -0,0 +1,156 @@
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+from src.dv.interfaces import Judge, is_chunk_aware
+from src.utils.hashing import calculate_judge_key
+
+class CachedJudge(Judge):
+    """Wraps a Judge with a content-addressed score cache.
+
+    Scores are keyed by a hash of (namespace, query, context, answer). Lookups go
+    through an in-memory LRU tier first and, when `db_path` is given, an SQLite
+    tier that persists across runs.
+    """
+
+    def __init__(self, judge: Judge, max_size: int = 100_000, db_path: Optional[str] = None, namespace: Optional[str] = None):
+        self.judge = judge
+        self.max_size = max_size
+        self.namespace = namespace if namespace is not None else self._default_namespace(judge)
+        # A judge with its own coalition API may score a coalition differently from its joined text
+        self.chunk_aware = is_chunk_aware(judge)
+        self._memory: "OrderedDict[str, float]" = OrderedDict()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        # Valuators may share one cache from several threads
+        self._lock = threading.RLock()
+
+        self._db = None
+        if db_path:
+            if os.path.dirname(db_path):
+                os.makedirs(os.path.dirname(db_path), exist_ok=True)
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute("CREATE TABLE IF NOT EXISTS judge_scores (key TEXT PRIMARY KEY, score REAL NOT NULL)")
+            self._db.commit()
+
+    @staticmethod
+    def _default_namespace(judge: Judge) -> str:
+        # Scores from different judges/models must never share cache entries
+        model_name = getattr(judge, "model_name", None)
+        name = type(judge).__name__
+        return f"{name}:{model_name}" if model_name else name
+
+    def key(self, query: str, context: str, answer: str) -> str:
+        return calculate_judge_key(query, context, answer, namespace=self.namespace)
+
+    def _remember(self, key: str, score: float):
+        self._memory[key] = score
+        self._memory.move_to_end(key)
+        if len(self._memory) > self.max_size:
+            self._memory.popitem(last=False)
+
+    def _lookup(self, key: str) -> Optional[float]:
+        with self._lock:
+            return self._lookup_locked(key)
+
+    def _lookup_locked(self, key: str) -> Optional[float]:
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            self.hits += 1
+            return self._memory[key]
+
+        if self._db is not None:
+            row = self._db.execute("SELECT score FROM judge_scores WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                self.disk_hits += 1
+                self._remember(key, row[0])
+                return row[0]
+        return None
+
+    def _store(self, items: Dict[str, float]):
+        with self._lock:
+            for key, score in items.items():
+                self._remember(key, score)
+            if self._db is not None and items:
+                self._db.executemany("INSERT OR REPLACE INTO judge_scores (key, score) VALUES (?, ?)", list(items.items()))
+                self._db.commit()
+
+    def get_faithfulness(self, query: str, context: str, answer: str) -> float:
+        """Returns the cached score, calling the wrapped judge on a miss."""
+        key = self.key(query, context, answer)
+        score = self._lookup(key)
+        if score is not None:
+            return score
+
+        with self._lock:
+            self.misses += 1
+        score = float(self.judge.get_faithfulness(query, context, answer))
+        self._store({key: score})
+        return score
+
+    def _score_keys(self, keys: List[str], compute: Callable[[List[int]], List[float]]) -> List[float]:
+        """Resolves keys from the cache; `compute` scores the positions of unique misses."""
+        scores: Dict[str, float] = {}
+        pending: Dict[str, int] = {}
+
+        for i, key in enumerate(keys):
+            if key in scores or key in pending:
+                continue
+            score = self._lookup(key)
+            if score is not None:
+                scores[key] = score
+            else:
+                pending[key] = i
+
+        if pending:
+            with self._lock:
+                self.misses += len(pending)
+            computed = compute(list(pending.values()))
+            fresh = {key: float(s) for key, s in zip(pending, computed)}
+            self._store(fresh)
+            scores.update(fresh)
+
+        return [scores[key] for key in keys]
+
+    def get_faithfulness_batch(self, queries: List[str], contexts: List[str], answers: List[str]) -> List[float]:
+        """Scores a batch, sending only unique cache misses to the wrapped judge."""
+        keys = [self.key(q, c, a) for q, c, a in zip(queries, contexts, answers)]
+        return self._score_keys(keys, lambda idx: self.judge.get_faithfulness_batch(
+            [queries[i] for i in idx], [contexts[i] for i in idx], [answers[i] for i in idx]
+        ))
+
+    def get_faithfulness_coalitions(self, query: str, chunk_texts: List[str], coalitions: List[Tuple[int, ...]], answer: str) -> List[float]:
+        """Scores coalitions, forwarding only unique misses to the wrapped judge's coalition API.
+
+        For judges without their own coalition API, keys are built from the
+        joined context, so entries are shared with `get_faithfulness_batch`.
+        Chunk-aware judges get keys that keep the chunk boundaries, tagged so
+        they never match a plain context.
+        """
+        if self.chunk_aware:
+            keys = [self.key(query, "\x1dcoalition\x1d" + "\x1e".join(chunk_texts[i] for i in c), answer) for c in coalitions]
+        else:
+            keys = [self.key(query, " ".join(chunk_texts[i] for i in c), answer) for c in coalitions]
+        return self._score_keys(keys, lambda idx: self.judge.get_faithfulness_coalitions(
+            query, chunk_texts, [coalitions[i] for i in idx], answer
+        ))
+
+    @property
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+            "size": len(self._memory),
+        }
+
+    def close(self):
+        if hasattr(self.judge, "close"):
+            self.judge.close()
+        if self._db is not None:
+            self._db.close()
+            self._db = None
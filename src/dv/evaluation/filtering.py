@@ -1,8 +1,21 @@
-from typing import List
-from src.dv.models.entities import Chunk, ValuationResult
+from typing import TYPE_CHECKING, List, Optional
+from src.dv.models.entities import Chunk, ValuationMethod, ValuationResult
 
-def filter_negative_chunks(chunks: List[Chunk], results: List[ValuationResult], threshold: float = 0.0) -> List[Chunk]:
-    """Filters out chunks that have a valuation score below the threshold."""
+if TYPE_CHECKING:
+    from src.dv.evaluation.value_index import ChunkValueIndex
+
+def filter_negative_chunks(
+    chunks: List[Chunk],
+    results: List[ValuationResult],
+    threshold: float = 0.0,
+    index: Optional["ChunkValueIndex"] = None,
+    method: ValuationMethod = ValuationMethod.LOO,
+) -> List[Chunk]:
+    """Filters out chunks that have a valuation score below the threshold.
+
+    Chunks without results are kept, unless `index` has a historical `method`
+    mean for them, which is then compared against the threshold instead.
+    """
     # Group results by chunk_id
     chunk_scores = {}
     for res in results:
@@ -13,5 +26,10 @@ def filter_negative_chunks(chunks: List[Chunk], results: List[ValuationResult],
     # Calculate average score per chunk
     avg_scores = {cid: sum(scores)/len(scores) for cid, scores in chunk_scores.items()}
     
+    if index is not None:
+        unseen = [c for c in chunks if c.id not in avg_scores]
+        for cid, stats in index.lookup_chunks(unseen, method).items():
+            avg_scores[cid] = stats.mean
+    
     # Filter
     return [c for c in chunks if avg_scores.get(c.id, 1.0) >= threshold]
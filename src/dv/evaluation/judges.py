@@ -1,27 +1,225 @@
-from typing import Optional
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+import math
 import os
+import torch
 from openai import OpenAI
-from transformers import pipeline
+from transformers import AutoModelForSequenceClassification, AutoTokenizer, pipeline
 from src.dv.interfaces import Judge
-from src.utils.torch_utils import get_device_map
+from src.dv.evaluation.prompts import build_faithfulness_prompt, parse_score
+from src.dv.models.surrogate import LocalSignaler
+from src.utils.hashing import calculate_chunk_hash, calculate_chunk_hashes
+from src.utils.torch_utils import get_device_map, get_torch_device
 
 class MNLIJudge(Judge):
-    def __init__(self, model_name: str = "roberta-large-mnli", device: Optional[str] = None):
+    LABELS = ["entailment", "neutral", "contradiction"]
+
+    def __init__(self, model_name: str = "roberta-large-mnli", device: Optional[str] = None, batch_size: int = 16):
         device = device or get_device_map()
+        self.model_name = model_name
+        self.batch_size = batch_size
         self.classifier = pipeline("zero-shot-classification", model=model_name, device=device)
+        # Index of the entailment logit in the NLI head (e.g. "ENTAILMENT" for roberta-large-mnli)
+        label2id = self.classifier.model.config.label2id
+        self.entailment_id = next(idx for label, idx in label2id.items() if label.lower().startswith("entail"))
 
     def get_faithfulness(self, query: str, context: str, answer: str) -> float:
         """Determines faithfulness using NLI entailment score."""
-        if not context or not answer:
-            return 0.0
-        
-        # We check if the context entails the answer
-        # For zero-shot classification, we use context as the sequence and answer as part of the hypothesis
-        result = self.classifier(context, candidate_labels=["entailment", "neutral", "contradiction"], hypothesis_template=f"Based on this text, it is true that {answer} is {{}}")
-        
-        # Return the score for 'entailment'
-        entailment_idx = result["labels"].index("entailment")
-        return result["scores"][entailment_idx]
+        return self.get_faithfulness_batch([query], [context], [answer])[0]
+
+    def get_faithfulness_batch(self, queries: List[str], contexts: List[str], answers: List[str]) -> List[float]:
+        """Scores many (context, answer) pairs with padded batches through the NLI model.
+
+        Mirrors the zero-shot pipeline: each candidate label becomes a hypothesis,
+        the entailment logits are softmaxed across labels and the probability of
+        the 'entailment' label is returned.
+        """
+        scores = [0.0] * len(contexts)
+        # Empty contexts or answers are never faithful and skip the model entirely
+        pending = [(i, c, a) for i, (c, a) in enumerate(zip(contexts, answers)) if c and a]
+        if not pending:
+            return scores
+
+        tokenizer = self.classifier.tokenizer
+        model = self.classifier.model
+        n_labels = len(self.LABELS)
+
+        for start in range(0, len(pending), self.batch_size):
+            batch = pending[start:start + self.batch_size]
+            premises = [c for _, c, _ in batch for _ in self.LABELS]
+            hypotheses = [f"Based on this text, it is true that {a} is {label}" for _, _, a in batch for label in self.LABELS]
+
+            inputs = tokenizer(premises, hypotheses, padding=True, truncation="only_first", return_tensors="pt").to(model.device)
+            with torch.no_grad():
+                logits = model(**inputs).logits
+
+            entail_logits = logits[:, self.entailment_id].view(len(batch), n_labels)
+            probs = entail_logits.softmax(dim=-1)[:, 0].tolist() # column 0 is the 'entailment' label
+            for (i, _, _), p in zip(batch, probs):
+                scores[i] = p
+
+        return scores
+
+class WindowedNLIJudge(Judge):
+    """Direct NLI judge that never silently truncates long contexts.
+
+    The premise is split into windows that fit the model next to the answer
+    (the hypothesis); each (window, answer) pair costs one forward pass for the
+    entailment probability, and window scores are combined with `combine`
+    ("max" or "mean"). For coalition scoring, windows are aligned to chunk
+    boundaries: with `window_mode="chunk"` each chunk is its own window, so a
+    coalition's score is combined from cached per-chunk scores and n chunks
+    need only n model calls for any number of coalitions; `window_mode="pack"`
+    greedily packs consecutive coalition chunks into each window instead.
+    Chunks longer than a window are split into token windows overlapping by
+    `stride` tokens.
+    """
+
+    def __init__(
+        self,
+        model_name: str = "roberta-large-mnli",
+        device: Optional[str] = None,
+        batch_size: int = 16,
+        combine: str = "max",
+        window_mode: str = "chunk",
+        stride: int = 64,
+        cache_size: int = 100_000,
+    ):
+        self.device = device or get_torch_device()
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.combine = combine
+        self.window_mode = window_mode
+        self.stride = stride
+        self.cache_size = cache_size
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+        self.model = AutoModelForSequenceClassification.from_pretrained(model_name).to(self.device)
+        self.model.eval()
+        label2id = self.model.config.label2id
+        self.entailment_id = next(idx for label, idx in label2id.items() if label.lower().startswith("entail"))
+        # Some tokenizers report a huge sentinel model_max_length; fall back to the position table
+        self.max_length = min(self.tokenizer.model_max_length, getattr(self.model.config, "max_position_embeddings", 512))
+        self._pair_overhead = self.tokenizer.num_special_tokens_to_add(pair=True)
+        self._entailment_cache: "OrderedDict[Tuple[str, str], float]" = OrderedDict()
+        self._token_offsets: "OrderedDict[str, List[Tuple[int, int]]]" = OrderedDict()
+        self.model_calls = 0
+        self.cache_hits = 0
+
+    def _offsets(self, text: str) -> List[Tuple[int, int]]:
+        """Character offsets of each token of `text` (cached per text)."""
+        key = calculate_chunk_hash(text)
+        if key not in self._token_offsets:
+            self._token_offsets[key] = self.tokenizer(text, add_special_tokens=False, return_offsets_mapping=True)["offset_mapping"]
+            if len(self._token_offsets) > self.cache_size:
+                self._token_offsets.popitem(last=False)
+        return self._token_offsets[key]
+
+    def _premise_budget(self, answer: str) -> int:
+        return max(1, self.max_length - self._pair_overhead - len(self._offsets(answer)))
+
+    def _split_text(self, text: str, budget: int) -> List[str]:
+        """The text itself if it fits, else token windows overlapping by `stride`."""
+        offsets = self._offsets(text)
+        if len(offsets) <= budget:
+            return [text]
+        step = max(1, budget - self.stride)
+        windows = []
+        for start in range(0, len(offsets), step):
+            end = min(start + budget, len(offsets))
+            windows.append(text[offsets[start][0]:offsets[end - 1][1]])
+            if end == len(offsets):
+                break
+        return windows
+
+    def _coalition_windows(self, chunk_texts: List[str], coalition: Tuple[int, ...], budget: int) -> List[str]:
+        if self.window_mode == "chunk":
+            return [w for i in coalition for w in self._split_text(chunk_texts[i], budget)]
+
+        windows, current, used = [], [], 0
+        for i in coalition:
+            size = len(self._offsets(chunk_texts[i])) + 1 # +1 for the joining space
+            if current and used + size > budget:
+                windows.append(" ".join(current))
+                current, used = [], 0
+            if size > budget:
+                windows.extend(self._split_text(chunk_texts[i], budget))
+            else:
+                current.append(chunk_texts[i])
+                used += size
+        if current:
+            windows.append(" ".join(current))
+        return windows
+
+    def _entailment(self, pairs: List[Tuple[str, str]]) -> List[float]:
+        """Entailment probability per (premise, hypothesis), running only uncached pairs."""
+        premises = calculate_chunk_hashes(p for p, _ in pairs)
+        hypotheses = calculate_chunk_hashes(h for _, h in pairs)
+        keys = list(zip(premises, hypotheses))
+        todo = {}
+        for key, pair in zip(keys, pairs):
+            if key in self._entailment_cache:
+                self._entailment_cache.move_to_end(key)
+                self.cache_hits += 1
+            else:
+                todo.setdefault(key, pair)
+
+        todo_items = list(todo.items())
+        for start in range(0, len(todo_items), self.batch_size):
+            batch = todo_items[start:start + self.batch_size]
+            inputs = self.tokenizer(
+                [p for _, (p, _) in batch], [h for _, (_, h) in batch],
+                padding=True, truncation="only_first", max_length=self.max_length, return_tensors="pt",
+            ).to(self.device)
+            with torch.no_grad():
+                probs = self.model(**inputs).logits.float().softmax(dim=-1)[:, self.entailment_id].tolist()
+            self.model_calls += len(batch)
+            for (key, _), prob in zip(batch, probs):
+                self._entailment_cache[key] = prob
+                if len(self._entailment_cache) > self.cache_size:
+                    self._entailment_cache.popitem(last=False)
+
+        scores = []
+        for key in keys:
+            score = self._entailment_cache.get(key)
+            if score is None: # evicted mid-call by a very large batch; recompute directly
+                score = self._entailment([pairs[keys.index(key)]])[0]
+            scores.append(score)
+        return scores
+
+    def _combine(self, window_lists: List[List[str]], answers: List[str]) -> List[float]:
+        pairs = [(w, a) for windows, a in zip(window_lists, answers) for w in windows]
+        flat = self._entailment(pairs)
+        scores, pos = [], 0
+        for windows in window_lists:
+            window_scores = flat[pos:pos + len(windows)]
+            pos += len(windows)
+            if not window_scores:
+                scores.append(0.0)
+            elif self.combine == "mean":
+                scores.append(sum(window_scores) / len(window_scores))
+            else:
+                scores.append(max(window_scores))
+        return scores
+
+    def get_faithfulness(self, query: str, context: str, answer: str) -> float:
+        """Determines faithfulness from entailment over premise windows of the context."""
+        return self.get_faithfulness_batch([query], [context], [answer])[0]
+
+    def get_faithfulness_batch(self, queries: List[str], contexts: List[str], answers: List[str]) -> List[float]:
+        """Scores plain contexts with sliding token windows over each context."""
+        window_lists = [
+            self._split_text(c, self._premise_budget(a)) if c and a else []
+            for c, a in zip(contexts, answers)
+        ]
+        return self._combine(window_lists, answers)
+
+    def get_faithfulness_coalitions(self, query: str, chunk_texts: List[str], coalitions: List[Tuple[int, ...]], answer: str) -> List[float]:
+        """Scores coalitions from windows aligned to chunk boundaries."""
+        if not answer:
+            return [0.0] * len(coalitions)
+        budget = self._premise_budget(answer)
+        window_lists = [self._coalition_windows(chunk_texts, c, budget) for c in coalitions]
+        return self._combine(window_lists, [answer] * len(coalitions))
 
 class LLMJudge(Judge):
     def __init__(self, model_name: str = "gpt-4o-mini", api_key: Optional[str] = None):
@@ -30,15 +228,7 @@ class LLMJudge(Judge):
 
     def get_faithfulness(self, query: str, context: str, answer: str) -> float:
         """Determines faithfulness using an LLM-as-a-judge prompt."""
-        prompt = f"""
-        Given the following context and answer to a query, rate the faithfulness of the answer based ONLY on the context.
-        Provide a single float score between 0.0 (not faithful) and 1.0 (perfectly faithful).
-        
-        Query: {query}
-        Context: {context}
-        Answer: {answer}
-        
-        Score (float):"""
+        prompt = build_faithfulness_prompt(query, context, answer)
         
         response = self.client.chat.completions.create(
             model=self.model_name,
@@ -46,12 +236,28 @@ class LLMJudge(Judge):
             temperature=0
         )
         
+        score = parse_score(response.choices[0].message.content)
+        return score if score is not None else 0.5 # Fallback
 
-        try:
-            score_str = response.choices[0].message.content.strip()
-            return float(score_str)
-        except (ValueError, TypeError):
-            return 0.5 # Fallback
+class LikelihoodJudge(Judge):
+    """Scores faithfulness as the surrogate LM's geometric-mean probability of the answer.
+
+    Runs on LocalSignaler's KV-cache reuse path, so batches of coalition contexts
+    that share leading chunks are encoded incrementally.
+    """
+
+    def __init__(self, model_name: str = "gpt2", device: Optional[str] = None, signaler: Optional[LocalSignaler] = None):
+        self.signaler = signaler or LocalSignaler(model_name, device=device)
+        self.model_name = model_name
+
+    def get_faithfulness(self, query: str, context: str, answer: str) -> float:
+        """Determines faithfulness as exp(mean answer-token log-likelihood)."""
+        return self.get_faithfulness_batch([query], [context], [answer])[0]
+
+    def get_faithfulness_batch(self, queries: List[str], contexts: List[str], answers: List[str]) -> List[float]:
+        """Scores a batch of triples in one pass over a shared KV cache."""
+        log_likelihoods = self.signaler.answer_log_likelihoods(queries, contexts, answers)
+        return [math.exp(ll) for ll in log_likelihoods]
 
 class RagasJudge(Judge):
     def __init__(self, metrics=None, llm=None):
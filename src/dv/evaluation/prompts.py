@@ -0,0 +1,21 @@
+import re
+from typing import Optional
+
+def build_faithfulness_prompt(query: str, context: str, answer: str) -> str:
+    """LLM-as-a-judge prompt shared by the sync and async LLM judges."""
+    return f"""
+        Given the following context and answer to a query, rate the faithfulness of the answer based ONLY on the context.
+        Provide a single float score between 0.0 (not faithful) and 1.0 (perfectly faithful).
+        
+        Query: {query}
+        Context: {context}
+        Answer: {answer}
+        
+        Score (float):"""
+
+def parse_score(text: Optional[str]) -> Optional[float]:
+    """Extracts the first number in an LLM reply, clamped to [0, 1]; None if there is none."""
+    match = re.search(r"[-+]?\d*\.?\d+", text or "")
+    if match is None:
+        return None
+    return min(1.0, max(0.0, float(match.group())))
@@ -0,0 +1,143 @@
+import os
+import sqlite3
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Sequence, Union
+import numpy as np
+from src.dv.models.entities import Chunk, ValuationMethod, ValuationResult
+from src.dv.models.results import METHODS, ValuationResults
+from src.utils.hashing import calculate_chunk_hashes, chunk_hash_aliases
+
+# Result timestamps are naive; last_seen is stored as seconds since this naive epoch
+_EPOCH = datetime(1970, 1, 1)
+
+@dataclass
+class ChunkStats:
+    count: int
+    mean: float
+    variance: float # sample variance, 0.0 below two observations
+    last_seen: datetime
+
+class ChunkValueIndex:
+    """Persistent per-chunk valuation statistics across queries.
+
+    Rows are keyed by (content hash of the chunk text, method) and hold the
+    count, mean and sum of squared deviations of every score seen, plus when
+    the chunk was last valued. `update` folds a whole batch of results in with
+    one upsert, merging each chunk's batch statistics into the stored ones
+    (Chan et al.'s parallel variance update), so each row costs one primary
+    key lookup however often the chunk has been seen. `lookup` answers many
+    hashes per query. With `db_path=None` the index lives in memory.
+    """
+
+    _LOOKUP_BATCH = 500
+
+    def __init__(self, db_path: Optional[str] = None):
+        if db_path and os.path.dirname(db_path):
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self._db = sqlite3.connect(db_path or ":memory:", check_same_thread=False)
+        if db_path:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS chunk_values ("
+            "chunk_hash TEXT NOT NULL, method TEXT NOT NULL, count INTEGER NOT NULL, "
+            "mean REAL NOT NULL, m2 REAL NOT NULL, last_seen REAL NOT NULL, "
+            "PRIMARY KEY (chunk_hash, method)) WITHOUT ROWID"
+        )
+        self._db.commit()
+        self._lock = threading.Lock()
+
+    def update(self, chunks: Iterable[Chunk], results: Sequence[ValuationResult]) -> int:
+        """Adds the scores in `results` for `chunks`; returns the number of rows written.
+
+        Results for chunk ids not among `chunks` are ignored.
+        """
+        results = ValuationResults.from_results(results)
+        chunks = list(chunks)
+        hashes = dict(zip([c.id for c in chunks], calculate_chunk_hashes(c.text for c in chunks)))
+        known = np.array([cid in hashes for cid in results.chunk_ids], dtype=bool)
+        rows = known[results.chunk_index] if len(results) else np.zeros(0, dtype=bool)
+        if not rows.any():
+            return 0
+
+        # Group the batch by (chunk, method) and reduce each group to count/mean/m2/last_seen
+        keys = results.chunk_index[rows].astype(np.int64) * len(METHODS) + results.method_codes[rows]
+        groups, inverse = np.unique(keys, return_inverse=True)
+        scores = results.scores[rows]
+        counts = np.bincount(inverse)
+        means = np.bincount(inverse, weights=scores) / counts
+        m2 = np.bincount(inverse, weights=(scores - means[inverse]) ** 2)
+        seen = np.full(len(groups), -np.inf)
+        np.maximum.at(seen, inverse, results.timestamps[rows].astype("datetime64[us]").astype(np.int64) / 1e6)
+
+        params = [
+            (hashes[results.chunk_ids[key // len(METHODS)]], METHODS[key % len(METHODS)].value, int(n), float(mean), float(sq), float(t))
+            for key, n, mean, sq, t in zip(groups.tolist(), counts, means, m2, seen)
+        ]
+        with self._lock:
+            self._db.executemany(
+                "INSERT INTO chunk_values (chunk_hash, method, count, mean, m2, last_seen) VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (chunk_hash, method) DO UPDATE SET "
+                "count = count + excluded.count, "
+                "mean = mean + (excluded.mean - mean) * excluded.count / (count + excluded.count), "
+                "m2 = m2 + excluded.m2 + (excluded.mean - mean) * (excluded.mean - mean) * count * excluded.count / (count + excluded.count), "
+                "last_seen = max(last_seen, excluded.last_seen)",
+                params,
+            )
+            self._db.commit()
+        return len(params)
+
+    def lookup(self, chunk_hashes: Sequence[str], method: Union[str, ValuationMethod] = ValuationMethod.LOO) -> Dict[str, ChunkStats]:
+        """Stats for every given hash that has been valued with `method`."""
+        method = ValuationMethod(method).value
+        unique = list(dict.fromkeys(chunk_hashes))
+        found: Dict[str, ChunkStats] = {}
+        with self._lock:
+            for start in range(0, len(unique), self._LOOKUP_BATCH):
+                batch = unique[start:start + self._LOOKUP_BATCH]
+                rows = self._db.execute(
+                    f"SELECT chunk_hash, count, mean, m2, last_seen FROM chunk_values WHERE method = ? AND chunk_hash IN ({','.join('?' * len(batch))})",
+                    [method, *batch],
+                ).fetchall()
+                for chunk_hash, count, mean, m2, last_seen in rows:
+                    found[chunk_hash] = ChunkStats(count, mean, m2 / (count - 1) if count > 1 else 0.0, _EPOCH + timedelta(seconds=last_seen))
+        return found
+
+    def lookup_chunks(self, chunks: Sequence[Chunk], method: Union[str, ValuationMethod] = ValuationMethod.LOO) -> Dict[str, ChunkStats]:
+        """Like `lookup`, keyed by chunk id; chunks are matched by the hash of their text.
+
+        Rows written under the MD5 id before the chunk digest was changed are
+        still found.
+        """
+        aliases = {c.id: chunk_hash_aliases(c.text) for c in chunks}
+        stats = self.lookup([h for hashes in aliases.values() for h in hashes], method)
+        found = {}
+        for cid, hashes in aliases.items():
+            match = next((stats[h] for h in hashes if h in stats), None)
+            if match is not None:
+                found[cid] = match
+        return found
+
+    def down_rank(self, chunks: List[Chunk], method: Union[str, ValuationMethod] = ValuationMethod.LOO, threshold: float = 0.0, min_count: int = 1) -> List[Chunk]:
+        """Moves chunks whose historical mean is below `threshold` to the end, keeping order otherwise.
+
+        Only chunks valued at least `min_count` times are moved; no judge is called.
+        """
+        stats = self.lookup_chunks(chunks, method)
+
+        def harmful(chunk: Chunk) -> bool:
+            s = stats.get(chunk.id)
+            return s is not None and s.count >= min_count and s.mean < threshold
+
+        return [c for c in chunks if not harmful(c)] + [c for c in chunks if harmful(c)]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM chunk_values").fetchone()[0]
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
@@ -1,17 +1,40 @@
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any
-from src.dv.models.entities import Chunk, ValuationResult
+from typing import List, Dict, Any, Optional, Sequence, Tuple
+from src.dv.models.entities import Chunk, ExperimentRun, ValuationResult
 
 class Valuator(ABC):
     @abstractmethod
-    def evaluate(self, query: str, chunks: List[Chunk], answer: str) -> List[ValuationResult]:
+    def evaluate(self, query: str, chunks: List[Chunk], answer: str) -> Sequence[ValuationResult]:
         """Calculates value for each chunk given the query and answer."""
         pass
 
+    def evaluate_targets(self, query: str, chunks: List[Chunk], answer: str, targets: List[int]) -> Sequence[ValuationResult]:
+        """Values only `chunks[i]` for i in `targets`, within the full chunk set.
+
+        The default evaluates every chunk and keeps the targets; valuators that
+        can skip work for the other chunks should override this.
+        """
+        wanted = {chunks[i].id for i in targets}
+        return [r for r in self.evaluate(query, chunks, answer) if r.chunk_id in wanted]
+
+    def evaluate_incremental(self, query: str, chunks: List[Chunk], answer: str, previous: ExperimentRun, state: Optional[Dict[str, Any]] = None) -> Sequence[ValuationResult]:
+        """Re-values `chunks` for the query and answer of `previous`, whose chunk set differed.
+
+        `state` is this valuator's `last_state` from the previous run, with
+        its coalition scores from that run under "coalition_scores" (only this
+        valuator's, so they come from its own judge). Valuators that can reuse
+        them override this; the default evaluates from scratch.
+        """
+        return self.evaluate(query, chunks, answer)
+
 class Signaler(ABC):
     @abstractmethod
-    def get_signals(self, query: str, context: str, answer: str) -> Dict[str, Any]:
-        """Extracts model-internal signals (attention, gradients)."""
+    def get_signals(self, query: str, context: str, answer: str, chunk_spans: Optional[List[Tuple[int, int]]] = None) -> Dict[str, Any]:
+        """Extracts model-internal signals (attention, gradients).
+
+        `chunk_spans` gives the (start, end) character offsets of each chunk in
+        `context`, letting the signaler attribute its signals per chunk.
+        """
         pass
 
 class Judge(ABC):
@@ -19,3 +42,32 @@ class Judge(ABC):
     def get_faithfulness(self, query: str, context: str, answer: str) -> float:
         """Returns a 0.0-1.0 faithfulness score."""
         pass
+
+    def get_faithfulness_batch(self, queries: List[str], contexts: List[str], answers: List[str]) -> List[float]:
+        """Returns a faithfulness score per (query, context, answer) triple.
+
+        The default scores each triple with `get_faithfulness`; judges that can
+        run several inputs through one model call should override this.
+        """
+        return [self.get_faithfulness(q, c, a) for q, c, a in zip(queries, contexts, answers)]
+
+    def get_faithfulness_coalitions(self, query: str, chunk_texts: List[str], coalitions: List[Tuple[int, ...]], answer: str) -> List[float]:
+        """Returns a faithfulness score per coalition of chunks.
+
+        Each coalition is a tuple of indices into `chunk_texts`, in context order.
+        The default joins each coalition's texts with spaces and calls
+        `get_faithfulness_batch`; judges that can score chunks independently
+        (and reuse those scores across coalitions) should override this.
+        """
+        contexts = [" ".join(chunk_texts[i] for i in c) for c in coalitions]
+        return self.get_faithfulness_batch([query] * len(contexts), contexts, [answer] * len(contexts))
+
+def is_chunk_aware(judge: Judge) -> bool:
+    """Whether `judge` scores coalitions itself instead of through the joined-text default.
+
+    Wrappers report their wrapped judge's answer through a `chunk_aware` attribute.
+    """
+    aware = getattr(judge, "chunk_aware", None)
+    if aware is not None:
+        return aware
+    return type(judge).get_faithfulness_coalitions is not Judge.get_faithfulness_coalitions
@@ -0,0 +1,119 @@
+from types import MappingProxyType
+from typing import Any, Iterator, List, Mapping, Optional, Sequence, Union, overload
+import numpy as np
+from src.dv.models.entities import Chunk, Document
+from src.utils.hashing import calculate_span_hashes
+
+class ChunkCollection(Sequence[Chunk]):
+    """Array-backed set of chunks over shared source documents.
+
+    Each chunk is a row of (document index, start, end) in NumPy arrays, so
+    millions of chunks cost a few bytes each rather than an object and a text
+    copy. Indexing yields span-backed Chunk views; ids are content hashes
+    computed on first use. All chunks share one read-only `metadata` mapping.
+    """
+
+    def __init__(
+        self,
+        documents: Sequence[Document],
+        doc_index: np.ndarray,
+        starts: np.ndarray,
+        ends: np.ndarray,
+        metadata: Optional[Mapping[str, Any]] = None,
+        ids: Optional[List[str]] = None,
+    ):
+        self.documents = list(documents)
+        self.doc_index = np.asarray(doc_index, dtype=np.int32)
+        self.starts = np.asarray(starts, dtype=np.int64)
+        self.ends = np.asarray(ends, dtype=np.int64)
+        # Every chunk views this mapping, so a plain dict is frozen rather than shared mutably
+        self.metadata = metadata if metadata is None or isinstance(metadata, MappingProxyType) else MappingProxyType(dict(metadata))
+        self._ids = ids
+
+    def __reduce__(self):
+        # MappingProxyType does not pickle; __init__ freezes the dict again
+        metadata = None if self.metadata is None else dict(self.metadata)
+        return (ChunkCollection, (self.documents, self.doc_index, self.starts, self.ends, metadata, self._ids))
+
+    @classmethod
+    def from_spans(cls, document: Document, starts: Sequence[int], ends: Sequence[int], metadata: Optional[Mapping[str, Any]] = None) -> "ChunkCollection":
+        """Chunks over [starts[i], ends[i]) of a single document."""
+        starts = np.asarray(starts, dtype=np.int64)
+        return cls([document], np.zeros(len(starts), dtype=np.int32), starts, ends, metadata)
+
+    @classmethod
+    def concat(cls, collections: Sequence["ChunkCollection"]) -> "ChunkCollection":
+        """Joins collections, keeping each document once; metadata is kept only if all parts share it."""
+        documents: List[Document] = []
+        positions = {}
+        doc_index = []
+        for collection in collections:
+            for d in collection.documents:
+                if id(d) not in positions:
+                    positions[id(d)] = len(documents)
+                    documents.append(d)
+            remap = np.array([positions[id(d)] for d in collection.documents], dtype=np.int32)
+            doc_index.append(remap[collection.doc_index] if len(collection) else collection.doc_index)
+        metadata = collections[0].metadata if collections and all(c.metadata is collections[0].metadata for c in collections) else None
+        return cls(
+            documents,
+            np.concatenate(doc_index) if doc_index else np.empty(0, dtype=np.int32),
+            np.concatenate([c.starts for c in collections]) if collections else np.empty(0, dtype=np.int64),
+            np.concatenate([c.ends for c in collections]) if collections else np.empty(0, dtype=np.int64),
+            metadata,
+        )
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    @property
+    def lengths(self) -> np.ndarray:
+        """Character length of every chunk."""
+        return self.ends - self.starts
+
+    @property
+    def ids(self) -> List[str]:
+        if self._ids is None:
+            # Hash each document's spans in one pass over its text
+            ids = np.empty(len(self), dtype=object)
+            order = np.argsort(self.doc_index, kind="stable")
+            bounds = np.searchsorted(self.doc_index[order], np.arange(len(self.documents) + 1))
+            for d, document in enumerate(self.documents):
+                rows = order[bounds[d]:bounds[d + 1]]
+                if len(rows):
+                    ids[rows] = calculate_span_hashes(document.text, self.starts[rows].tolist(), self.ends[rows].tolist())
+            self._ids = ids.tolist()
+        return self._ids
+
+    def texts(self) -> Iterator[str]:
+        """Materializes chunk texts one at a time."""
+        for d, s, e in zip(self.doc_index.tolist(), self.starts.tolist(), self.ends.tolist()):
+            yield self.documents[d].text[s:e]
+
+    @overload
+    def __getitem__(self, i: int) -> Chunk: ...
+    @overload
+    def __getitem__(self, i: Union[slice, np.ndarray]) -> "ChunkCollection": ...
+    def __getitem__(self, i):
+        if isinstance(i, (slice, np.ndarray, list)):
+            ids = None if self._ids is None else np.asarray(self._ids, dtype=object)[i].tolist()
+            return ChunkCollection(self.documents, self.doc_index[i], self.starts[i], self.ends[i], self.metadata, ids)
+        d, s, e = int(self.doc_index[i]), int(self.starts[i]), int(self.ends[i])
+        chunk_id = self._ids[i] if self._ids is not None else None
+        return Chunk.from_span(self.documents[d], s, e, id=chunk_id, metadata=self.metadata)
+
+    def __iter__(self) -> Iterator[Chunk]:
+        ids = self.ids
+        documents, metadata = self.documents, self.metadata
+        for d, s, e, chunk_id in zip(self.doc_index.tolist(), self.starts.tolist(), self.ends.tolist(), ids):
+            yield Chunk.from_span(documents[d], s, e, id=chunk_id, metadata=metadata)
+
+    def filter(self, mask: np.ndarray) -> "ChunkCollection":
+        """Rows where the boolean `mask` is set, e.g. `c.filter(c.lengths >= 50)`."""
+        return self[np.asarray(mask, dtype=bool)]
+
+    def to_chunks(self) -> List[Chunk]:
+        return list(self)
+
+    def __repr__(self) -> str:
+        return f"ChunkCollection({len(self)} chunks over {len(self.documents)} documents)"
@@ -1,19 +1,106 @@
-from dataclasses import dataclass, field
+from dataclasses import FrozenInstanceError, dataclass, field
 from datetime import datetime
 from enum import Enum
-from typing import List, Dict, Any, Optional
+from types import MappingProxyType
+from typing import Dict, List, Any, Mapping, Optional, Tuple
+import sys
 import uuid
+from src.utils.hashing import calculate_chunk_hash
 
 class ValuationMethod(str, Enum):
     LOO = "LOO"
     SHAPLEY = "SHAPLEY"
     ATTENTION = "ATTENTION"
+    PROXY = "PROXY"
+    # Shapley rows of an explicitly chosen estimator, so several can run side by side
+    SHAPLEY_EXACT = "SHAPLEY_EXACT"
+    SHAPLEY_MC = "SHAPLEY_MC"
+    SHAPLEY_KERNEL = "SHAPLEY_KERNEL"
+    SHAPLEY_STRATIFIED = "SHAPLEY_STRATIFIED"
+
+# Shared by every chunk created without metadata, instead of an empty dict each
+_NO_METADATA: Mapping[str, Any] = MappingProxyType({})
+
+class Document:
+    """Source text that span-backed chunks slice on demand."""
+
+    __slots__ = ("id", "text")
+
+    def __init__(self, id: str, text: str):
+        self.id = id
+        self.text = text
+
+    def __len__(self) -> int:
+        return len(self.text)
+
+    def __repr__(self) -> str:
+        return f"Document(id={self.id!r}, len={len(self.text)})"
 
-@dataclass(frozen=True)
 class Chunk:
-    id: str
-    text: str
-    metadata: Dict[str, Any] = field(default_factory=dict)
+    """Immutable retrieved passage.
+
+    A chunk either owns its `text`, or refers to [start, end) of a shared
+    `source` Document and slices the text on access, so overlapping chunks of
+    one document hold a single copy. Slotted, with ids interned and a shared
+    empty metadata mapping, to keep per-chunk overhead small.
+    """
+
+    __slots__ = ("id", "_text", "metadata", "source", "start", "end")
+
+    def __init__(
+        self,
+        id: str,
+        text: Optional[str] = None,
+        metadata: Optional[Mapping[str, Any]] = None,
+        source: Optional[Document] = None,
+        start: int = 0,
+        end: Optional[int] = None,
+    ):
+        if text is None and source is None:
+            raise ValueError("Chunk needs either text or a source document")
+        setattr_ = object.__setattr__
+        setattr_(self, "id", sys.intern(id))
+        setattr_(self, "_text", text)
+        setattr_(self, "metadata", metadata if metadata else _NO_METADATA)
+        setattr_(self, "source", source)
+        setattr_(self, "start", start)
+        setattr_(self, "end", end if end is not None else (start + len(text) if text is not None else len(source.text)))
+
+    @classmethod
+    def from_span(cls, source: Document, start: int, end: int, id: Optional[str] = None, metadata: Optional[Mapping[str, Any]] = None) -> "Chunk":
+        """Chunk over source.text[start:end]; the id defaults to the text's content hash."""
+        if id is None:
+            id = calculate_chunk_hash(source.text[start:end])
+        return cls(id, metadata=metadata, source=source, start=start, end=end)
+
+    @property
+    def text(self) -> str:
+        if self._text is not None:
+            return self._text
+        return self.source.text[self.start:self.end]
+
+    def __len__(self) -> int:
+        return self.end - self.start
+
+    def __setattr__(self, name, value):
+        raise FrozenInstanceError(f"cannot assign to field '{name}'")
+
+    def __delattr__(self, name):
+        raise FrozenInstanceError(f"cannot delete field '{name}'")
+
+    def __reduce__(self):
+        return (Chunk, (self.id, self._text, dict(self.metadata), self.source, self.start, self.end))
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Chunk):
+            return NotImplemented
+        return (self.id, self.text, dict(self.metadata)) == (other.id, other.text, dict(other.metadata))
+
+    def __hash__(self) -> int:
+        return hash(self.id)
+
+    def __repr__(self) -> str:
+        return f"Chunk(id={self.id!r}, text={self.text!r}, metadata={dict(self.metadata)!r})"
 
 @dataclass
 class ValuationResult:
@@ -30,3 +117,8 @@ class ExperimentRun:
     id: str = field(default_factory=lambda: str(uuid.uuid4()))
     ground_truth_faithfulness: Optional[float] = None
     valuation_reports: List[ValuationResult] = field(default_factory=list)
+    # Per valuator name: judge score per coalition (chunk ids in context order) and
+    # `last_state`, so a re-ask with a changed chunk set can be valued incrementally.
+    # Scores stay per valuator since valuators in a suite may use different judges.
+    coalition_scores: Dict[str, Dict[Tuple[str, ...], float]] = field(default_factory=dict)
+    valuation_state: Dict[str, Dict[str, Any]] = field(default_factory=dict)
@@ -0,0 +1,182 @@
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Union, overload
+import numpy as np
+from src.dv.models.entities import ValuationMethod, ValuationResult
+
+# Method codes are positions in this tuple; append new methods, never reorder
+METHODS = tuple(ValuationMethod)
+_METHOD_CODES = {method: code for code, method in enumerate(METHODS)}
+
+class ValuationResults(Sequence[ValuationResult]):
+    """Columnar valuation results.
+
+    Rows are stored as NumPy columns (index into `chunk_ids`, method code, score,
+    timestamp) instead of one dataclass each; a valuator's output shares a
+    single timestamp. It is still a Sequence of ValuationResult, so code that
+    iterates results keeps working, and `to_pandas` / `to_arrow` expose the
+    columns as categoricals and dictionary arrays without copying them.
+    """
+
+    def __init__(
+        self,
+        chunk_ids: Sequence[str],
+        chunk_index: np.ndarray,
+        method_codes: np.ndarray,
+        scores: np.ndarray,
+        timestamps: np.ndarray,
+    ):
+        self.chunk_ids = list(chunk_ids)
+        self.chunk_index = np.asarray(chunk_index, dtype=np.int32)
+        self.method_codes = np.asarray(method_codes, dtype=np.int8)
+        self.scores = np.asarray(scores, dtype=np.float64)
+        self.timestamps = np.asarray(timestamps, dtype="datetime64[us]")
+
+    @classmethod
+    def from_scores(cls, chunk_ids: Sequence[str], method: ValuationMethod, scores: Sequence[float], timestamp: Optional[datetime] = None) -> "ValuationResults":
+        """One result per chunk, all with the same method and timestamp.
+
+        Repeated ids (chunks with identical text) share one entry of `chunk_ids`.
+        """
+        n = len(chunk_ids)
+        stamp = np.datetime64(timestamp or datetime.now(), "us")
+        ids: Dict[str, int] = {}
+        index = [ids.setdefault(cid, len(ids)) for cid in chunk_ids]
+        return cls(
+            list(ids),
+            np.array(index, dtype=np.int32),
+            np.full(n, _METHOD_CODES[method], dtype=np.int8),
+            np.asarray(scores, dtype=np.float64),
+            np.full(n, stamp, dtype="datetime64[us]"),
+        )
+
+    @classmethod
+    def from_results(cls, results: Sequence[ValuationResult]) -> "ValuationResults":
+        if isinstance(results, ValuationResults):
+            return results
+        ids: Dict[str, int] = {}
+        index = [ids.setdefault(r.chunk_id, len(ids)) for r in results]
+        return cls(
+            list(ids),
+            np.array(index, dtype=np.int32),
+            np.array([_METHOD_CODES[ValuationMethod(r.method)] for r in results], dtype=np.int8),
+            np.array([r.score for r in results], dtype=np.float64),
+            np.array([np.datetime64(r.timestamp, "us") for r in results], dtype="datetime64[us]"),
+        )
+
+    @classmethod
+    def concat(cls, parts: Sequence[Sequence[ValuationResult]]) -> "ValuationResults":
+        """Concatenates results, merging chunk id tables."""
+        parts = [cls.from_results(p) for p in parts]
+        ids: Dict[str, int] = {}
+        index_parts = []
+        for part in parts:
+            remap = np.array([ids.setdefault(cid, len(ids)) for cid in part.chunk_ids], dtype=np.int32)
+            index_parts.append(remap[part.chunk_index] if len(part) else part.chunk_index)
+        if not parts:
+            return cls.from_scores([], ValuationMethod.LOO, [])
+        return cls(
+            list(ids),
+            np.concatenate(index_parts),
+            np.concatenate([p.method_codes for p in parts]),
+            np.concatenate([p.scores for p in parts]),
+            np.concatenate([p.timestamps for p in parts]),
+        )
+
+    def __len__(self) -> int:
+        return len(self.scores)
+
+    @overload
+    def __getitem__(self, i: int) -> ValuationResult: ...
+    @overload
+    def __getitem__(self, i: slice) -> "ValuationResults": ...
+    def __getitem__(self, i: Union[int, slice]) -> Union[ValuationResult, "ValuationResults"]:
+        if isinstance(i, slice):
+            return ValuationResults(self.chunk_ids, self.chunk_index[i], self.method_codes[i], self.scores[i], self.timestamps[i])
+        return ValuationResult(
+            chunk_id=self.chunk_ids[self.chunk_index[i]],
+            method=METHODS[self.method_codes[i]],
+            score=float(self.scores[i]),
+            timestamp=self.timestamps[i].item(),
+        )
+
+    def __iter__(self) -> Iterator[ValuationResult]:
+        for i in range(len(self)):
+            yield self[i]
+
+    def __eq__(self, other: object) -> bool:
+        # Compares like a list of ValuationResult, so `results == []` still works
+        if isinstance(other, str) or not isinstance(other, Sequence):
+            return NotImplemented
+        return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"ValuationResults({len(self)} rows, {len(self.chunk_ids)} chunks)"
+
+    def to_records(self) -> List[Dict[str, Any]]:
+        """Plain dicts for JSON output."""
+        return [
+            {"chunk_id": self.chunk_ids[c], "method": METHODS[m].value, "score": float(s)}
+            for c, m, s in zip(self.chunk_index.tolist(), self.method_codes.tolist(), self.scores)
+        ]
+
+    def to_pandas(self):
+        """DataFrame with categorical chunk_id/method columns backed by the code arrays."""
+        import pandas as pd
+
+        return pd.DataFrame({
+            "chunk_id": pd.Categorical.from_codes(self.chunk_index, categories=pd.Index(self.chunk_ids, dtype=object)),
+            "method": pd.Categorical.from_codes(self.method_codes, categories=[m.value for m in METHODS]),
+            "score": self.scores,
+            "timestamp": self.timestamps,
+        }, copy=False)
+
+    def to_arrow(self):
+        """Arrow table with dictionary-encoded chunk_id/method columns over the NumPy buffers."""
+        import pyarrow as pa
+
+        return pa.table({
+            "chunk_id": pa.DictionaryArray.from_arrays(pa.array(self.chunk_index), pa.array(self.chunk_ids, type=pa.string())),
+            "method": pa.DictionaryArray.from_arrays(pa.array(self.method_codes), pa.array([m.value for m in METHODS])),
+            "score": pa.array(self.scores),
+            "timestamp": pa.array(self.timestamps),
+        })
+
+    @classmethod
+    def from_arrow(cls, table) -> "ValuationResults":
+        table = table.unify_dictionaries().combine_chunks()
+        if table.num_rows == 0:
+            return cls.from_scores([], ValuationMethod.LOO, [])
+        chunk_col, method_col = table.column("chunk_id").chunk(0), table.column("method").chunk(0)
+        method_values = method_col.dictionary.to_pylist()
+        method_remap = np.array([_METHOD_CODES[ValuationMethod(v)] for v in method_values], dtype=np.int8)
+        return cls(
+            chunk_col.dictionary.to_pylist(),
+            chunk_col.indices.to_numpy(zero_copy_only=False),
+            method_remap[method_col.indices.to_numpy(zero_copy_only=False)],
+            table.column("score").to_numpy(),
+            table.column("timestamp").to_numpy(),
+        )
+
+    def write_parquet(self, path: str):
+        import pyarrow.parquet as pq
+
+        pq.write_table(self.to_arrow(), path)
+
+    def write_feather(self, path: str):
+        import pyarrow.feather as feather
+
+        feather.write_feather(self.to_arrow(), path)
+
+    @classmethod
+    def read_parquet(cls, path: str) -> "ValuationResults":
+        import pyarrow.parquet as pq
+
+        return cls.from_arrow(pq.read_table(path))
+
+    @classmethod
+    def read_feather(cls, path: str) -> "ValuationResults":
+        import pyarrow.feather as feather
+
+        return cls.from_arrow(feather.read_table(path))
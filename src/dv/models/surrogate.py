@@ -1,33 +1,192 @@
-from typing import Dict, Any, Optional
+from bisect import bisect_left
+from typing import Dict, Any, List, Optional, Tuple
 import torch
-from transformers import AutoModelForCausalLM, AutoTokenizer
+from transformers import AutoModelForCausalLM, AutoTokenizer, DynamicCache
 from src.dv.interfaces import Signaler
 from src.utils.torch_utils import get_torch_device
 
+def find_attention_modules(model: torch.nn.Module, names: Optional[List[str]] = None) -> List[torch.nn.Module]:
+    """Modules whose forward output carries attention weights.
+
+    `names` are qualified names as given by `model.named_modules()`; without
+    them every module whose class name contains "Attention" is taken, skipping
+    wrappers around another such module (they only pass its weights up). Raises
+    ValueError for an unknown name or when nothing matches, rather than
+    letting every chunk score 0.0.
+    """
+    if names is not None:
+        named = dict(model.named_modules())
+        missing = [n for n in names if n not in named]
+        if missing:
+            raise ValueError(f"Attention modules {missing} not found in {type(model).__name__}")
+        modules = [named[n] for n in names]
+    else:
+        def is_attention(m: torch.nn.Module) -> bool:
+            return "Attention" in type(m).__name__
+
+        modules = [m for m in model.modules() if is_attention(m) and not any(is_attention(c) for c in m.modules() if c is not m)]
+    if not modules:
+        raise ValueError(
+            f"No attention modules found in {type(model).__name__}; pass their names with attention_modules"
+        )
+    return modules
+
 class LocalSignaler(Signaler):
-    def __init__(self, model_name: str, device: Optional[str] = None):
+    def __init__(
+        self,
+        model_name: str,
+        device: Optional[str] = None,
+        layers: Optional[List[int]] = None,
+        layer_agg: str = "mean",
+        head_agg: str = "mean",
+        attention_modules: Optional[List[str]] = None,
+    ):
         self.device = device or get_torch_device()
         self.tokenizer = AutoTokenizer.from_pretrained(model_name)
         self.model = AutoModelForCausalLM.from_pretrained(
-            model_name, 
+            model_name,
             output_attentions=True,
+            attn_implementation="eager", # fused SDPA kernels never materialize attention weights
             torch_dtype=torch.float16 if self.device == "cuda" else torch.float32
         ).to(self.device)
+        self.model.eval()
+        # Which layers to keep (None = all, negative indices allowed) and how to pool them
+        self.layers = layers
+        self.layer_agg = layer_agg
+        self.head_agg = head_agg
+        # Modules hooked for attention weights (None = classes named "*Attention*"),
+        # resolved on first use so likelihood-only callers never need them
+        self.attention_modules = attention_modules
+        self._hooked: Optional[List[torch.nn.Module]] = None
+
+    def get_signals(self, query: str, context: str, answer: str, chunk_spans: Optional[List[Tuple[int, int]]] = None) -> Dict[str, Any]:
+        """ Scores how much the answer tokens attend to each chunk of the context.
+
+        `chunk_spans` are sorted, non-overlapping (start, end) character offsets of
+        each chunk within `context`; without them the whole context is treated as one chunk.
+        Attention is reduced layer by layer inside the forward pass, so only a
+        [layers, chunks] matrix is ever kept instead of every [heads, seq, seq] map.
+        Raises ValueError when the answer yields no tokens.
+        """
+        prefix = f"Question: {query}\nContext: "
+        full_text = f"{prefix}{context}\nAnswer: {answer}"
+        context_start = len(prefix)
+        answer_start = len(full_text) - len(answer)
+        spans = chunk_spans if chunk_spans is not None else [(0, len(context))]
+
+        inputs = self.tokenizer(full_text, return_tensors="pt", return_offsets_mapping=True)
+        offsets = inputs.pop("offset_mapping")[0].tolist()
+        inputs = inputs.to(self.device)
+
+        # token -> chunk membership matrix [seq, chunks] and answer-token rows. Tokens are
+        # placed by overlap: BPE tokens carry their leading space, so " France" starts
+        # one character before the answer or chunk it belongs to
+        seq_len = len(offsets)
+        membership = torch.zeros(seq_len, len(spans), device=self.device)
+        answer_rows = []
+        span_starts = [context_start + start for start, _ in spans]
+        for t, (tok_start, tok_end) in enumerate(offsets):
+            if tok_end <= tok_start:
+                continue # special tokens
+            if tok_end > answer_start:
+                answer_rows.append(t)
+                continue
+            c = bisect_left(span_starts, tok_end) - 1
+            if c >= 0 and tok_start < context_start + spans[c][1]:
+                membership[t, c] = 1.0
+        if not answer_rows:
+            raise ValueError(f"No answer tokens found for answer {answer!r}")
+
+        rows = torch.tensor(answer_rows, device=self.device)
+        layer_scores = []
+        seen = set()
+
+        def reduce_attention(module, args, output):
+            if not isinstance(output, tuple) or len(output) < 2:
+                return None
+            weights = output[1]
+            if not torch.is_tensor(weights) or weights.dim() != 4 or weights.shape[-1] != seq_len:
+                return None
+            # One layer per hooked module and forward pass
+            if id(module) in seen:
+                return None
+            seen.add(id(module))
+            # [heads, answer_rows, seq] @ [seq, chunks] -> mass on each chunk, averaged over answer tokens
+            per_chunk = (weights[0].float()[:, rows, :] @ membership).mean(dim=1)
+            per_chunk = per_chunk.max(dim=0).values if self.head_agg == "max" else per_chunk.mean(dim=0)
+            layer_scores.append(per_chunk)
+            # Drop the full map so it is freed as soon as the layer finishes
+            return (output[0], None) + tuple(output[2:])
+
+        if self._hooked is None:
+            self._hooked = find_attention_modules(self.model, self.attention_modules)
+        hooks = [m.register_forward_hook(reduce_attention) for m in self._hooked]
+        try:
+            with torch.no_grad():
+                self.model(**inputs, output_attentions=True)
+        finally:
+            for h in hooks:
+                h.remove()
+        if not layer_scores:
+            raise RuntimeError(
+                "Hooked attention modules returned no attention weights; "
+                "pass the modules that output them with attention_modules"
+            )
+
+        stacked = torch.stack(layer_scores)
+        if self.layers is not None:
+            stacked = stacked[self.layers]
+        pooled = stacked.max(dim=0).values if self.layer_agg == "max" else stacked.mean(dim=0)
+        chunk_scores = pooled.tolist()
 
-    def get_signals(self, query: str, context: str, answer: str) -> Dict[str, Any]:
-        """ Extracts attention weights for the context tokens relative to the answer tokens. """
-        full_text = f"Question: {query}\nContext: {context}\nAnswer: {answer}"
-        inputs = self.tokenizer(full_text, return_tensors="pt").to(self.device)
-        
-        with torch.no_grad():
-            outputs = self.model(**inputs)
-        
-        # outputs.attentions is a tuple of layers
-        # Each layer is [batch, heads, seq_len, seq_len]
-        # We want the attention on the context part from the answer part
-        
-        # This is simplified. In practice, we'd map tokens to chunks.
         return {
-            "attentions": outputs.attentions,
-            "input_ids": inputs["input_ids"]
+            "chunk_scores": chunk_scores,
+            "num_layers": len(layer_scores),
+            "num_answer_tokens": len(answer_rows),
         }
+
+    def answer_log_likelihoods(self, queries: List[str], contexts: List[str], answers: List[str]) -> List[float]:
+        """ Mean per-token log-probability of each answer given its query and context.
+
+        Sequences are tokenized canonically and processed in lexicographic token
+        order while one KV cache is kept alive. Each sequence only re-encodes the
+        tokens after its longest common prefix with the previous one, so the shared
+        "Question: ...\nContext:" prefix is encoded once and a chain of growing
+        coalition contexts (e.g. the prefixes of a permutation) costs one forward
+        pass over each newly added chunk plus the answer.
+        """
+        items = []
+        for i, (query, context, answer) in enumerate(zip(queries, contexts, answers)):
+            prompt_ids = self.tokenizer(f"Question: {query}\nContext: {context}\nAnswer: ")["input_ids"]
+            answer_ids = self.tokenizer(answer, add_special_tokens=False)["input_ids"]
+            items.append((prompt_ids + answer_ids, len(prompt_ids), i))
+        items.sort()
+
+        scores = [float("-inf")] * len(items)
+        cache = DynamicCache()
+        cached_ids: List[int] = []
+        for ids, prompt_len, i in items:
+            if len(ids) == prompt_len:
+                continue # empty answer
+
+            # Reuse the cached prefix, but always re-feed the last prompt token: its
+            # logits predict the first answer token
+            shared = 0
+            for a, b in zip(cached_ids, ids[:prompt_len - 1]):
+                if a != b:
+                    break
+                shared += 1
+            cache.crop(shared)
+
+            new_ids = torch.tensor([ids[shared:]], device=self.device)
+            with torch.no_grad():
+                logits = self.model(input_ids=new_ids, past_key_values=cache, use_cache=True, output_attentions=False).logits[0]
+            cached_ids = ids
+
+            # Logits at position t predict token t + 1; answer tokens start at prompt_len
+            first = prompt_len - 1 - shared
+            log_probs = torch.log_softmax(logits[first:-1].float(), dim=-1)
+            targets = torch.tensor(ids[prompt_len:], device=self.device)
+            scores[i] = log_probs.gather(1, targets.unsqueeze(1)).mean().item()
+
+        return scores
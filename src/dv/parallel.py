@@ -0,0 +1,135 @@
+import math
+import multiprocessing
+import os
+import random
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, List, Optional, Tuple
+from src.dv.interfaces import Judge
+from src.utils.hashing import get_chunk_digest, set_chunk_digest
+
+EXECUTORS = ("serial", "thread", "process")
+
+# Judge owned by the current worker process, built once by `_init_worker`
+_WORKER_JUDGE: Optional[Judge] = None
+
+def worker_counter():
+    """Shared counter handed to pool initializers so each worker can take its own index."""
+    return multiprocessing.get_context().Value("i", 0)
+
+def seed_worker(seed: Optional[int], counter) -> int:
+    """Takes the next worker index from `counter` and seeds this process with `seed` + index.
+
+    Returns the index. Distinct seeds keep workers from drawing identical samples.
+    """
+    with counter.get_lock():
+        index = counter.value
+        counter.value += 1
+    if seed is not None:
+        random.seed(seed + index)
+        try:
+            import numpy as np
+            np.random.seed(seed + index)
+        except ImportError:
+            pass
+    return index
+
+def default_workers(kind: str, max_workers: Optional[int] = None) -> int:
+    """Worker count a pool of `kind` gets for `max_workers` (None means the executor default)."""
+    if kind == "serial":
+        return 1
+    if max_workers:
+        return max_workers
+    cpus = os.cpu_count() or 1
+    return min(32, cpus + 4) if kind == "thread" else cpus
+
+def _init_worker(judge_factory: Callable[[], Judge], seed: Optional[int], counter, digest: str = "md5"):
+    global _WORKER_JUDGE
+    seed_worker(seed, counter)
+    set_chunk_digest(digest)
+    _WORKER_JUDGE = judge_factory()
+
+def _score_shard_in_worker(shard: Tuple[List[str], List[str], List[str]]) -> List[float]:
+    return _WORKER_JUDGE.get_faithfulness_batch(*shard)
+
+def _score_coalitions_in_worker(shard: Tuple[str, List[str], List[Tuple[int, ...]], str]) -> List[float]:
+    return _WORKER_JUDGE.get_faithfulness_coalitions(*shard)
+
+def make_executor(kind: str, max_workers: Optional[int] = None, initializer=None, initargs=()) -> Optional[Executor]:
+    """Returns a pool for `kind` ("serial" gives None)."""
+    if kind not in EXECUTORS:
+        raise ValueError(f"Unknown executor '{kind}', expected one of {EXECUTORS}")
+    if kind == "thread":
+        return ThreadPoolExecutor(max_workers=max_workers, initializer=initializer, initargs=initargs)
+    if kind == "process":
+        return ProcessPoolExecutor(max_workers=max_workers, initializer=initializer, initargs=initargs)
+    return None
+
+class ParallelJudge(Judge):
+    """Spreads judge batches over a worker pool.
+
+    `judge_factory` builds the real judge: once in this process for "serial" and
+    "thread" (threads share one model), or once per worker process in the pool
+    initializer for "process", so the model is never pickled or reloaded per
+    call. Workers take this process's chunk digest, which spawned processes
+    would not inherit. Batches are split into contiguous shards and reassembled in input
+    order, so results are deterministic whatever the scheduling.
+    """
+
+    def __init__(
+        self,
+        judge_factory: Callable[[], Judge],
+        executor: str = "process",
+        max_workers: Optional[int] = None,
+        seed: Optional[int] = None,
+    ):
+        self.executor = executor
+        self.max_workers = max_workers
+        self._n_workers = default_workers(executor, max_workers)
+        self._judge = None if executor == "process" else judge_factory()
+        if executor == "process":
+            # Worker i seeds with seed + i
+            initargs = (judge_factory, seed, worker_counter(), get_chunk_digest())
+            self._pool = make_executor(executor, self._n_workers, initializer=_init_worker, initargs=initargs)
+        else:
+            self._pool = make_executor(executor, self._n_workers)
+
+    def get_faithfulness(self, query: str, context: str, answer: str) -> float:
+        return self.get_faithfulness_batch([query], [context], [answer])[0]
+
+    def get_faithfulness_batch(self, queries: List[str], contexts: List[str], answers: List[str]) -> List[float]:
+        """Scores the batch in one contiguous shard per worker."""
+        if not contexts:
+            return []
+        if self._pool is None:
+            return self._judge.get_faithfulness_batch(queries, contexts, answers)
+
+        shard_size = math.ceil(len(contexts) / self._n_workers)
+        shards = [
+            (queries[i:i + shard_size], contexts[i:i + shard_size], answers[i:i + shard_size])
+            for i in range(0, len(contexts), shard_size)
+        ]
+        if self.executor == "process":
+            shard_scores = self._pool.map(_score_shard_in_worker, shards)
+        else:
+            shard_scores = self._pool.map(lambda shard: self._judge.get_faithfulness_batch(*shard), shards)
+        return [score for scores in shard_scores for score in scores]
+
+    def get_faithfulness_coalitions(self, query: str, chunk_texts: List[str], coalitions: List[Tuple[int, ...]], answer: str) -> List[float]:
+        """Shards coalitions across workers so coalition-aware judges keep their chunk structure."""
+        if not coalitions:
+            return []
+        if self._pool is None:
+            return self._judge.get_faithfulness_coalitions(query, chunk_texts, coalitions, answer)
+
+        shard_size = math.ceil(len(coalitions) / self._n_workers)
+        shards = [(query, chunk_texts, coalitions[i:i + shard_size], answer) for i in range(0, len(coalitions), shard_size)]
+        if self.executor == "process":
+            shard_scores = self._pool.map(_score_coalitions_in_worker, shards)
+        else:
+            shard_scores = self._pool.map(lambda shard: self._judge.get_faithfulness_coalitions(*shard), shards)
+        return [score for scores in shard_scores for score in scores]
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
@@ -0,0 +1,254 @@
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+from src.dv.interfaces import Judge, Signaler, Valuator, is_chunk_aware
+from src.dv.models.entities import Chunk, ExperimentRun, ValuationResult
+
+@dataclass
+class Span:
+    name: str
+    category: str
+    start: float # seconds since the profiler was created
+    duration: float
+    thread: int
+    method: str
+    args: Dict[str, Any] = field(default_factory=dict)
+
+class Profiler:
+    """Collects timing spans, counters and histograms from the profiled wrappers below.
+
+    Everything is attributed to the valuation method running on the current
+    thread (set by ProfiledValuator), so a judge shared by several valuators
+    still reports per-method costs. Nothing here runs unless the wrappers are
+    installed, which keeps unprofiled runs at zero overhead.
+    """
+
+    def __init__(self):
+        self.spans: List[Span] = []
+        self.counters: Dict[str, float] = defaultdict(float)
+        self.histograms: Dict[str, List[float]] = defaultdict(list)
+        self._origin = time.perf_counter()
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    @property
+    def method(self) -> str:
+        return getattr(self._local, "method", "-")
+
+    @contextmanager
+    def attribute(self, method: str) -> Iterator[None]:
+        """Attributes everything recorded on this thread inside the block to `method`."""
+        previous = self.method
+        self._local.method = method
+        try:
+            yield
+        finally:
+            self._local.method = previous
+
+    @contextmanager
+    def span(self, name: str, category: str, **args) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            duration = time.perf_counter() - start
+            method = self.method
+            with self._lock:
+                self.spans.append(Span(name, category, start - self._origin, duration, threading.get_ident(), method, args))
+                self.counters[f"{method}:{category}.time_s"] += duration
+
+    def count(self, name: str, value: float = 1):
+        key = f"{self.method}:{name}"
+        with self._lock:
+            self.counters[key] += value
+
+    def observe(self, name: str, values: Sequence[float]):
+        key = f"{self.method}:{name}"
+        with self._lock:
+            self.histograms[key].extend(values)
+
+    @staticmethod
+    def _summarize(values: List[float]) -> Dict[str, float]:
+        ordered = sorted(values)
+        n = len(ordered)
+        return {
+            "count": n,
+            "sum": float(sum(ordered)),
+            "min": ordered[0],
+            "max": ordered[-1],
+            "mean": sum(ordered) / n,
+            "p50": ordered[n // 2],
+            "p95": ordered[min(n - 1, int(n * 0.95))],
+        }
+
+    def breakdown(self) -> Dict[str, Dict[str, float]]:
+        """Per-method totals: valuator wall time, judge and inference inputs/batches/time, join time.
+
+        `cache_hit_rate` is the share of judge inputs that never reached
+        inference (cache hits and in-batch duplicates).
+        """
+        methods = sorted({key.split(":", 1)[0] for key in self.counters})
+        report = {}
+        for method in methods:
+            def get(name: str) -> float:
+                return self.counters.get(f"{method}:{name}", 0.0)
+
+            judge_inputs = get("judge.inputs")
+            contexts = self.histograms.get(f"{method}:judge.context_chars", [])
+            report[method] = {
+                "wall_s": get("valuator.time_s"),
+                "judge_inputs": judge_inputs,
+                "judge_batches": get("judge.batches"),
+                "judge_s": get("judge.time_s"),
+                "inference_inputs": get("inference.inputs"),
+                "inference_batches": get("inference.batches"),
+                "inference_s": get("inference.time_s"),
+                "join_s": get("join.time_s"),
+                "signaler_s": get("signaler.time_s"),
+                "cache_hit_rate": 1.0 - get("inference.inputs") / judge_inputs if judge_inputs else 0.0,
+                "mean_context_chars": sum(contexts) / len(contexts) if contexts else 0.0,
+            }
+        return report
+
+    def to_json(self) -> Dict[str, Any]:
+        return {
+            "spans": [vars(s) for s in self.spans],
+            "counters": dict(self.counters),
+            "histograms": {name: self._summarize(values) for name, values in self.histograms.items() if values},
+            "methods": self.breakdown(),
+        }
+
+    def to_chrome_trace(self) -> Dict[str, Any]:
+        """Trace Event Format, viewable in chrome://tracing or Perfetto."""
+        pid = os.getpid()
+        events = [
+            {
+                "name": s.name,
+                "cat": s.category,
+                "ph": "X",
+                "ts": s.start * 1e6,
+                "dur": s.duration * 1e6,
+                "pid": pid,
+                "tid": s.thread,
+                "args": {"method": s.method, **s.args},
+            }
+            for s in self.spans
+        ]
+        return {"traceEvents": events, "displayTimeUnit": "ms", "otherData": {"methods": self.breakdown()}}
+
+    def save(self, path: str, fmt: str = "json"):
+        """Writes the trace as plain JSON ("json") or Chrome trace events ("chrome")."""
+        if fmt not in ("json", "chrome"):
+            raise ValueError(f"Unknown trace format '{fmt}', expected 'json' or 'chrome'")
+        with open(path, "w") as f:
+            json.dump(self.to_chrome_trace() if fmt == "chrome" else self.to_json(), f)
+
+    def format_breakdown(self) -> str:
+        lines = [f"{'method':>18} {'wall s':>9} {'judge in':>9} {'batches':>8} {'judge s':>9} {'infer in':>9} {'infer s':>9} {'join s':>8} {'hit rate':>8} {'ctx chars':>10}"]
+        for method, row in self.breakdown().items():
+            lines.append(
+                f"{method:>18} {row['wall_s']:>9.4f} {row['judge_inputs']:>9.0f} {row['judge_batches']:>8.0f} {row['judge_s']:>9.4f} "
+                f"{row['inference_inputs']:>9.0f} {row['inference_s']:>9.4f} {row['join_s']:>8.4f} {row['cache_hit_rate']:>8.1%} {row['mean_context_chars']:>10.0f}"
+            )
+        return "\n".join(lines)
+
+class _Forwarding:
+    """Forwards unknown attributes (stats, close, last_run_stats, ...) to the wrapped object."""
+
+    _wrapped_attr = ""
+
+    def __getattr__(self, name: str):
+        if name.startswith("__") or name == self._wrapped_attr:
+            raise AttributeError(name)
+        return getattr(getattr(self, self._wrapped_attr), name)
+
+class ProfiledJudge(_Forwarding, Judge):
+    """Records every judge call as a `layer` span with input counts, batch sizes and context lengths.
+
+    Wrap the model judge as layer "inference" and the cache in front of it as
+    layer "judge" to separate inference from cache overhead. When the wrapped
+    judge has no coalition API, coalition contexts are joined here under a
+    "join" span, as the Judge default would.
+    """
+
+    _wrapped_attr = "judge"
+
+    def __init__(self, judge: Judge, profiler: Profiler, layer: str = "judge"):
+        self.judge = judge
+        self.profiler = profiler
+        self.layer = layer
+        self.chunk_aware = is_chunk_aware(judge)
+
+    def _record(self, context_chars: List[float]):
+        self.profiler.count(f"{self.layer}.inputs", len(context_chars))
+        self.profiler.count(f"{self.layer}.batches")
+        self.profiler.observe(f"{self.layer}.batch_size", [len(context_chars)])
+        self.profiler.observe(f"{self.layer}.context_chars", context_chars)
+
+    def get_faithfulness(self, query: str, context: str, answer: str) -> float:
+        self._record([len(context)])
+        with self.profiler.span("get_faithfulness", self.layer, batch_size=1):
+            return self.judge.get_faithfulness(query, context, answer)
+
+    def get_faithfulness_batch(self, queries: List[str], contexts: List[str], answers: List[str]) -> List[float]:
+        self._record([len(c) for c in contexts])
+        with self.profiler.span("get_faithfulness_batch", self.layer, batch_size=len(contexts)):
+            return self.judge.get_faithfulness_batch(queries, contexts, answers)
+
+    def get_faithfulness_coalitions(self, query: str, chunk_texts: List[str], coalitions: List[Tuple[int, ...]], answer: str) -> List[float]:
+        if not self.chunk_aware:
+            with self.profiler.span("join", "join", batch_size=len(coalitions)):
+                contexts = [" ".join(chunk_texts[i] for i in c) for c in coalitions]
+            return self.get_faithfulness_batch([query] * len(contexts), contexts, [answer] * len(contexts))
+        lengths = [len(t) for t in chunk_texts]
+        self._record([sum(lengths[i] for i in c) + max(len(c) - 1, 0) for c in coalitions])
+        with self.profiler.span("get_faithfulness_coalitions", self.layer, batch_size=len(coalitions)):
+            return self.judge.get_faithfulness_coalitions(query, chunk_texts, coalitions, answer)
+
+class ProfiledSignaler(_Forwarding, Signaler):
+    _wrapped_attr = "signaler"
+
+    def __init__(self, signaler: Signaler, profiler: Profiler):
+        self.signaler = signaler
+        self.profiler = profiler
+
+    def get_signals(self, query: str, context: str, answer: str, chunk_spans: Optional[List[Tuple[int, int]]] = None) -> Dict[str, Any]:
+        self.profiler.count("signaler.calls")
+        with self.profiler.span("get_signals", "signaler", context_chars=len(context)):
+            return self.signaler.get_signals(query, context, answer, chunk_spans=chunk_spans)
+
+class ProfiledValuator(_Forwarding, Valuator):
+    """Times a valuator's runs and attributes the judge calls they make to `name`."""
+
+    _wrapped_attr = "valuator"
+
+    def __init__(self, valuator: Valuator, name: str, profiler: Profiler):
+        self.valuator = valuator
+        self.name = name
+        self.profiler = profiler
+
+    def evaluate(self, query: str, chunks: List[Chunk], answer: str) -> Sequence[ValuationResult]:
+        with self.profiler.attribute(self.name), self.profiler.span(self.name, "valuator", chunks=len(chunks)):
+            return self.valuator.evaluate(query, chunks, answer)
+
+    def evaluate_targets(self, query: str, chunks: List[Chunk], answer: str, targets: List[int]) -> Sequence[ValuationResult]:
+        with self.profiler.attribute(self.name), self.profiler.span(self.name, "valuator", chunks=len(chunks), targets=len(targets)):
+            return self.valuator.evaluate_targets(query, chunks, answer, targets)
+
+    def evaluate_incremental(self, query: str, chunks: List[Chunk], answer: str, previous: ExperimentRun, state: Optional[Dict[str, Any]] = None) -> Sequence[ValuationResult]:
+        with self.profiler.attribute(self.name), self.profiler.span(self.name, "valuator", chunks=len(chunks), incremental=True):
+            return self.valuator.evaluate_incremental(query, chunks, answer, previous, state)
+
+def profile_valuators(valuators: Dict[str, Valuator], profiler: Profiler) -> Dict[str, Valuator]:
+    """Wraps each valuator (and an attention valuator's signaler) for profiling."""
+    profiled = {}
+    for name, valuator in valuators.items():
+        if isinstance(getattr(valuator, "signaler", None), Signaler):
+            valuator.signaler = ProfiledSignaler(valuator.signaler, profiler)
+        profiled[name] = ProfiledValuator(valuator, name, profiler)
+    return profiled
@@ -0,0 +1,51 @@
+import importlib
+from typing import Dict, Type
+from src.dv.interfaces import Judge, Valuator
+
+# Name -> "module:attribute". Modules are imported on first lookup, so listing
+# names (e.g. for CLI choices) never pulls in torch, transformers or openai.
+JUDGES: Dict[str, str] = {
+    "mnli": "src.dv.evaluation.judges:MNLIJudge",
+    "mnli-window": "src.dv.evaluation.judges:WindowedNLIJudge",
+    "llm": "src.dv.evaluation.judges:LLMJudge",
+    "llm-async": "src.dv.evaluation.async_llm:AsyncLLMJudge",
+    "likelihood": "src.dv.evaluation.judges:LikelihoodJudge",
+    "ragas": "src.dv.evaluation.judges:RagasJudge",
+}
+
+VALUATORS: Dict[str, str] = {
+    "loo": "src.dv.algorithms.loo:LOOValuator",
+    "shapley": "src.dv.algorithms.shapley:ShapleyValuator",
+    "attention": "src.dv.algorithms.attention:AttentionValuator",
+    "proxy": "src.dv.algorithms.proxy:ProxyValuator",
+}
+
+_resolved: Dict[str, type] = {}
+
+def resolve(target: str) -> type:
+    """Imports and returns the attribute named by a "module:attribute" path."""
+    if target not in _resolved:
+        module_name, _, attr = target.partition(":")
+        _resolved[target] = getattr(importlib.import_module(module_name), attr)
+    return _resolved[target]
+
+def _lookup(registry: Dict[str, str], kind: str, name: str) -> type:
+    if name not in registry:
+        raise ValueError(f"Unknown {kind} '{name}', expected one of {tuple(registry)}")
+    return resolve(registry[name])
+
+def get_judge(name: str) -> Type[Judge]:
+    """Judge class registered under `name`."""
+    return _lookup(JUDGES, "judge", name)
+
+def get_valuator(name: str) -> Type[Valuator]:
+    """Valuator class registered under `name`."""
+    return _lookup(VALUATORS, "valuator", name)
+
+def register_judge(name: str, target: str):
+    """Registers a judge by "module:Class" path without importing it."""
+    JUDGES[name] = target
+
+def register_valuator(name: str, target: str):
+    """Registers a valuator by "module:Class" path without importing it."""
+    VALUATORS[name] = target
@@ -0,0 +1,277 @@
+import json
+import queue
+import threading
+import time
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Tuple
+from src.dv.core import ValuationSuite
+from src.dv.interfaces import Judge, Valuator, is_chunk_aware
+from src.dv.models.entities import Chunk, ValuationMethod, ValuationResult
+
+if TYPE_CHECKING:
+    from src.dv.evaluation.value_index import ChunkValueIndex
+
+class _Job:
+    def __init__(self, kind: str, args: tuple):
+        self.kind = kind
+        self.args = args
+        self.done = threading.Event()
+        self.scores: List[float] = []
+        self.error: Optional[BaseException] = None
+
+class MicroBatchingJudge(Judge):
+    """Merges batch calls from concurrent threads into shared judge batches.
+
+    A single dispatcher thread owns the wrapped judge: it takes the first
+    pending job, keeps collecting jobs for up to `max_wait` seconds or until
+    `max_batch` triples are queued, scores them in one
+    `get_faithfulness_batch` call, and hands each caller its slice. Coalition
+    calls go to the wrapped judge unmerged when it overrides
+    `get_faithfulness_coalitions`, and are joined into plain batches otherwise.
+    """
+
+    def __init__(self, judge: Judge, max_batch: int = 256, max_wait: float = 0.005):
+        self.judge = judge
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.batches = 0
+        self.jobs = 0
+        self.chunk_aware = is_chunk_aware(judge)
+        self._queue: "queue.Queue[Optional[_Job]]" = queue.Queue()
+        self._thread = threading.Thread(target=self._dispatch, name="judge-dispatcher", daemon=True)
+        self._thread.start()
+
+    def _submit(self, kind: str, *args) -> List[float]:
+        job = _Job(kind, args)
+        self._queue.put(job)
+        job.done.wait()
+        if job.error is not None:
+            raise job.error
+        return job.scores
+
+    def _collect(self, first: _Job) -> Tuple[List[_Job], bool]:
+        """Gathers batch jobs arriving within `max_wait`; also reports whether close() was requested."""
+        jobs = [first]
+        size = len(first.args[1])
+        deadline = time.monotonic() + self.max_wait
+        while size < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                job = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if job is None:
+                return jobs, True
+            if job.kind != "batch":
+                # Coalition jobs run on their own; score it right after this batch
+                self._run_coalitions(job)
+                continue
+            jobs.append(job)
+            size += len(job.args[1])
+        return jobs, False
+
+    def _run_batch(self, jobs: List[_Job]):
+        queries, contexts, answers = [], [], []
+        for job in jobs:
+            queries.extend(job.args[0])
+            contexts.extend(job.args[1])
+            answers.extend(job.args[2])
+        try:
+            scores = self.judge.get_faithfulness_batch(queries, contexts, answers)
+        except BaseException as e:
+            for job in jobs:
+                job.error = e
+                job.done.set()
+            return
+        self.batches += 1
+        pos = 0
+        for job in jobs:
+            job.scores = scores[pos:pos + len(job.args[1])]
+            pos += len(job.args[1])
+            job.done.set()
+
+    def _run_coalitions(self, job: _Job):
+        try:
+            job.scores = self.judge.get_faithfulness_coalitions(*job.args)
+            self.batches += 1
+        except BaseException as e:
+            job.error = e
+        job.done.set()
+
+    def _dispatch(self):
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            self.jobs += 1
+            if job.kind != "batch":
+                self._run_coalitions(job)
+                continue
+            jobs, closing = self._collect(job)
+            self.jobs += len(jobs) - 1
+            self._run_batch(jobs)
+            if closing:
+                return
+
+    def get_faithfulness(self, query: str, context: str, answer: str) -> float:
+        return self.get_faithfulness_batch([query], [context], [answer])[0]
+
+    def get_faithfulness_batch(self, queries: List[str], contexts: List[str], answers: List[str]) -> List[float]:
+        if not contexts:
+            return []
+        return self._submit("batch", queries, contexts, answers)
+
+    def get_faithfulness_coalitions(self, query: str, chunk_texts: List[str], coalitions: List[Tuple[int, ...]], answer: str) -> List[float]:
+        if not self.chunk_aware:
+            return super().get_faithfulness_coalitions(query, chunk_texts, coalitions, answer)
+        if not coalitions:
+            return []
+        return self._submit("coalitions", query, chunk_texts, coalitions, answer)
+
+    def close(self):
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+        if hasattr(self.judge, "close"):
+            self.judge.close()
+
+class _Handler(BaseHTTPRequestHandler):
+    server: "ValuationServer"
+
+    def _send_json(self, status: int, payload: Dict[str, Any]):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path != "/health":
+            self._send_json(404, {"error": f"Unknown path {self.path}"})
+            return
+        self._send_json(200, self.server.health())
+
+    def do_POST(self):
+        if self.path != "/evaluate":
+            self._send_json(404, {"error": f"Unknown path {self.path}"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            job = json.loads(self.rfile.read(length))
+            chunks = [Chunk(id=c["id"], text=c["text"], metadata=c.get("metadata", {})) for c in job["chunks"]]
+            query, answer = job["query"], job["answer"]
+        except (ValueError, KeyError, TypeError) as e:
+            self._send_json(400, {"error": f"Bad job: {e}"})
+            return
+        try:
+            self._send_json(200, self.server.evaluate(query, chunks, answer, job.get("methods")))
+        except ValueError as e:
+            self._send_json(400, {"error": str(e)})
+        except Exception as e:
+            self._send_json(500, {"error": f"{type(e).__name__}: {e}"})
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+class ValuationServer(ThreadingHTTPServer):
+    """Localhost HTTP service that keeps one warm judge for every valuation job.
+
+    POST /evaluate takes {"query", "answer", "chunks": [{"id", "text"}], "methods"}
+    and returns {"results": [{"chunk_id", "method", "score"}], "run_stats"}.
+    GET /health reports the judge and batching counters. Each request runs on
+    its own thread with fresh valuators from `valuator_factory(methods)`;
+    their judge calls meet in `judge`, so concurrent jobs share judge batches.
+    Results are also added to `index` when one is given.
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        address: Tuple[str, int],
+        judge: Judge,
+        valuator_factory: Callable[[List[str]], Dict[str, Valuator]],
+        default_methods: List[str],
+        seed: Optional[int] = None,
+        verbose: bool = False,
+        index: Optional["ChunkValueIndex"] = None,
+    ):
+        super().__init__(address, _Handler)
+        self.judge = judge
+        self.index = index
+        self.valuator_factory = valuator_factory
+        self.default_methods = default_methods
+        self.seed = seed
+        self.verbose = verbose
+        self.jobs = 0
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def evaluate(self, query: str, chunks: List[Chunk], answer: str, methods: Optional[List[str]] = None) -> Dict[str, Any]:
+        valuators = self.valuator_factory(methods or self.default_methods)
+        if not valuators:
+            raise ValueError(f"No known valuation methods in {methods}")
+        results = ValuationSuite(valuators, seed=self.seed).evaluate_all(query, chunks, answer)
+        if self.index is not None:
+            self.index.update(chunks, results)
+        self.jobs += 1
+        return {
+            "results": results.to_records(),
+            "run_stats": {name: v.last_run_stats for name, v in valuators.items() if hasattr(v, "last_run_stats")},
+        }
+
+    def health(self) -> Dict[str, Any]:
+        stats: Dict[str, Any] = {"status": "ok", "jobs": self.jobs}
+        if hasattr(self.judge, "stats"):
+            stats["judge_cache"] = self.judge.stats
+        batcher = getattr(self.judge, "judge", None)
+        if isinstance(batcher, MicroBatchingJudge):
+            stats["judge_batches"] = batcher.batches
+            stats["judge_jobs"] = batcher.jobs
+        return stats
+
+class RemoteSuite:
+    """Drop-in for ValuationSuite that sends each job to a running ValuationServer."""
+
+    def __init__(self, url: str, methods: Optional[List[str]] = None, timeout: float = 600.0):
+        self.url = url.rstrip("/")
+        self.methods = methods
+        self.timeout = timeout
+        self.last_run_stats: Dict[str, Any] = {}
+
+    def _request(self, path: str, payload: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        data = json.dumps(payload).encode("utf-8") if payload is not None else None
+        request = urllib.request.Request(self.url + path, data=data, headers={"Content-Type": "application/json"})
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            raise RuntimeError(f"Valuation server error {e.code}: {e.read().decode('utf-8', 'replace')}") from e
+
+    def evaluate_all(self, query: str, chunks: List[Chunk], answer: str) -> List[ValuationResult]:
+        payload = {
+            "query": query,
+            "answer": answer,
+            "chunks": [{"id": c.id, "text": c.text, "metadata": dict(c.metadata)} for c in chunks],
+            "methods": self.methods,
+        }
+        response = self._request("/evaluate", payload)
+        self.last_run_stats = response.get("run_stats", {})
+        return [
+            ValuationResult(chunk_id=r["chunk_id"], method=ValuationMethod(r["method"]), score=r["score"])
+            for r in response["results"]
+        ]
+
+    def health(self) -> Dict[str, Any]:
+        return self._request("/health")
+
+    def close(self):
+        pass
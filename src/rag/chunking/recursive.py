@@ -1,40 +1,55 @@
-from typing import List
-from ...dv.models.entities import Chunk
+from types import MappingProxyType
+from typing import Iterator, List, Tuple
+from ...dv.models.entities import Chunk, Document
 from ...utils.hashing import calculate_chunk_hash
 
-def recursive_chunker(text: str, chunk_size: int = 100, separators: List[str] = ["\n\n", "\n", " ", ""]) -> List[Chunk]:
+DEFAULT_SEPARATORS = ["\n\n", "\n", " ", ""]
+# Shared by every chunk, so read-only
+_METADATA = MappingProxyType({"type": "recursive"})
+
+def split_spans(text: str, start: int, end: int, chunk_size: int, separators: List[str]) -> Iterator[Tuple[int, int]]:
+    """Yields (start, end) offsets of the recursive chunks of text[start:end].
+
+    Parts between separators are merged greedily while they fit in
+    `chunk_size`; a part that alone is too large is split with the next
+    separator. Only offsets are tracked, so no intermediate strings are built.
+    """
+    if end - start <= chunk_size or not separators:
+        yield start, end
+        return
+
+    sep, rest = separators[0], separators[1:]
+    if not sep:
+        # Character level: hard cuts
+        for s in range(start, end, chunk_size):
+            yield s, min(s + chunk_size, end)
+        return
+
+    cur_start = cur_end = start
+    pos = start
+    while pos <= end:
+        idx = text.find(sep, pos, end)
+        part_end = end if idx == -1 else idx
+        if cur_end > cur_start and (cur_end - cur_start) + (part_end - pos) + len(sep) <= chunk_size:
+            cur_end = part_end
+        else:
+            if cur_end > cur_start:
+                yield from split_spans(text, cur_start, cur_end, chunk_size, rest)
+            cur_start, cur_end = pos, part_end
+        if idx == -1:
+            break
+        pos = idx + len(sep)
+    if cur_end > cur_start:
+        yield from split_spans(text, cur_start, cur_end, chunk_size, rest)
+
+def recursive_chunker(text: str, chunk_size: int = 100, separators: List[str] = DEFAULT_SEPARATORS) -> List[Chunk]:
     """Splits text recursively using a list of separators."""
-    # This is a simplified recursive splitter
-    def split_text(txt: str, seps: List[str]) -> List[str]:
-        if len(txt) <= chunk_size or not seps:
-            return [txt]
-        
-        sep = seps[0]
-        parts = txt.split(sep)
-        result = []
-        current = ""
-        
-        for p in parts:
-            if len(current) + len(p) + len(sep) <= chunk_size:
-                current += (sep if current else "") + p
-            else:
-                if current:
-                    result.append(current)
-                current = p
-        if current:
-            result.append(current)
-            
-        # Refine parts that are still too large
-        final_result = []
-        for r in result:
-            if len(r) > chunk_size:
-                final_result.extend(split_text(r, seps[1:]))
-            else:
-                final_result.append(r)
-        return final_result
+    if len(text) <= chunk_size:
+        return [Chunk(id=calculate_chunk_hash(text), text=text, metadata=_METADATA)]
 
-    raw_chunks = split_text(text, separators)
+    # Chunks are spans over one shared Document
+    document = Document(calculate_chunk_hash(text), text)
     return [
-        Chunk(id=calculate_chunk_hash(c), text=c, metadata={"type": "recursive"})
-        for c in raw_chunks
+        Chunk.from_span(document, start, end, metadata=_METADATA)
+        for start, end in split_spans(text, 0, len(text), chunk_size, separators)
     ]
@@ -1,6 +1,13 @@
-from typing import List
-from ...dv.models.entities import Chunk
+import re
+from types import MappingProxyType
+from typing import List, Optional, Tuple
+import numpy as np
+from ...dv.models.entities import Chunk, Document
 from ...utils.hashing import calculate_chunk_hash
+from ..embeddings import default_encoder
+
+# Shared by every chunk, so read-only
+_METADATA = MappingProxyType({"type": "semantic"})
 
 def semantic_chunker(text: str, threshold: float = 0.5) -> List[Chunk]:
     """Splits text into chunks based on semantic similarity of sentences."""
@@ -8,10 +15,24 @@ def semantic_chunker(text: str, threshold: float = 0.5) -> List[Chunk]:
     if not sentences:
         return []
 
+    # Sentence i covers text[starts[i]:starts[i] + len(sentences[i])], followed by ". "
+    starts = []
+    offset = 0
+    for sentence in sentences:
+        starts.append(offset)
+        offset += len(sentence) + 2
+
+    document = Document(calculate_chunk_hash(text), text)
+
+    def span_chunk(first: int, last: int) -> Chunk:
+        # Keep the sentence's closing period when the source has one
+        end = min(starts[last] + len(sentences[last]) + 1, len(text))
+        return Chunk.from_span(document, starts[first], end, metadata=_METADATA)
+
     # Simplified semantic logic: sentences are grouped if they share keywords
-    # Real implementation would use sentence embeddings (e.g., Sentence-Transformers)
+    # (see embedding_semantic_chunker for the sentence-embedding version)
     chunks = []
-    current_chunk_sentences = [sentences[0]]
+    first = 0
     
     for i in range(1, len(sentences)):
         # Mock similarity check
@@ -19,15 +40,68 @@ def semantic_chunker(text: str, threshold: float = 0.5) -> List[Chunk]:
         s2 = set(sentences[i].lower().split())
         similarity = len(s1 & s2) / max(len(s1 | s2), 1)
         
-        if similarity >= threshold:
-            current_chunk_sentences.append(sentences[i])
-        else:
-            chunk_text = ". ".join(current_chunk_sentences) + "."
-            chunks.append(Chunk(id=calculate_chunk_hash(chunk_text), text=chunk_text, metadata={"type": "semantic"}))
-            current_chunk_sentences = [sentences[i]]
+        if similarity < threshold:
+            chunks.append(span_chunk(first, i - 1))
+            first = i
             
-    if current_chunk_sentences:
-        chunk_text = ". ".join(current_chunk_sentences) + "."
-        chunks.append(Chunk(id=calculate_chunk_hash(chunk_text), text=chunk_text, metadata={"type": "semantic"}))
+    chunks.append(span_chunk(first, len(sentences) - 1))
         
     return chunks
+
+# Sentence ends: ., ! or ? followed by whitespace
+SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+def split_sentences(text: str) -> List[Tuple[int, int]]:
+    """(start, end) offsets of the sentences in text."""
+    spans = []
+    start = 0
+    for match in SENTENCE_END.finditer(text):
+        spans.append((start, match.start()))
+        start = match.end()
+    if start < len(text):
+        spans.append((start, len(text)))
+    return spans
+
+def embedding_semantic_chunker(
+    text: str,
+    encoder=None,
+    breakpoint: str = "percentile",
+    percentile: float = 90.0,
+    threshold: float = 0.5,
+    doc_id: Optional[str] = None,
+) -> List[Chunk]:
+    """Splits text where the embeddings of adjacent sentences diverge.
+
+    Sentences are encoded in one batch (through the encoder's cache), and
+    cosine similarities of neighbours are computed in one vectorized pass. A
+    chunk ends after sentence i when the distance to sentence i+1 is above the
+    `percentile`-th percentile of all distances ("percentile"), or their
+    similarity is below `threshold` ("threshold"). `encoder` defaults to the
+    shared local encoder; anything with `encode(sentences) -> ndarray` works.
+    """
+    if breakpoint not in ("percentile", "threshold"):
+        raise ValueError(f"Unknown breakpoint '{breakpoint}', expected 'percentile' or 'threshold'")
+    spans = split_sentences(text)
+    if not spans:
+        return []
+
+    document = Document(doc_id or calculate_chunk_hash(text), text)
+    if len(spans) == 1:
+        return [Chunk.from_span(document, spans[0][0], spans[0][1], metadata=_METADATA)]
+
+    encoder = encoder or default_encoder()
+    embeddings = np.asarray(encoder.encode([text[s:e] for s, e in spans]), dtype=np.float32)
+    norms = np.linalg.norm(embeddings, axis=1)
+    embeddings /= np.where(norms > 0, norms, 1.0)[:, None]
+    similarities = np.einsum("ij,ij->i", embeddings[:-1], embeddings[1:])
+
+    if breakpoint == "percentile":
+        distances = 1.0 - similarities
+        breaks = np.flatnonzero(distances > np.percentile(distances, percentile))
+    else:
+        breaks = np.flatnonzero(similarities < threshold)
+
+    # Chunk k covers sentences firsts[k]..lasts[k]
+    firsts = np.concatenate(([0], breaks + 1))
+    lasts = np.concatenate((breaks, [len(spans) - 1]))
+    return [Chunk.from_span(document, spans[first][0], spans[last][1], metadata=_METADATA) for first, last in zip(firsts.tolist(), lasts.tolist())]
@@ -1,17 +1,26 @@
-from typing import List
-from ...dv.models.entities import Chunk
+import math
+from types import MappingProxyType
+from typing import List, Optional, Union
+import numpy as np
+from ...dv.models.collection import ChunkCollection
+from ...dv.models.entities import Chunk, Document
 from ...utils.hashing import calculate_chunk_hash
 
-def fixed_length_chunker(text: str, chunk_size: int = 100, overlap: int = 20) -> List[Chunk]:
-    """Splits text into chunks of fixed length with overlap."""
-    chunks = []
-    start = 0
-    while start < len(text):
-        end = start + chunk_size
-        chunk_text = text[start:end]
-        chunk_id = calculate_chunk_hash(chunk_text)
-        chunks.append(Chunk(id=chunk_id, text=chunk_text, metadata={"type": "fixed", "start": start, "end": end}))
-        if end >= len(text):
-            break
-        start += (chunk_size - overlap)
-    return chunks
+# Shared by every chunk, so read-only
+_METADATA = MappingProxyType({"type": "fixed"})
+
+def fixed_length_chunker(text: str, chunk_size: int = 100, overlap: int = 20, doc_id: Optional[str] = None, as_collection: bool = False) -> Union[List[Chunk], ChunkCollection]:
+    """Splits text into chunks of fixed length with overlap.
+
+    Chunks are spans over one shared Document (their offsets are `start`/`end`),
+    so overlapping windows don't copy the text.
+    """
+    if overlap >= chunk_size:
+        raise ValueError("overlap must be smaller than chunk_size")
+    document = Document(doc_id or calculate_chunk_hash(text), text)
+    step = chunk_size - overlap
+    n = 1 + max(0, math.ceil((len(text) - chunk_size) / step)) if text else 0
+    starts = np.arange(n, dtype=np.int64) * step
+    ends = np.minimum(starts + chunk_size, len(text))
+    chunks = ChunkCollection.from_spans(document, starts, ends, metadata=_METADATA)
+    return chunks if as_collection else chunks.to_chunks()
@@ -0,0 +1,206 @@
+import glob
+import itertools
+import json
+import os
+from types import MappingProxyType
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+from ...dv.models.entities import Chunk
+from ...dv.parallel import make_executor
+from ...utils.hashing import calculate_chunk_hash, get_chunk_digest, set_chunk_digest
+from .recursive import DEFAULT_SEPARATORS, split_spans
+
+TextSource = Union[str, "os.PathLike[str]", Iterable[str]]
+
+# Shared by every yielded chunk, so read-only
+_FIXED_METADATA = MappingProxyType({"type": "fixed"})
+_RECURSIVE_METADATA = MappingProxyType({"type": "recursive"})
+_SEMANTIC_METADATA = MappingProxyType({"type": "semantic"})
+
+def iter_text(source: TextSource, block_size: int = 1 << 20) -> Iterator[str]:
+    """Yields text blocks from a file path, or passes through an iterable of text pieces.
+
+    A plain `str` is treated as a path; wrap in-memory text as `[text]`.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "r", encoding="utf-8") as f:
+            while True:
+                block = f.read(block_size)
+                if not block:
+                    return
+                yield block
+    else:
+        yield from source
+
+def stream_parts(source: TextSource, sep: str, max_buffer: int = 1 << 22) -> Iterator[Tuple[int, str]]:
+    """Yields (offset, part) for the parts of the stream between separators.
+
+    Like `text.split(sep)` with character offsets, holding at most one
+    unfinished part in memory. A part that grows past `max_buffer` without a
+    separator is cut there, which keeps memory bounded on separator-free runs.
+    """
+    buffer = ""
+    base = 0
+    for block in iter_text(source):
+        buffer += block
+        pos = 0
+        while True:
+            idx = buffer.find(sep, pos)
+            if idx == -1:
+                break
+            yield base + pos, buffer[pos:idx]
+            pos = idx + len(sep)
+        if len(buffer) - pos > max_buffer:
+            # Keep a possible partial separator for the next block
+            cut = len(buffer) - len(sep) + 1
+            yield base + pos, buffer[pos:cut]
+            pos = cut
+        buffer = buffer[pos:]
+        base += pos
+    yield base, buffer
+
+def stream_fixed_length_chunks(source: TextSource, chunk_size: int = 100, overlap: int = 20) -> Iterator[Chunk]:
+    """Streaming `fixed_length_chunker`: same chunks, holding about one block plus one chunk."""
+    if overlap >= chunk_size:
+        raise ValueError("overlap must be smaller than chunk_size")
+    step = chunk_size - overlap
+    metadata = _FIXED_METADATA
+    buffer = ""
+    base = 0 # absolute offset of buffer[0]
+    start = 0
+    for block in iter_text(source):
+        buffer += block
+        # A chunk is final once text continues past its end
+        while start + chunk_size < base + len(buffer):
+            text = buffer[start - base:start - base + chunk_size]
+            yield Chunk(id=calculate_chunk_hash(text), text=text, metadata=metadata, start=start)
+            start += step
+        buffer = buffer[start - base:]
+        base = start
+    if buffer:
+        yield Chunk(id=calculate_chunk_hash(buffer), text=buffer, metadata=metadata, start=start)
+
+def stream_recursive_chunks(
+    source: TextSource,
+    chunk_size: int = 100,
+    separators: List[str] = DEFAULT_SEPARATORS,
+    max_buffer: int = 1 << 22,
+) -> Iterator[Chunk]:
+    """Streaming `recursive_chunker` yielding chunks with offsets into the stream.
+
+    Top-level parts are read lazily and merged greedily as in the in-memory
+    chunker, so results match it unless a separator-free run is longer than
+    `max_buffer`.
+    """
+    metadata = _RECURSIVE_METADATA
+    if not separators or not separators[0]:
+        for chunk in stream_fixed_length_chunks(source, chunk_size, overlap=0):
+            yield Chunk(id=chunk.id, text=chunk.text, metadata=metadata, start=chunk.start)
+        return
+
+    # Like the in-memory chunker, a document that fits in one chunk is returned whole
+    blocks = iter_text(source)
+    head: List[str] = []
+    head_len = 0
+    for block in blocks:
+        head.append(block)
+        head_len += len(block)
+        if head_len > chunk_size:
+            break
+    else:
+        text = "".join(head)
+        yield Chunk(id=calculate_chunk_hash(text), text=text, metadata=metadata, start=0)
+        return
+
+    sep, rest = separators[0], separators[1:]
+    max_buffer = max(max_buffer, 2 * chunk_size)
+    parts: List[str] = []
+    cur_start = cur_len = 0
+
+    def flush() -> Iterator[Chunk]:
+        text = sep.join(parts)
+        for s, e in split_spans(text, 0, len(text), chunk_size, rest):
+            piece = text[s:e]
+            yield Chunk(id=calculate_chunk_hash(piece), text=piece, metadata=metadata, start=cur_start + s)
+
+    for offset, part in stream_parts(itertools.chain(head, blocks), sep, max_buffer):
+        if cur_len and cur_len + len(part) + len(sep) <= chunk_size:
+            parts.append(part)
+            cur_len += len(sep) + len(part)
+        else:
+            if cur_len:
+                yield from flush()
+            parts, cur_start, cur_len = [part], offset, len(part)
+    if cur_len:
+        yield from flush()
+
+def stream_semantic_chunks(source: TextSource, threshold: float = 0.5, max_buffer: int = 1 << 22) -> Iterator[Chunk]:
+    """Streaming `semantic_chunker`; a group of similar sentences is also closed once it reaches `max_buffer`."""
+    metadata = _SEMANTIC_METADATA
+    group: List[str] = []
+    group_start = group_len = 0
+    prev_words: Optional[set] = None
+
+    def close(final: bool) -> Chunk:
+        text = ". ".join(group) + ("" if final else ".")
+        return Chunk(id=calculate_chunk_hash(text), text=text, metadata=metadata, start=group_start)
+
+    for offset, sentence in stream_parts(source, ". ", max_buffer):
+        words = set(sentence.lower().split())
+        if prev_words is not None:
+            similarity = len(prev_words & words) / max(len(prev_words | words), 1)
+            if similarity < threshold or group_len >= max_buffer:
+                yield close(final=False)
+                group, group_len = [], 0
+        if not group:
+            group_start = offset
+        group.append(sentence)
+        group_len += len(sentence) + 2
+        prev_words = words
+    if group:
+        yield close(final=True)
+
+STREAMING_CHUNKERS = {
+    "fixed": stream_fixed_length_chunks,
+    "recursive": stream_recursive_chunks,
+    "semantic": stream_semantic_chunks,
+}
+
+def _chunk_file_to_jsonl(path: str, output_path: str, chunker: str, kwargs: Dict[str, Any]) -> int:
+    count = 0
+    tmp_path = output_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as out:
+        for chunk in STREAMING_CHUNKERS[chunker](path, **kwargs):
+            out.write(json.dumps({"id": chunk.id, "text": chunk.text, "doc": path, "start": chunk.start, "end": chunk.end}) + "\n")
+            count += 1
+    os.replace(tmp_path, output_path)
+    return count
+
+def chunk_directory(
+    input_dir: str,
+    output_dir: str,
+    chunker: str = "recursive",
+    pattern: str = "*.txt",
+    workers: Optional[int] = None,
+    executor: str = "process",
+    **kwargs,
+) -> Dict[str, int]:
+    """Chunks every matching document into `<output_dir>/<name>.chunks.jsonl`, one file per worker task.
+
+    Each document is streamed, so worker memory stays bounded whatever the
+    document size. Chunk ids use this process's chunk digest in every worker.
+    Returns the number of chunks written per document.
+    """
+    if chunker not in STREAMING_CHUNKERS:
+        raise ValueError(f"Unknown chunker '{chunker}', expected one of {tuple(STREAMING_CHUNKERS)}")
+    os.makedirs(output_dir, exist_ok=True)
+    paths = sorted(glob.glob(os.path.join(input_dir, pattern)))
+    outputs = [os.path.join(output_dir, os.path.basename(p) + ".chunks.jsonl") for p in paths]
+
+    # Spawned workers would hash with the md5 default, so hand them the digest
+    pool = make_executor(executor, workers, initializer=set_chunk_digest, initargs=(get_chunk_digest(),))
+    if pool is None:
+        counts = [_chunk_file_to_jsonl(p, o, chunker, kwargs) for p, o in zip(paths, outputs)]
+    else:
+        with pool:
+            counts = list(pool.map(_chunk_file_to_jsonl, paths, outputs, [chunker] * len(paths), [kwargs] * len(paths)))
+    return dict(zip(paths, counts))
@@ -0,0 +1,105 @@
+import warnings
+from collections import OrderedDict
+from typing import List, Optional
+import numpy as np
+from ..utils.hashing import calculate_chunk_hashes
+
+class HashingEncoder:
+    """Offline sentence encoder: L2-normalized hashed bag of words and word bigrams.
+
+    Needs no model download, so it suits tests and air-gapped ingestion;
+    similarities reflect shared vocabulary rather than meaning.
+    """
+
+    def __init__(self, n_features: int = 1 << 12):
+        from sklearn.feature_extraction.text import HashingVectorizer
+
+        self.model_name = f"hashing-{n_features}"
+        self.vectorizer = HashingVectorizer(n_features=n_features, ngram_range=(1, 2), alternate_sign=False, norm="l2")
+
+    def encode(self, sentences: List[str]) -> np.ndarray:
+        return self.vectorizer.transform(sentences).toarray().astype(np.float32)
+
+class TransformerEncoder:
+    """Mean-pooled, L2-normalized embeddings from a local transformer encoder.
+
+    Sentences are sorted by length before batching so each batch pads to
+    similar lengths, which matters most on CPU.
+    """
+
+    def __init__(self, model_name: str = "sentence-transformers/all-MiniLM-L6-v2", device: Optional[str] = None, batch_size: int = 64, max_length: int = 256):
+        import torch
+        from transformers import AutoModel, AutoTokenizer
+        from ..utils.torch_utils import get_torch_device
+
+        self._torch = torch
+        self.model_name = model_name
+        self.device = device or get_torch_device()
+        self.batch_size = batch_size
+        self.max_length = max_length
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+        self.model = AutoModel.from_pretrained(model_name).to(self.device)
+        self.model.eval()
+
+    def encode(self, sentences: List[str]) -> np.ndarray:
+        torch = self._torch
+        order = sorted(range(len(sentences)), key=lambda i: len(sentences[i]))
+        out = np.empty((len(sentences), self.model.config.hidden_size), dtype=np.float32)
+        for start in range(0, len(order), self.batch_size):
+            idx = order[start:start + self.batch_size]
+            inputs = self.tokenizer(
+                [sentences[i] for i in idx], padding=True, truncation=True, max_length=self.max_length, return_tensors="pt"
+            ).to(self.device)
+            with torch.inference_mode():
+                hidden = self.model(**inputs).last_hidden_state
+            mask = inputs["attention_mask"].unsqueeze(-1).to(hidden.dtype)
+            pooled = (hidden * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1e-9)
+            out[idx] = torch.nn.functional.normalize(pooled, dim=-1).float().cpu().numpy()
+        return out
+
+class CachedEncoder:
+    """Wraps an encoder with an LRU cache keyed by sentence hash; only misses are encoded, in one batch."""
+
+    def __init__(self, encoder, max_size: int = 100_000):
+        self.encoder = encoder
+        self.model_name = getattr(encoder, "model_name", type(encoder).__name__)
+        self.max_size = max_size
+        self._cache: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def encode(self, sentences: List[str]) -> np.ndarray:
+        keys = calculate_chunk_hashes(sentences)
+        missing = {}
+        for key, sentence in zip(keys, sentences):
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                self.hits += 1
+            elif key not in missing:
+                missing[key] = sentence
+        if missing:
+            self.misses += len(missing)
+            vectors = self.encoder.encode(list(missing.values()))
+            fresh = dict(zip(missing, vectors))
+        else:
+            fresh = {}
+        rows = [fresh[k] if k in fresh else self._cache[k] for k in keys]
+        for key, vector in fresh.items():
+            self._cache[key] = vector
+            if len(self._cache) > self.max_size:
+                self._cache.popitem(last=False)
+        return np.stack(rows) if rows else np.empty((0, 0), dtype=np.float32)
+
+_default_encoder: Optional[CachedEncoder] = None
+
+def default_encoder() -> CachedEncoder:
+    """Shared cached encoder: the local MiniLM model, or HashingEncoder when it can't be loaded."""
+    global _default_encoder
+    if _default_encoder is None:
+        try:
+            encoder = TransformerEncoder()
+        except (OSError, ImportError) as e:
+            warnings.warn(f"Falling back to HashingEncoder, sentence encoder unavailable: {e}")
+            encoder = HashingEncoder()
+        _default_encoder = CachedEncoder(encoder)
+    return _default_encoder
@@ -1,5 +1,77 @@
 import hashlib
+from typing import Callable, Iterable, List, Optional, Sequence
 
-def calculate_chunk_hash(text: str) -> str:
-    """Calculates a stable MD5 hash for a given text chunk."""
-    return hashlib.md5(text.encode("utf-8")).hexdigest()
+try:
+    import xxhash
+except ImportError: # optional; "xxh3" falls back to blake2b without it
+    xxhash = None
+
+# All digests give 32 hex characters, so ids keep one shape whichever is used.
+# md5 stays the default: ids already stored (value index, caches, result
+# files) were made with it.
+DIGESTS = ("md5", "blake2b", "xxh3", "fast")
+_chunk_digest = "md5"
+
+def _md5(data) -> str:
+    return hashlib.md5(data).hexdigest()
+
+def _blake2b(data) -> str:
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+def _hasher(digest: Optional[str]) -> Callable[..., str]:
+    """Bytes -> hex digest function for `digest` (default: the configured chunk digest)."""
+    digest = digest or _chunk_digest
+    if digest == "md5":
+        return _md5
+    if digest == "blake2b":
+        return _blake2b
+    if digest in ("xxh3", "fast"):
+        return xxhash.xxh3_128_hexdigest if xxhash is not None else _blake2b
+    raise ValueError(f"Unknown chunk digest '{digest}', expected one of {DIGESTS}")
+
+def set_chunk_digest(digest: str):
+    """Sets the digest used for chunk ids from now on.
+
+    "xxh3" needs the xxhash package and otherwise falls back to blake2b, as
+    does "fast"; ids then differ between machines with and without xxhash, so
+    pick "blake2b" when ids must match everywhere.
+    """
+    global _chunk_digest
+    _hasher(digest)
+    _chunk_digest = digest
+
+def get_chunk_digest() -> str:
+    return _chunk_digest
+
+def calculate_chunk_hash(text: str, digest: Optional[str] = None) -> str:
+    """Calculates a stable hash for a given text chunk (MD5 unless configured otherwise)."""
+    return _hasher(digest)(text.encode("utf-8"))
+
+def calculate_chunk_hashes(texts: Iterable[str], digest: Optional[str] = None) -> List[str]:
+    """`calculate_chunk_hash` for many texts, resolving the digest once."""
+    hexdigest = _hasher(digest)
+    return [hexdigest(t.encode("utf-8")) for t in texts]
+
+def calculate_span_hashes(buffer: str, starts: Sequence[int], ends: Sequence[int], digest: Optional[str] = None) -> List[str]:
+    """Hashes of buffer[s:e] for every span, equal to hashing each slice.
+
+    An ASCII buffer is encoded once and the spans are hashed as views into it,
+    so overlapping windows are neither sliced nor re-encoded.
+    """
+    hexdigest = _hasher(digest)
+    if buffer.isascii():
+        # One byte per character, so character offsets are byte offsets
+        data = memoryview(buffer.encode("ascii"))
+        return [hexdigest(data[s:e]) for s, e in zip(starts, ends)]
+    return [hexdigest(buffer[s:e].encode("utf-8")) for s, e in zip(starts, ends)]
+
+def chunk_hash_aliases(text: str) -> List[str]:
+    """Every id `text` may be stored under: the configured digest's, then the MD5 one."""
+    current = calculate_chunk_hash(text)
+    return [current] if _chunk_digest == "md5" else [current, _md5(text.encode("utf-8"))]
+
+def calculate_judge_key(query: str, context: str, answer: str, namespace: str = "") -> str:
+    """Calculates a stable hash for a (query, context, answer) judge input."""
+    # Unit separator keeps ("ab", "c") and ("a", "bc") from colliding. Always MD5,
+    # so persistent judge caches stay valid whatever the chunk digest.
+    return _md5("\x1f".join([namespace, query, context, answer]).encode("utf-8"))
@@ -1,7 +1,7 @@
 import json
 import csv
 import os
-from typing import List, Any
+from typing import Any, Iterator, Sequence, Tuple
 from ..dv.models.entities import ValuationResult
 
 def save_json(data: Any, filepath: str):
@@ -15,11 +15,15 @@ def load_json(filepath: str) -> Any:
     with open(filepath, "r", encoding="utf-8") as f:
         return json.load(f)
 
-def save_valuation_results_csv(results: List[ValuationResult], filepath: str):
+def save_valuation_results_csv(results: Sequence[ValuationResult], filepath: str):
     """Saves valuation results to a CSV file."""
     os.makedirs(os.path.dirname(filepath), exist_ok=True)
     if not results:
         return
+    if hasattr(results, "to_pandas"):
+        # Columnar results: one vectorized write instead of a dict per row
+        results.to_pandas().to_csv(filepath, index=False, date_format="%Y-%m-%dT%H:%M:%S.%f")
+        return
     
     keys = ["chunk_id", "method", "score", "timestamp"]
     with open(filepath, "w", newline="", encoding="utf-8") as f:
@@ -32,3 +36,26 @@ def save_valuation_results_csv(results: List[ValuationResult], filepath: str):
                 "score": res.score,
                 "timestamp": res.timestamp.isoformat()
             })
+
+def save_valuation_results(results: Sequence[ValuationResult], filepath: str):
+    """Saves valuation results as Parquet, Feather or CSV, chosen by file extension."""
+    from ..dv.models.results import ValuationResults
+
+    if filepath.endswith(".csv"):
+        save_valuation_results_csv(results, filepath)
+        return
+    if os.path.dirname(filepath):
+        os.makedirs(os.path.dirname(filepath), exist_ok=True)
+    results = ValuationResults.from_results(results)
+    if filepath.endswith(".feather"):
+        results.write_feather(filepath)
+    else:
+        results.write_parquet(filepath)
+
+def iter_jsonl(filepath: str, start: int = 0) -> Iterator[Tuple[int, Any]]:
+    """Lazily yields (line_number, record) from a JSONL file, skipping lines before `start` and blank lines."""
+    with open(filepath, "r", encoding="utf-8") as f:
+        for line_number, line in enumerate(f):
+            if line_number < start or not line.strip():
+                continue
+            yield line_number, json.loads(line)
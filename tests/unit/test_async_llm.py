@@ -0,0 +1,150 @@
+import asyncio
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+
+pytest.importorskip("openai")
+from src.dv.evaluation.async_llm import AsyncLLMJudge  # noqa: E402
+
+class StandInServer:
+    """Local stand-in for the chat completions endpoint.
+
+    Replies with the number of context words / 10, fails the first
+    `rate_limited` requests with HTTP 429, rejects contexts containing
+    `reject` at once with HTTP 400 and records peak concurrency.
+    """
+
+    def __init__(self, rate_limited: int = 0, reply: str = None, delay: float = 0.05, reject: str = None):
+        self.rate_limited = rate_limited
+        self.reply = reply
+        self.delay = delay
+        self.reject = reject
+        self.requests = 0
+        self.in_flight = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                context = re.search(r"Context: (.*)\n", body["messages"][0]["content"]).group(1)
+                if server.reject is not None and server.reject in context:
+                    data = json.dumps({"error": {"message": "bad request"}}).encode()
+                    self.send_response(400)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(data)))
+                    self.end_headers()
+                    self.wfile.write(data)
+                    return
+                with server.lock:
+                    server.requests += 1
+                    limited = server.requests <= server.rate_limited
+                    server.in_flight += 1
+                    server.peak = max(server.peak, server.in_flight)
+                time.sleep(server.delay)
+                with server.lock:
+                    server.in_flight -= 1
+
+                if limited:
+                    self.send_response(429)
+                    payload = {"error": {"message": "slow down"}}
+                else:
+                    content = server.reply if server.reply is not None else str(len(context.split()) / 10)
+                    self.send_response(200)
+                    payload = {
+                        "id": "x", "object": "chat.completion", "created": 0, "model": body["model"],
+                        "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": content}}],
+                    }
+                data = json.dumps(payload).encode()
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}/v1"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.httpd.shutdown()
+
+@pytest.fixture
+def server_factory():
+    servers = []
+    def make(**kwargs):
+        servers.append(StandInServer(**kwargs))
+        return servers[-1]
+    yield make
+    for s in servers:
+        s.close()
+
+def test_concurrency_limit_and_order(server_factory):
+    server = server_factory()
+    judge = AsyncLLMJudge(api_key="test", base_url=server.url, max_concurrency=4)
+    contexts = [" ".join(["w"] * k) for k in range(10)]
+
+    scores = judge.get_faithfulness_batch(["q"] * 10, contexts, ["a"] * 10)
+
+    assert scores == [k / 10 for k in range(10)]
+    assert server.peak <= 4
+    assert server.requests == 10
+
+def test_identical_prompts_are_coalesced(server_factory):
+    server = server_factory()
+    judge = AsyncLLMJudge(api_key="test", base_url=server.url)
+
+    scores = judge.get_faithfulness_batch(["q"] * 6, ["a b"] * 3 + ["c"] * 3, ["a"] * 6)
+
+    assert scores == [0.2] * 3 + [0.1] * 3
+    assert server.requests == 2
+    assert judge.coalesced == 4
+
+def test_rate_limit_errors_are_retried(server_factory):
+    server = server_factory(rate_limited=2)
+    judge = AsyncLLMJudge(api_key="test", base_url=server.url, max_concurrency=1, backoff_base=0.01)
+
+    assert judge.get_faithfulness("q", "a b c", "a") == pytest.approx(0.3)
+    assert judge.retries == 2
+
+def test_unparseable_reply_raises_or_falls_back(server_factory):
+    server = server_factory(reply="I cannot tell.")
+    judge = AsyncLLMJudge(api_key="test", base_url=server.url, max_retries=1, backoff_base=0.01)
+    with pytest.raises(ValueError):
+        judge.get_faithfulness("q", "ctx", "a")
+
+    judge = AsyncLLMJudge(api_key="test", base_url=server.url, max_retries=1, backoff_base=0.01, fallback_score=0.5)
+    assert judge.get_faithfulness("q", "ctx", "a") == 0.5
+
+def test_token_bucket_limits_rate(server_factory):
+    server = server_factory(delay=0.0)
+    judge = AsyncLLMJudge(api_key="test", base_url=server.url, requests_per_second=20)
+    start = time.monotonic()
+    judge.get_faithfulness_batch(["q"] * 30, [f"c{i}" for i in range(30)], ["a"] * 30)
+    # 20-request burst, then 10 more at 20/s
+    assert time.monotonic() - start >= 0.4
+
+def test_failed_batch_does_not_break_requests_others_joined(server_factory):
+    import openai
+    server = server_factory(delay=0.3, reject="bad")
+    judge = AsyncLLMJudge(api_key="test", base_url=server.url)
+
+    async def both():
+        failing = judge.aget_faithfulness_batch(["q", "q"], ["bad", "shared words"], ["a", "a"])
+        joining = judge.aget_faithfulness_batch(["q"], ["shared words"], ["a"])
+        try:
+            return await asyncio.gather(failing, joining, return_exceptions=True)
+        finally:
+            await judge.aclose()
+
+    failed, joined = asyncio.run(both())
+    # The first batch fails fast with the real error; the shared request still completes
+    assert isinstance(failed, openai.BadRequestError)
+    assert joined == [0.2]
+    assert judge.coalesced == 1
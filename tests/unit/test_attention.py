@@ -0,0 +1,30 @@
+from typing import Any, Dict, List, Optional, Tuple
+from src.dv.algorithms.attention import AttentionValuator
+from src.dv.interfaces import Signaler
+from src.dv.models.entities import Chunk, ValuationMethod
+
+class SpanRecordingSignaler(Signaler):
+    """Scores each chunk by the length of the text found at its span."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def get_signals(self, query: str, context: str, answer: str, chunk_spans: Optional[List[Tuple[int, int]]] = None) -> Dict[str, Any]:
+        self.calls += 1
+        self.texts = [context[start:end] for start, end in chunk_spans]
+        return {"chunk_scores": [len(t) / len(context) for t in self.texts]}
+
+def test_attention_valuator_maps_spans_to_chunks():
+    chunks = [
+        Chunk(id="c1", text="Paris is the capital of France."),
+        Chunk(id="c2", text="France is a country in Europe."),
+        Chunk(id="c3", text="Unrelated."),
+    ]
+    signaler = SpanRecordingSignaler()
+    results = AttentionValuator(signaler).evaluate("q", chunks, "a")
+
+    assert signaler.calls == 1
+    assert signaler.texts == [c.text for c in chunks]
+    assert [r.chunk_id for r in results] == ["c1", "c2", "c3"]
+    assert all(r.method == ValuationMethod.ATTENTION for r in results)
+    assert results[0].score > results[2].score
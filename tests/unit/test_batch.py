@@ -0,0 +1,112 @@
+import json
+import pytest
+from src.dv.algorithms.loo import LOOValuator
+from src.dv.cli.batch import ParquetResultWriter, run_batch
+from src.dv.core import ValuationSuite
+from src.dv.interfaces import Judge
+from src.dv.models.entities import Chunk, ValuationMethod
+from src.dv.models.results import ValuationResults
+
+class FlakyJudge(Judge):
+    """Word-count judge that fails on answers listed in `fail_on`."""
+
+    def __init__(self, fail_on=()):
+        self.fail_on = set(fail_on)
+
+    def get_faithfulness(self, query: str, context: str, answer: str) -> float:
+        if answer in self.fail_on:
+            raise RuntimeError("judge crashed")
+        return min(1.0, len(context.split()) / 20.0)
+
+def write_records(path, n):
+    with open(path, "w") as f:
+        for i in range(n):
+            f.write(json.dumps({"id": f"r{i}", "query": "q", "answer": f"a{i}", "chunks": ["one two", {"id": "c2", "text": "three"}]}) + "\n")
+
+def read_jsonl(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+def test_batch_writes_one_line_per_record(tmp_path):
+    input_path, output_path = tmp_path / "in.jsonl", tmp_path / "out.jsonl"
+    write_records(input_path, 3)
+
+    processed = run_batch(str(input_path), str(output_path), ValuationSuite({"loo": LOOValuator(FlakyJudge())}))
+
+    lines = read_jsonl(output_path)
+    assert processed == 3
+    assert [line["record_id"] for line in lines] == ["r0", "r1", "r2"]
+    assert [r["chunk_id"] for r in lines[0]["results"]][1] == "c2"
+
+def test_batch_resumes_after_crash(tmp_path):
+    input_path, output_path = tmp_path / "in.jsonl", tmp_path / "out.jsonl"
+    write_records(input_path, 4)
+
+    with pytest.raises(RuntimeError):
+        run_batch(str(input_path), str(output_path), ValuationSuite({"loo": LOOValuator(FlakyJudge(fail_on={"a2"}))}))
+    # Simulate a torn write from the crash
+    with open(output_path, "a") as f:
+        f.write('{"record": 2, "rec')
+
+    processed = run_batch(str(input_path), str(output_path), ValuationSuite({"loo": LOOValuator(FlakyJudge())}))
+
+    assert processed == 2
+    assert [line["record"] for line in read_jsonl(output_path)] == [0, 1, 2, 3]
+
+def test_batch_parquet_parts_resume(tmp_path):
+    pd = pytest.importorskip("pandas")
+    pytest.importorskip("pyarrow")
+    input_path, output_path = tmp_path / "in.jsonl", tmp_path / "out.parquet"
+    write_records(input_path, 5)
+    suite = ValuationSuite({"loo": LOOValuator(FlakyJudge())})
+
+    run_batch(str(input_path), str(output_path), suite, flush_every=2)
+    assert run_batch(str(input_path), str(output_path), suite, flush_every=2) == 0
+
+    df = pd.read_parquet(output_path)
+    assert sorted(df["record"].unique()) == [0, 1, 2, 3, 4]
+
+class CountingJudge(FlakyJudge):
+    def __init__(self):
+        super().__init__()
+        self.calls = 0
+
+    def get_faithfulness(self, query: str, context: str, answer: str) -> float:
+        self.calls += 1
+        return super().get_faithfulness(query, context, answer)
+
+def test_batch_revalues_reasks_incrementally(tmp_path):
+    input_path = tmp_path / "in.jsonl"
+    with open(input_path, "w") as f:
+        for chunks in (["one two", "three", "four"], ["one two", "three", "four"], ["one two", "three", "five six"]):
+            f.write(json.dumps({"query": "q", "answer": "a", "chunks": chunks}) + "\n")
+
+    outputs = []
+    for incremental in (0, 4):
+        judge = CountingJudge()
+        output_path = tmp_path / f"out{incremental}.jsonl"
+        run_batch(str(input_path), str(output_path), ValuationSuite({"loo": LOOValuator(judge)}), incremental=incremental)
+        outputs.append((judge.calls, read_jsonl(output_path)))
+
+    (full_calls, full), (incremental_calls, incremental) = outputs
+    assert incremental_calls < full_calls
+    assert [[round(r["score"], 12) for r in line["results"]] for line in incremental] == [[round(r["score"], 12) for r in line["results"]] for line in full]
+
+def test_parquet_writer_adds_to_value_index_only_when_flushed(tmp_path):
+    pytest.importorskip("pyarrow")
+    from src.dv.evaluation.value_index import ChunkValueIndex
+    chunks = [Chunk(id="c1", text="one two")]
+    results = ValuationResults.from_scores(["c1"], ValuationMethod.LOO, [0.5])
+    index = ChunkValueIndex()
+
+    writer = ParquetResultWriter(str(tmp_path / "out.parquet"), flush_every=2, index=index)
+    for i in range(3):
+        writer.write(i, f"r{i}", results, chunks)
+    # Killed before record 2 was flushed: a resumed run values it again
+    assert index.lookup_chunks(chunks)["c1"].count == 2
+
+    resumed = ParquetResultWriter(str(tmp_path / "out.parquet"), flush_every=2, index=index)
+    assert resumed.next_record == 2
+    resumed.write(2, "r2", results, chunks)
+    resumed.close()
+    assert index.lookup_chunks(chunks)["c1"].count == 3
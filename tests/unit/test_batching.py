@@ -0,0 +1,49 @@
+from typing import List
+from src.dv.algorithms.loo import LOOValuator
+from src.dv.algorithms.shapley import ShapleyValuator
+from src.dv.interfaces import Judge
+from src.dv.models.entities import Chunk
+
+class BatchRecordingJudge(Judge):
+    def __init__(self):
+        self.batch_sizes = []
+        self.single_calls = 0
+
+    def get_faithfulness(self, query: str, context: str, answer: str) -> float:
+        self.single_calls += 1
+        return min(1.0, len(context.split()) / 20.0)
+
+    def get_faithfulness_batch(self, queries: List[str], contexts: List[str], answers: List[str]) -> List[float]:
+        self.batch_sizes.append(len(contexts))
+        return [min(1.0, len(c.split()) / 20.0) for c in contexts]
+
+CHUNKS = [
+    Chunk(id="c1", text="Paris is the capital of France."),
+    Chunk(id="c2", text="France is a country in Europe."),
+    Chunk(id="c3", text="Random unrelated text here."),
+]
+
+def test_default_batch_matches_single_calls():
+    judge = BatchRecordingJudge()
+    contexts = ["", "a b", "a b c d"]
+    assert Judge.get_faithfulness_batch(judge, ["q"] * 3, contexts, ["a"] * 3) == [
+        judge.get_faithfulness("q", c, "a") for c in contexts
+    ]
+
+def test_loo_scores_all_coalitions_in_one_batch():
+    judge = BatchRecordingJudge()
+    LOOValuator(judge).evaluate("q", CHUNKS, "a")
+    assert judge.batch_sizes == [len(CHUNKS) + 1]
+    assert judge.single_calls == 0
+
+def test_shapley_exact_and_mc_batch_coalitions():
+    judge = BatchRecordingJudge()
+    ShapleyValuator(judge).evaluate("q", CHUNKS, "a")
+    assert judge.batch_sizes == [2 ** len(CHUNKS)]
+
+    judge = BatchRecordingJudge()
+    valuator = ShapleyValuator(judge, mc_samples=4, seed=0)
+    valuator._evaluate_mc("q", CHUNKS, "a")
+    assert len(judge.batch_sizes) == 2 # empty/full contexts, then one round of prefixes
+    assert sum(judge.batch_sizes) == valuator.last_run_stats["judge_calls"]
+    assert judge.single_calls == 0
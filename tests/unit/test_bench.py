@@ -0,0 +1,25 @@
+import json
+from src.dv.bench import SyntheticJudge, make_chunks, make_vocabulary, run_benchmark
+
+def test_synthetic_judge_is_deterministic_across_paths():
+    values = make_vocabulary(seed=1)
+    chunks = make_chunks(4, list(values), seed=1)
+    texts = [c.text for c in chunks]
+    judge = SyntheticJudge(values, noise=0.05, seed=1)
+    coalitions = [(0, 1), (2,), (0, 1, 2, 3)]
+    scores = judge.get_faithfulness_coalitions("q", texts, coalitions, "a")
+    joined = [" ".join(texts[i] for i in c) for c in coalitions]
+    assert scores == judge.get_faithfulness_batch(["q"] * 3, joined, ["a"] * 3)
+    assert judge.calls == 6 and judge.batches == 2
+
+def test_benchmark_report_rows_and_accuracy():
+    report = run_benchmark(chunk_counts=[3, 6], noise=0.0, proxy_warmup=2, reference_samples=20, exact_max_chunks=4)
+    json.dumps(report)
+    rows = {(r["method"], r["n_chunks"]): r for r in report["results"]}
+    # Exact Shapley is skipped above the limit; the reference switches to sampling
+    assert ("shapley-exact", 6) not in rows
+    assert rows[("loo", 6)]["reference"] == "permutation-20"
+    exact = rows[("shapley-exact", 3)]
+    assert exact["judge_calls"] == 8 and exact["mae"] < 1e-12 and exact["kendall_tau"] > 0.99
+    assert rows[("loo", 3)]["judge_calls"] == 4
+    assert all(r["wall_time_s"] >= 0 and r["peak_memory_bytes"] > 0 for r in report["results"])
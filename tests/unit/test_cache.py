@@ -0,0 +1,87 @@
+from src.dv.evaluation.cache import CachedJudge
+from src.dv.interfaces import Judge
+
+class CountingJudge(Judge):
+    def __init__(self):
+        self.calls = 0
+
+    def get_faithfulness(self, query: str, context: str, answer: str) -> float:
+        self.calls += 1
+        return min(1.0, len(context.split()) / 20.0)
+
+def test_cached_judge_memory_hits():
+    inner = CountingJudge()
+    judge = CachedJudge(inner)
+
+    first = judge.get_faithfulness("q", "Paris is in France.", "a")
+    second = judge.get_faithfulness("q", "Paris is in France.", "a")
+
+    assert first == second
+    assert inner.calls == 1
+    assert judge.stats["hits"] == 1
+    assert judge.stats["misses"] == 1
+
+def test_cached_judge_batch_dedupes_misses():
+    inner = CountingJudge()
+    judge = CachedJudge(inner)
+    judge.get_faithfulness("q", "a b", "a")
+
+    scores = judge.get_faithfulness_batch(["q"] * 4, ["a b", "c", "c", ""], ["a"] * 4)
+
+    assert scores == [0.1, 0.05, 0.05, 0.0]
+    assert inner.calls == 3 # "a b" once up front, then "c" and "" once each
+
+def test_cached_judge_lru_eviction():
+    inner = CountingJudge()
+    judge = CachedJudge(inner, max_size=2)
+    for ctx in ["a", "b", "c", "a"]:
+        judge.get_faithfulness("q", ctx, "x")
+    assert inner.calls == 4
+
+def test_cached_judge_persists_to_sqlite(tmp_path):
+    db_path = str(tmp_path / "cache" / "scores.sqlite")
+    first = CachedJudge(CountingJudge(), db_path=db_path)
+    first.get_faithfulness("q", "some context", "a")
+    first.close()
+
+    inner = CountingJudge()
+    second = CachedJudge(inner, db_path=db_path)
+    assert second.get_faithfulness("q", "some context", "a") == 0.1
+    assert inner.calls == 0
+    assert second.stats["disk_hits"] == 1
+    second.close()
+
+class ChunkAwareJudge(CountingJudge):
+    """Scores a coalition by its chunk count, and records the coalitions it sees."""
+
+    def __init__(self):
+        super().__init__()
+        self.seen = []
+
+    def get_faithfulness_coalitions(self, query, chunk_texts, coalitions, answer):
+        self.seen.extend(coalitions)
+        return [len(c) / len(chunk_texts) for c in coalitions]
+
+def test_cached_judge_passes_coalitions_through():
+    inner = ChunkAwareJudge()
+    judge = CachedJudge(inner)
+    texts = ["a", "b", "c", "d"]
+
+    first = judge.get_faithfulness_coalitions("q", texts, [(0, 1), (2,), (0, 1)], "x")
+    second = judge.get_faithfulness_coalitions("q", texts, [(0, 1), (1, 2, 3)], "x")
+
+    assert first == [0.5, 0.25, 0.5]
+    assert second == [0.5, 0.75]
+    assert inner.seen == [(0, 1), (2,), (1, 2, 3)] # chunk indices reach the judge, misses only
+    assert inner.calls == 0
+
+def test_cached_judge_keeps_coalition_and_context_scores_apart():
+    inner = ChunkAwareJudge()
+    judge = CachedJudge(inner)
+
+    assert judge.get_faithfulness_coalitions("q", ["a", "b"], [(0, 1)], "x") == [1.0]
+    # Same joined text, but the plain context scores 2 words / 20
+    assert judge.get_faithfulness("q", "a b", "x") == 0.1
+    assert judge.get_faithfulness_batch(["q"], ["a b"], ["x"]) == [0.1]
+    assert judge.get_faithfulness_coalitions("q", ["a", "b"], [(0, 1)], "x") == [1.0]
+    assert inner.calls == 1 and inner.seen == [(0, 1)]
@@ -0,0 +1,49 @@
+import pickle
+from dataclasses import FrozenInstanceError
+import pytest
+from src.dv.models.collection import ChunkCollection
+from src.dv.models.entities import Chunk, Document
+from src.rag.chunking.simple import fixed_length_chunker
+from src.utils.hashing import calculate_chunk_hash
+
+def test_span_chunk_slices_shared_document():
+    doc = Document("d", "Paris is the capital of France.")
+    chunk = Chunk.from_span(doc, 0, 5)
+
+    assert chunk.text == "Paris"
+    assert chunk.id == calculate_chunk_hash("Paris")
+    assert chunk == Chunk(id=chunk.id, text="Paris")
+    assert pickle.loads(pickle.dumps(chunk)) == chunk
+    with pytest.raises(FrozenInstanceError):
+        chunk.id = "other"
+
+def test_fixed_length_chunker_matches_plain_slicing():
+    text = "".join(chr(97 + i % 26) for i in range(250))
+    chunks = fixed_length_chunker(text, chunk_size=100, overlap=20)
+
+    assert [c.text for c in chunks] == [text[0:100], text[80:180], text[160:250]]
+    assert {id(c.source) for c in chunks} == {id(chunks[0].source)}
+
+def test_collection_bulk_operations():
+    first = fixed_length_chunker("a" * 50 + "b" * 50, chunk_size=40, overlap=10, as_collection=True)
+    second = fixed_length_chunker("c" * 30, chunk_size=40, overlap=10, as_collection=True)
+    both = ChunkCollection.concat([first, second, first])
+
+    assert len(both.documents) == 2
+    assert len(both) == 2 * len(first) + 1
+    short = both.filter(both.lengths < 40)
+    assert [c.text for c in short] == [t for t in both.texts() if len(t) < 40] == ["c" * 30]
+    assert short.ids == [calculate_chunk_hash(t) for t in short.texts()]
+
+def test_chunks_of_one_call_cannot_change_each_others_metadata():
+    from src.rag.chunking.recursive import recursive_chunker
+    chunks = recursive_chunker("Paris is the capital of France. " * 10, chunk_size=40)
+    with pytest.raises(TypeError):
+        chunks[0].metadata["score"] = 1
+    assert all(c.metadata == {"type": "recursive"} for c in chunks)
+
+    collection = fixed_length_chunker("ab" * 50, chunk_size=10, overlap=0, as_collection=True)
+    copy = pickle.loads(pickle.dumps(collection))
+    assert list(copy) == list(collection)
+    with pytest.raises(TypeError):
+        copy[0].metadata["score"] = 1
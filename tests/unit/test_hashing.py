@@ -0,0 +1,49 @@
+import hashlib
+import pytest
+from src.dv.evaluation.value_index import ChunkValueIndex
+from src.dv.models.collection import ChunkCollection
+from src.dv.models.entities import Chunk, Document, ValuationMethod
+from src.dv.models.results import ValuationResults
+from src.utils import hashing
+from src.utils.hashing import calculate_chunk_hash, calculate_chunk_hashes, calculate_span_hashes, set_chunk_digest
+
+@pytest.fixture
+def restore_digest():
+    yield
+    set_chunk_digest("md5")
+
+def test_bulk_hashes_match_single_hashes():
+    texts = ["Paris", "", "Zürich ist schön", "a" * 1000]
+    assert calculate_chunk_hash("Paris") == hashlib.md5(b"Paris").hexdigest()
+    for digest in hashing.DIGESTS:
+        single = [calculate_chunk_hash(t, digest) for t in texts]
+        assert calculate_chunk_hashes(texts, digest) == single
+        assert all(len(h) == 32 for h in single)
+        for buffer in ("".join(texts[::3]), "".join(texts)):
+            spans = [(0, 5), (3, 12), (5, len(buffer)), (7, 7)]
+            assert calculate_span_hashes(buffer, *zip(*spans), digest=digest) == [calculate_chunk_hash(buffer[s:e], digest) for s, e in spans]
+    with pytest.raises(ValueError):
+        set_chunk_digest("sha7")
+
+def test_collection_ids_follow_configured_digest(restore_digest):
+    first, second = Document("a", "Paris is the capital of France."), Document("b", "Berlin ist die Hauptstadt.")
+    collection = ChunkCollection([first, second], [1, 0, 1, 0], [0, 0, 7, 10], [6, 5, 25, 31])
+    assert collection.ids == [calculate_chunk_hash(t) for t in collection.texts()]
+
+    set_chunk_digest("blake2b")
+    fresh = ChunkCollection(collection.documents, collection.doc_index, collection.starts, collection.ends)
+    assert fresh.ids == [calculate_chunk_hash(t, "blake2b") for t in fresh.texts()]
+    assert [c.id for c in fresh] == fresh.ids
+
+def test_value_index_resolves_md5_rows_after_digest_change(restore_digest):
+    chunks = [Chunk(id="old", text="chunk text")]
+    index = ChunkValueIndex()
+    index.update(chunks, ValuationResults.from_scores(["old"], ValuationMethod.LOO, [-0.5]))
+
+    set_chunk_digest("fast")
+    renamed = [Chunk(id=calculate_chunk_hash("chunk text"), text="chunk text")]
+    assert index.lookup_chunks(renamed)[renamed[0].id].mean == -0.5
+    index.update(renamed, ValuationResults.from_scores([renamed[0].id], ValuationMethod.LOO, [0.5]))
+    # New scores go under the new id; lookups prefer it
+    assert len(index) == 2
+    assert index.lookup_chunks(renamed)[renamed[0].id].mean == 0.5
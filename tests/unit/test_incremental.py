@@ -0,0 +1,131 @@
+from src.dv.algorithms.loo import LOOValuator
+from src.dv.algorithms.shapley import ShapleyValuator
+from src.dv.core import ValuationSuite
+from src.dv.interfaces import Judge
+from src.dv.models.entities import Chunk
+
+class KeywordJudge(Judge):
+    """Additive judge: each listed word in the context adds its weight."""
+
+    def __init__(self, weights):
+        self.weights = weights
+        self.calls = 0
+
+    def get_faithfulness(self, query: str, context: str, answer: str) -> float:
+        self.calls += 1
+        return sum(self.weights.get(word, 0.0) for word in context.split())
+
+class ContainsJudge(Judge):
+    """1.0 when the context mentions the word at all, so duplicate chunks are redundant."""
+
+    def __init__(self, word):
+        self.word = word
+        self.calls = 0
+
+    def get_faithfulness(self, query: str, context: str, answer: str) -> float:
+        self.calls += 1
+        return float(self.word in context.split())
+
+def make_chunks(names):
+    return [Chunk(id=name, text=name) for name in names]
+
+def scores(run):
+    return {r.chunk_id: r.score for r in run.valuation_reports}
+
+def test_loo_revaluation_cost_follows_the_change():
+    weights = {"w3": 0.5, "w20": -0.2, "new": 0.3}
+    old = make_chunks([f"w{i}" for i in range(32)])
+    new = old[:10] + old[11:] + make_chunks(["new"])
+    judge = KeywordJudge(weights)
+    suite = ValuationSuite({"loo": LOOValuator(judge, hierarchical=True, tolerance=1e-9)})
+    run = suite.evaluate_run("q", old, "a")
+
+    calls = judge.calls
+    rerun = suite.evaluate_run("q", new, "a", previous=run)
+    assert judge.calls - calls < 8
+    fresh = scores(ValuationSuite({"loo": LOOValuator(KeywordJudge(weights))}).evaluate_run("q", new, "a"))
+    assert all(abs(scores(rerun)[k] - v) < 1e-12 for k, v in fresh.items())
+
+    # Re-asking with the same chunks costs nothing
+    calls = judge.calls
+    assert scores(suite.evaluate_run("q", new, "a", previous=rerun)) == scores(rerun)
+    assert judge.calls == calls
+
+def test_loo_revaluation_catches_redundant_additions():
+    old = make_chunks(["paris", "x1", "x2", "x3"])
+    suite = ValuationSuite({"loo": LOOValuator(ContainsJudge("paris"))})
+    run = suite.evaluate_run("q", old, "a")
+    assert scores(run)["paris"] == 1.0
+
+    # A second chunk with the answer makes the first one redundant
+    rerun = suite.evaluate_run("q", old + [Chunk(id="paris2", text="paris")], "a", previous=run)
+    assert scores(rerun) == {"paris": 0.0, "x1": 0.0, "x2": 0.0, "x3": 0.0, "paris2": 0.0}
+
+class InteractionJudge(Judge):
+    """"a" helps and "b" hurts, but only next to "d"."""
+
+    def get_faithfulness(self, query: str, context: str, answer: str) -> float:
+        words = set(context.split())
+        return float({"a", "d"} <= words) - float({"b", "d"} <= words)
+
+def test_plain_loo_revaluation_stays_exact():
+    suite = ValuationSuite({"loo": LOOValuator(InteractionJudge())})
+    run = suite.evaluate_run("q", make_chunks(["a", "b", "c"]), "a")
+    assert scores(run) == {"a": 0.0, "b": 0.0, "c": 0.0}
+
+    # The {a, b} group change cancels out, which group testing would take as "unchanged"
+    rerun = suite.evaluate_run("q", make_chunks(["a", "b", "d"]), "a", previous=run)
+    assert scores(rerun) == {"a": 1.0, "b": -1.0, "d": 0.0}
+
+def test_exact_shapley_reuses_unchanged_coalitions():
+    weights = {"w0": 0.4, "w2": 0.1, "new": 0.2}
+    old = make_chunks(["w0", "w1", "w2", "w3"])
+    new = old + make_chunks(["new"])
+    judge = KeywordJudge(weights)
+    suite = ValuationSuite({"shapley": ShapleyValuator(judge, estimator="exact")})
+    run = suite.evaluate_run("q", old, "a")
+    rerun = suite.evaluate_run("q", new, "a", previous=run)
+    assert suite.valuators["shapley"].last_run_stats == {"judge_calls": 2 ** 5 - 2 ** 4, "reused": 2 ** 4}
+    fresh = ValuationSuite({"shapley": ShapleyValuator(KeywordJudge(weights), estimator="exact")}).evaluate_run("q", new, "a")
+    assert all(abs(scores(rerun)[k] - v) < 1e-12 for k, v in scores(fresh).items())
+
+def test_mc_shapley_carries_permutations_over():
+    old = make_chunks([f"w{i}" for i in range(6)])
+    new = old[1:] + make_chunks(["new"])
+    valuator = ShapleyValuator(KeywordJudge({"w2": 1.0}), estimator="permutation", mc_samples=20, seed=0)
+    suite = ValuationSuite({"shapley": valuator})
+    run = suite.evaluate_run("q", old, "a")
+    assert len(run.valuation_state["shapley"]["permutations"]) == 20
+
+    rerun = suite.evaluate_run("q", new, "a", previous=run)
+    assert valuator.last_run_stats["reused"] > 0
+    assert {frozenset(p) for p in rerun.valuation_state["shapley"]["permutations"]} == {frozenset(c.id for c in new)}
+    assert abs(scores(rerun)["w2"] - 1.0) < 1e-9
+
+def test_previous_run_for_another_query_is_ignored():
+    judge = KeywordJudge({"w0": 1.0})
+    suite = ValuationSuite({"loo": LOOValuator(judge)})
+    chunks = make_chunks(["w0", "w1"])
+    run = suite.evaluate_run("q", chunks, "a")
+    calls = judge.calls
+    suite.evaluate_run("other", chunks, "a", previous=run)
+    assert judge.calls - calls == 3
+
+def test_valuators_with_different_judges_keep_their_own_coalition_scores():
+    old = make_chunks(["w0", "w1", "w2"])
+    new = old + make_chunks(["w3"])
+
+    def suite():
+        return ValuationSuite({
+            "loo": LOOValuator(KeywordJudge({"w0": 1.0, "w3": 0.5})),
+            "shapley": ShapleyValuator(KeywordJudge({"w1": 2.0}), estimator="exact"),
+        })
+
+    incremental = suite()
+    run = incremental.evaluate_run("q", old, "a")
+    assert set(run.coalition_scores) == {"loo", "shapley"}
+    rerun = incremental.evaluate_run("q", new, "a", previous=run)
+    fresh = suite().evaluate_run("q", new, "a")
+    assert rerun.coalition_scores["loo"][("w0", "w1", "w2", "w3")] == 1.5
+    assert rerun.coalition_scores["shapley"][("w0", "w1", "w2", "w3")] == 2.0
+    assert all(abs(scores(rerun)[k] - v) < 1e-12 for k, v in scores(fresh).items())
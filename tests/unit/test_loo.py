@@ -0,0 +1,48 @@
+from src.dv.algorithms.loo import LOOValuator
+from src.dv.interfaces import Judge
+from src.dv.models.entities import Chunk
+
+class KeywordJudge(Judge):
+    """Additive judge: each listed word in the context adds its weight."""
+
+    def __init__(self, weights):
+        self.weights = weights
+        self.calls = 0
+
+    def get_faithfulness(self, query: str, context: str, answer: str) -> float:
+        self.calls += 1
+        return sum(self.weights.get(word, 0.0) for word in context.split())
+
+def make_chunks(n):
+    return [Chunk(id=f"c{i}", text=f"w{i}") for i in range(n)]
+
+def test_hierarchical_matches_flat_on_influential_chunks():
+    n = 64
+    weights = {"w5": 0.4, "w40": -0.3}
+    chunks = make_chunks(n)
+    flat = {r.chunk_id: r.score for r in LOOValuator(KeywordJudge(weights)).evaluate("q", chunks, "a")}
+
+    judge = KeywordJudge(weights)
+    valuator = LOOValuator(judge, hierarchical=True, tolerance=1e-6)
+    hier = {r.chunk_id: r.score for r in valuator.evaluate("q", chunks, "a")}
+
+    assert hier == flat
+    assert judge.calls < n // 2
+    assert valuator.last_run_stats["exact"] < n
+    assert valuator.last_group_deltas["c5"] == 0.0
+
+def test_hierarchical_handles_small_inputs():
+    judge = KeywordJudge({"w0": 1.0})
+    assert [r.score for r in LOOValuator(judge, hierarchical=True).evaluate("q", make_chunks(1), "a")] == [1.0]
+    assert LOOValuator(judge, hierarchical=True).evaluate("q", [], "a") == []
+
+def test_hierarchical_cancelling_chunks_need_min_depth():
+    # c0 and c1 cancel, so every group holding both looks unimportant
+    weights = {"w0": 0.5, "w1": -0.5}
+    chunks = make_chunks(8)
+    coarse = LOOValuator(KeywordJudge(weights), hierarchical=True)
+    assert all(r.score == 0.0 for r in coarse.evaluate("q", chunks, "a"))
+    assert coarse.last_group_deltas["c0"] == 0.0 # a heuristic, not a bound
+
+    deep = LOOValuator(KeywordJudge(weights), hierarchical=True, min_depth=3)
+    assert {r.chunk_id: r.score for r in deep.evaluate("q", chunks, "a")} == {r.chunk_id: r.score for r in LOOValuator(KeywordJudge(weights)).evaluate("q", chunks, "a")}
@@ -0,0 +1,91 @@
+import os
+import random
+import time
+from src.dv.algorithms.loo import LOOValuator
+from src.dv.algorithms.shapley import ShapleyValuator
+from src.dv.core import ValuationSuite
+from src.dv.evaluation.cache import CachedJudge
+from src.dv.interfaces import Judge
+from src.dv.models.entities import Chunk
+from src.dv.parallel import ParallelJudge
+
+class PidJudge(Judge):
+    """Word-count judge that remembers which process built it."""
+
+    def __init__(self):
+        self.pid = os.getpid()
+
+    def get_faithfulness(self, query: str, context: str, answer: str) -> float:
+        return min(1.0, len(context.split()) / 20.0)
+
+CHUNKS = [Chunk(id=f"c{i}", text=" ".join(["w"] * (i + 1))) for i in range(12)]
+
+def test_parallel_judge_preserves_order():
+    contexts = [" ".join(["w"] * k) for k in range(30)]
+    expected = PidJudge().get_faithfulness_batch(["q"] * 30, contexts, ["a"] * 30)
+    for executor in ["serial", "thread", "process"]:
+        judge = ParallelJudge(PidJudge, executor=executor, max_workers=3)
+        assert judge.get_faithfulness_batch(["q"] * 30, contexts, ["a"] * 30) == expected
+        judge.close()
+
+def test_suite_executors_agree():
+    def run(executor):
+        judge = ParallelJudge(PidJudge, executor="thread", max_workers=2)
+        suite = ValuationSuite(
+            {"loo": LOOValuator(judge), "shapley": ShapleyValuator(judge, mc_samples=6)},
+            executor=executor,
+            max_workers=2,
+            seed=7,
+        )
+        scores = [(r.chunk_id, r.method, r.score) for r in suite.evaluate_all("q", CHUNKS, "a")]
+        suite.close()
+        judge.close()
+        return scores
+
+    assert run("serial") == run("thread")
+
+def test_suite_seeds_sampling_valuators():
+    judge = PidJudge()
+    suite = ValuationSuite({"a": ShapleyValuator(judge), "b": ShapleyValuator(judge), "c": ShapleyValuator(judge, seed=1)}, seed=0)
+    seeds = [v.seed for v in suite.valuators.values()]
+    assert seeds[0] is not None and seeds[0] != seeds[1]
+    assert seeds[2] == 1
+
+class SeedJudge(Judge):
+    """Scores every input with one random draw taken when the judge is built, after worker seeding."""
+
+    def __init__(self):
+        self.draw = random.random()
+
+    def get_faithfulness_batch(self, queries, contexts, answers):
+        time.sleep(0.05) # keeps one worker from taking every shard
+        return [self.draw] * len(contexts)
+
+    def get_faithfulness(self, query: str, context: str, answer: str) -> float:
+        return self.draw
+
+def test_process_workers_get_distinct_seeds():
+    judge = ParallelJudge(SeedJudge, executor="process", max_workers=2, seed=3)
+    draws = set(judge.get_faithfulness_batch(["q"] * 8, ["c"] * 8, ["a"] * 8))
+    judge.close()
+    random.seed(3)
+    first = random.random()
+    random.seed(4)
+    assert draws == {first, random.random()}
+
+def cached_valuators():
+    judge = CachedJudge(PidJudge())
+    return {"loo": LOOValuator(judge), "shapley": ShapleyValuator(judge, mc_samples=6)}
+
+def test_process_suite_builds_valuators_in_workers():
+    # CachedJudge holds a SQLite connection and a lock, so it can't be pickled per job
+    serial = ValuationSuite(cached_valuators(), seed=7)
+    suite = ValuationSuite(cached_valuators(), executor="process", max_workers=2, seed=7, factory=cached_valuators)
+    expected = [(r.chunk_id, r.method, r.score) for r in serial.evaluate_all("q", CHUNKS, "a")]
+    assert [(r.chunk_id, r.method, r.score) for r in suite.evaluate_all("q", CHUNKS, "a")] == expected
+    assert suite.last_run_stats == serial.last_run_stats
+    assert suite.valuators["loo"].last_run_stats["judge_calls"] == len(CHUNKS) + 1
+
+    run = suite.evaluate_run("q", CHUNKS, "a")
+    assert set(run.coalition_scores["loo"]) >= {tuple(c.id for c in CHUNKS)}
+    suite.close()
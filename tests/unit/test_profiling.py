@@ -0,0 +1,42 @@
+import json
+from src.dv.algorithms.loo import LOOValuator
+from src.dv.algorithms.shapley import ShapleyValuator
+from src.dv.evaluation.cache import CachedJudge
+from src.dv.interfaces import Judge
+from src.dv.models.entities import Chunk
+from src.dv.profiling import Profiler, ProfiledJudge, profile_valuators
+
+class WordCountJudge(Judge):
+    def get_faithfulness(self, query: str, context: str, answer: str) -> float:
+        return min(1.0, len(context.split()) / 10.0)
+
+def profiled_run():
+    profiler = Profiler()
+    judge = ProfiledJudge(CachedJudge(ProfiledJudge(WordCountJudge(), profiler, layer="inference")), profiler)
+    valuators = profile_valuators({"loo": LOOValuator(judge), "shapley": ShapleyValuator(judge, estimator="exact")}, profiler)
+    chunks = [Chunk(id=f"c{i}", text="word " * (i + 1)) for i in range(3)]
+    for valuator in valuators.values():
+        valuator.evaluate("q", chunks, "a")
+    return profiler, judge, valuators
+
+def test_breakdown_attributes_judge_calls_per_method():
+    profiler, judge, valuators = profiled_run()
+    breakdown = profiler.breakdown()
+    assert breakdown["loo"]["judge_inputs"] == 4 and breakdown["loo"]["inference_inputs"] == 4
+    # The 4 LOO coalitions are cached by the time exact Shapley asks for all 8
+    assert breakdown["shapley"]["judge_inputs"] == 8 and breakdown["shapley"]["inference_inputs"] == 4
+    assert breakdown["shapley"]["cache_hit_rate"] == 0.5
+    assert breakdown["loo"]["join_s"] > 0 and breakdown["loo"]["wall_s"] >= breakdown["loo"]["judge_s"]
+    # Wrappers forward everything else to the wrapped objects
+    assert judge.stats["misses"] == 8
+    assert valuators["shapley"].last_run_stats["judge_calls"] == 8
+
+def test_trace_exports(tmp_path):
+    profiler, _, _ = profiled_run()
+    profiler.save(str(tmp_path / "trace.json"), fmt="chrome")
+    events = json.load(open(tmp_path / "trace.json"))["traceEvents"]
+    assert {e["cat"] for e in events} == {"valuator", "judge", "inference", "join"}
+    assert all(e["ph"] == "X" and e["dur"] >= 0 for e in events)
+    report = profiler.to_json()
+    assert report["histograms"]["shapley:judge.batch_size"]["max"] == 8
+    assert report["histograms"]["loo:judge.context_chars"]["count"] == 4
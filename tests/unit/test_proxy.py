@@ -0,0 +1,97 @@
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from src.dv.algorithms.loo import LOOValuator
+from src.dv.algorithms.proxy import ProxyFilter, ProxyValuator
+from src.dv.interfaces import Judge
+from src.dv.models.entities import Chunk, ValuationMethod
+from src.dv.models.results import ValuationResults
+
+GOOD = [f"paris capital france fact {i}" for i in range(40)]
+BAD = [f"unrelated cheese moon noise {i}" for i in range(40)]
+
+def labelled(texts, score):
+    chunks = [Chunk(id=f"{score}-{i}", text=t) for i, t in enumerate(texts)]
+    return chunks, ValuationResults.from_scores([c.id for c in chunks], ValuationMethod.LOO, [score] * len(chunks))
+
+def trained_proxy():
+    proxy = ProxyFilter(seed=0)
+    for _ in range(10):
+        for texts, score in ((GOOD, 1.0), (BAD, -1.0)):
+            proxy.partial_fit(*labelled(texts, score))
+    return proxy
+
+def test_predict_batch_matches_single_predictions():
+    proxy = trained_proxy()
+    batch = proxy.predict_batch(["paris capital france", "cheese moon"])
+    assert np.allclose(batch, [proxy.predict_value("paris capital france"), proxy.predict_value("cheese moon")])
+    assert batch[0] > 0.5 > -0.5 > batch[1]
+
+def test_prefilter_drops_only_confident_negatives():
+    proxy = trained_proxy()
+    chunks = [Chunk(id="g", text="paris capital france"), Chunk(id="b", text="cheese moon noise")]
+    assert ProxyFilter().prefilter(chunks) == (chunks, [])
+    kept, dropped = proxy.prefilter(chunks, threshold=0.0)
+    assert [c.id for c in kept] == ["g"] and [c.id for c in dropped] == ["b"]
+    assert proxy.prefilter(chunks, threshold=0.0, z=1e6)[1] == []
+
+def test_save_and_load_round_trip(tmp_path):
+    proxy = trained_proxy()
+    proxy.save(str(tmp_path / "proxy.pkl"))
+    loaded = ProxyFilter.load(str(tmp_path / "proxy.pkl"))
+    assert np.allclose(loaded.predict_batch(GOOD[:3]), proxy.predict_batch(GOOD[:3]))
+    assert loaded.residual_std == proxy.residual_std
+
+def test_train_epochs_count_each_batch_once():
+    proxy = ProxyFilter(seed=0)
+    proxy.train(*labelled(GOOD, 1.0), epochs=5)
+    assert proxy.n_samples == len(GOOD)
+    assert proxy.residual_std == float("inf") # nothing held out yet
+
+    # Error is measured on BAD before any epoch trains on it
+    before = proxy.predict_batch(BAD)
+    proxy.train(*labelled(BAD, -1.0), epochs=5)
+    assert proxy.n_samples == len(GOOD) + len(BAD)
+    assert np.isclose(proxy.residual_std, np.sqrt(np.mean((before + 1.0) ** 2)))
+
+def test_shared_filter_keeps_stats_under_concurrent_updates():
+    proxy = trained_proxy()
+    batches = [labelled(GOOD, 1.0), labelled(BAD, -1.0)] * 20
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(lambda batch: (proxy.partial_fit(*batch), proxy.predict_with_uncertainty(GOOD[:3])), batches))
+    assert proxy.n_samples == 10 * 80 + 40 * 40
+    assert abs(proxy._y_mean) < 1e-9
+
+class WordJudge(Judge):
+    """Faithfulness is the number of "paris" words in the context."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def get_faithfulness(self, query: str, context: str, answer: str) -> float:
+        self.calls += 1
+        return float(context.split().count("paris"))
+
+def test_proxy_valuator_falls_back_until_confident():
+    chunks = [Chunk(id=f"c{i}", text=t) for i, t in enumerate(["paris capital france", "cheese moon noise"])]
+    exact = LOOValuator(WordJudge()).evaluate("q", chunks, "a")
+
+    judge = WordJudge()
+    valuator = ProxyValuator(ProxyFilter(seed=0), LOOValuator(judge), max_uncertainty=0.3)
+    results = valuator.evaluate("q", chunks, "a")
+    assert [r.score for r in results] == [r.score for r in exact]
+    assert results[0].method == ValuationMethod.PROXY
+    assert valuator.last_run_stats["valuated"] == 2 and valuator.proxy.is_trained
+
+    for _ in range(60):
+        valuator.evaluate("q", chunks, "a")
+    calls = judge.calls
+    results = valuator.evaluate("q", chunks, "a")
+    assert judge.calls == calls and valuator.last_run_stats["predicted"] == 2
+    assert abs(results[0].score - 1.0) < 0.3 and abs(results[1].score) < 0.3
+
+def test_proxy_valuator_caps_fallback_budget():
+    chunks = [Chunk(id=f"c{i}", text=f"word{i}") for i in range(5)]
+    valuator = ProxyValuator(ProxyFilter(seed=0), LOOValuator(WordJudge()), max_fallback=2)
+    valuator.evaluate("q", chunks, "a")
+    assert valuator.last_run_stats["valuated"] == 2
+    assert sorted(valuator.last_uncertainty.values())[:2] == [0.0, 0.0]
@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+from src.dv.models.entities import ValuationMethod, ValuationResult
+from src.dv.models.results import ValuationResults
+
+def test_concat_merges_chunk_tables():
+    loo = ValuationResults.from_scores(["a", "b"], ValuationMethod.LOO, [0.1, 0.2])
+    shapley = ValuationResults.from_scores(["b", "c"], ValuationMethod.SHAPLEY, [0.3, 0.4])
+    merged = ValuationResults.concat([loo, shapley])
+
+    assert merged.chunk_ids == ["a", "b", "c"]
+    assert [(r.chunk_id, r.method, r.score) for r in merged] == [
+        ("a", ValuationMethod.LOO, 0.1),
+        ("b", ValuationMethod.LOO, 0.2),
+        ("b", ValuationMethod.SHAPLEY, 0.3),
+        ("c", ValuationMethod.SHAPLEY, 0.4),
+    ]
+    assert merged[1:] == list(merged)[1:]
+
+def test_from_results_keeps_plain_records():
+    plain = [ValuationResult(chunk_id="x", method=ValuationMethod.ATTENTION, score=0.5)]
+    assert ValuationResults.from_results(plain) == plain
+
+def test_repeated_chunk_ids_share_one_entry():
+    pd = pytest.importorskip("pandas")
+    results = ValuationResults.from_scores(["a", "b", "a"], ValuationMethod.LOO, [0.1, 0.2, 0.3])
+
+    assert results.chunk_ids == ["a", "b"]
+    assert [r.chunk_id for r in results] == ["a", "b", "a"]
+    frame = results.to_pandas()
+    assert isinstance(frame, pd.DataFrame)
+    assert frame["chunk_id"].tolist() == ["a", "b", "a"]
+
+def test_arrow_views_and_file_round_trips(tmp_path):
+    pytest.importorskip("pyarrow")
+    results = ValuationResults.from_scores(["a", "b", "c"], ValuationMethod.SHAPLEY, [0.5, -0.25, 0.0])
+
+    table = results.to_arrow()
+    assert np.shares_memory(table.column("score").to_numpy(), results.scores)
+    assert results.to_pandas()["chunk_id"].tolist() == ["a", "b", "c"]
+
+    results.write_parquet(str(tmp_path / "r.parquet"))
+    results.write_feather(str(tmp_path / "r.feather"))
+    assert ValuationResults.read_parquet(str(tmp_path / "r.parquet")) == results
+    assert ValuationResults.read_feather(str(tmp_path / "r.feather")) == results
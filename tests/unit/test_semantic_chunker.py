@@ -0,0 +1,34 @@
+import pytest
+from src.rag.chunking.semantic import embedding_semantic_chunker, split_sentences
+from src.rag.embeddings import CachedEncoder, HashingEncoder
+
+TEXT = (
+    "Cats are small furry pets. Cats purr when happy. Cats sleep a lot. "
+    "The stock market fell today. Investors sold stocks in the market. "
+    "Rain is expected tomorrow. Rain will continue all week."
+)
+TOPICS = [
+    "Cats are small furry pets. Cats purr when happy. Cats sleep a lot.",
+    "The stock market fell today. Investors sold stocks in the market.",
+    "Rain is expected tomorrow. Rain will continue all week.",
+]
+
+def test_splits_at_topic_changes():
+    encoder = CachedEncoder(HashingEncoder())
+    by_percentile = embedding_semantic_chunker(TEXT, encoder, percentile=60)
+    by_threshold = embedding_semantic_chunker(TEXT, encoder, breakpoint="threshold", threshold=0.1)
+
+    assert [c.text for c in by_percentile] == [c.text for c in by_threshold] == TOPICS
+    assert all(TEXT[c.start:c.end] == c.text for c in by_percentile)
+
+def test_sentence_embeddings_are_cached():
+    encoder = CachedEncoder(HashingEncoder())
+    embedding_semantic_chunker(TEXT, encoder)
+    embedding_semantic_chunker(TEXT + " Cats purr when happy.", encoder)
+
+    assert encoder.misses == len(split_sentences(TEXT))
+    assert encoder.hits == len(split_sentences(TEXT)) + 1
+
+def test_rejects_unknown_breakpoint():
+    with pytest.raises(ValueError):
+        embedding_semantic_chunker(TEXT, HashingEncoder(), breakpoint="gradient")
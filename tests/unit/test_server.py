@@ -0,0 +1,65 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from src.dv.algorithms.loo import LOOValuator
+from src.dv.evaluation.cache import CachedJudge
+from src.dv.interfaces import Judge
+from src.dv.models.entities import Chunk
+from src.dv.server import MicroBatchingJudge, RemoteSuite, ValuationServer
+
+class BatchCountingJudge(Judge):
+    def __init__(self):
+        self.batch_sizes = []
+
+    def get_faithfulness(self, query: str, context: str, answer: str) -> float:
+        return len(context.split()) / 10.0
+
+    def get_faithfulness_batch(self, queries, contexts, answers):
+        self.batch_sizes.append(len(contexts))
+        return [self.get_faithfulness(q, c, a) for q, c, a in zip(queries, contexts, answers)]
+
+@pytest.fixture
+def server():
+    inner = BatchCountingJudge()
+    judge = CachedJudge(MicroBatchingJudge(inner, max_wait=0.05))
+    srv = ValuationServer(("127.0.0.1", 0), judge, lambda methods: {"loo": LOOValuator(judge)}, default_methods=["loo"])
+    thread = threading.Thread(target=srv.serve_forever, daemon=True)
+    thread.start()
+    yield srv, inner
+    srv.shutdown()
+    srv.server_close()
+    judge.close()
+
+def test_remote_suite_matches_local(server):
+    srv, _ = server
+    chunks = [Chunk(id=f"c{i}", text=" ".join(["w"] * (i + 1))) for i in range(3)]
+    remote = RemoteSuite(srv.url).evaluate_all("q", chunks, "a")
+    local = LOOValuator(BatchCountingJudge()).evaluate("q", chunks, "a")
+
+    assert [(r.chunk_id, r.method, r.score) for r in remote] == [(r.chunk_id, r.method, r.score) for r in local]
+    assert srv.health()["jobs"] == 1
+
+def test_concurrent_jobs_share_judge_batches(server):
+    srv, inner = server
+    suite = RemoteSuite(srv.url)
+    jobs = [[Chunk(id=f"{j}-{i}", text=f"job{j} chunk{i}") for i in range(4)] for j in range(8)]
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(lambda chunks: suite.evaluate_all("q", chunks, "a"), jobs))
+
+    assert all(len(r) == 4 for r in results)
+    assert len(inner.batch_sizes) < len(jobs) # some jobs were merged
+    assert sum(inner.batch_sizes) == 8 * 5
+
+def test_bad_job_is_rejected(server):
+    srv, _ = server
+    with pytest.raises(RuntimeError, match="400"):
+        RemoteSuite(srv.url)._request("/evaluate", {"query": "q"})
+
+def test_cli_rejects_local_only_options_with_server(monkeypatch, capsys):
+    from src.dv.cli.main import main
+    argv = ["rag-dv", "evaluate", "--query", "q", "--chunks-file", "c.json", "--answer", "a", "--server", "http://127.0.0.1:1", "--profile"]
+    monkeypatch.setattr("sys.argv", argv)
+    with pytest.raises(SystemExit) as exit_info:
+        main()
+    assert exit_info.value.code == 2
+    assert "--profile cannot be combined with --server" in capsys.readouterr().err
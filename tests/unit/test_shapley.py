@@ -0,0 +1,142 @@
+from src.dv.algorithms.shapley import ShapleyValuator
+from src.dv.interfaces import Judge
+from src.dv.models.entities import Chunk, ValuationMethod
+
+class AdditiveJudge(Judge):
+    """Faithfulness is the sum of per-chunk weights, so Shapley values equal the weights."""
+
+    def __init__(self, weights):
+        self.weights = weights
+
+    def get_faithfulness(self, query: str, context: str, answer: str) -> float:
+        return sum(w for word, w in self.weights.items() if word in context.split())
+
+def make_chunks(n):
+    return [Chunk(id=f"c{i}", text=f"w{i}") for i in range(n)]
+
+def test_mc_recovers_additive_values():
+    n = 12
+    weights = {f"w{i}": 0.05 * (i % 4) for i in range(n)}
+    valuator = ShapleyValuator(AdditiveJudge(weights), mc_samples=20, seed=1)
+    results = valuator.evaluate("q", make_chunks(n), "a")
+
+    for i, res in enumerate(results):
+        assert abs(res.score - weights[f"w{i}"]) < 1e-9
+    assert valuator.last_run_stats["permutations"] == 20
+
+def test_mc_stops_early_when_ci_reached():
+    n = 12
+    weights = {f"w{i}": 0.05 for i in range(n)}
+    valuator = ShapleyValuator(AdditiveJudge(weights), mc_samples=200, batch_permutations=5, ci_width=0.01, seed=1)
+    valuator.evaluate("q", make_chunks(n), "a")
+
+    assert valuator.last_run_stats["converged"]
+    assert valuator.last_run_stats["permutations"] == 5
+
+def test_truncated_mc_saves_judge_calls():
+    n = 12
+    # Only the first chunk matters; every other marginal contribution is zero
+    weights = {"w0": 1.0}
+    full = ShapleyValuator(AdditiveJudge(weights), mc_samples=30, seed=3)
+    full_results = full.evaluate("q", make_chunks(n), "a")
+    truncated = ShapleyValuator(AdditiveJudge(weights), mc_samples=30, truncation_tol=1e-6, seed=3)
+    truncated_results = truncated.evaluate("q", make_chunks(n), "a")
+
+    assert truncated.last_run_stats["judge_calls"] < full.last_run_stats["judge_calls"]
+    assert [r.score for r in truncated_results] == [r.score for r in full_results]
+
+class WordCountJudge(Judge):
+    def get_faithfulness(self, query: str, context: str, answer: str) -> float:
+        return min(1.0, len(context.split()) / 5.0) ** 2
+
+def brute_force_shapley(judge, chunks):
+    import itertools
+    import math
+    n = len(chunks)
+    def v(subset):
+        return judge.get_faithfulness("q", " ".join(chunks[i].text for i in sorted(subset)), "a")
+    values = []
+    for i in range(n):
+        others = [j for j in range(n) if j != i]
+        total = 0.0
+        for r in range(n):
+            for S in itertools.combinations(others, r):
+                weight = math.factorial(r) * math.factorial(n - r - 1) / math.factorial(n)
+                total += weight * (v(S + (i,)) - v(S))
+        values.append(total)
+    return values
+
+def test_exact_matches_brute_force():
+    chunks = [Chunk(id=f"c{i}", text=" ".join(["w"] * (i + 1))) for i in range(5)]
+    judge = WordCountJudge()
+    results = ShapleyValuator(judge, exact_batch_size=7).evaluate("q", chunks, "a")
+
+    for res, expected in zip(results, brute_force_shapley(judge, chunks)):
+        assert abs(res.score - expected) < 1e-9
+
+def test_exact_threshold_is_configurable():
+    n = 12
+    weights = {f"w{i}": 0.01 * i for i in range(n)}
+    valuator = ShapleyValuator(AdditiveJudge(weights), exact_max_chunks=12)
+    results = valuator.evaluate("q", make_chunks(n), "a")
+
+    assert valuator.last_run_stats["judge_calls"] == 2 ** n
+    for i, res in enumerate(results):
+        assert abs(res.score - weights[f"w{i}"]) < 1e-9
+
+def test_kernel_recovers_additive_values():
+    n = 12
+    weights = {f"w{i}": 0.02 * i for i in range(n)}
+    valuator = ShapleyValuator(AdditiveJudge(weights), estimator="kernel", budget=200, seed=0)
+    results = valuator.evaluate("q", make_chunks(n), "a")
+
+    assert valuator.last_run_stats["judge_calls"] <= 200
+    for i, res in enumerate(results):
+        assert abs(res.score - weights[f"w{i}"]) < 1e-9
+
+def test_stratified_with_full_budget_is_exact():
+    chunks = [Chunk(id=f"c{i}", text=" ".join(["w"] * (i + 1))) for i in range(6)]
+    judge = WordCountJudge()
+    exact = ShapleyValuator(judge, estimator="exact").evaluate("q", chunks, "a")
+    valuator = ShapleyValuator(judge, estimator="stratified", budget=2 ** 6)
+    stratified = valuator.evaluate("q", chunks, "a")
+
+    for e, s in zip(exact, stratified):
+        assert abs(e.score - s.score) < 1e-9
+
+def test_stratified_respects_budget():
+    n = 20
+    weights = {f"w{i}": 0.01 * i for i in range(n)}
+    valuator = ShapleyValuator(AdditiveJudge(weights), estimator="stratified", budget=300, seed=0)
+    results = valuator.evaluate("q", make_chunks(n), "a")
+
+    assert valuator.last_run_stats["judge_calls"] <= 300
+    for i, res in enumerate(results):
+        assert abs(res.score - weights[f"w{i}"]) < 0.05
+
+def test_stratified_and_kernel_keep_to_budget():
+    weights = {f"w{i}": 0.01 * i for i in range(50)}
+    for n, budget in ((20, 21), (20, 59), (50, 60), (6, 40)):
+        valuator = ShapleyValuator(AdditiveJudge(weights), estimator="stratified", budget=budget, seed=0)
+        valuator.evaluate("q", make_chunks(n), "a")
+        assert valuator.last_run_stats["judge_calls"] <= budget
+
+    import pytest
+    with pytest.raises(ValueError, match="at least 21"):
+        ShapleyValuator(AdditiveJudge(weights), estimator="stratified", budget=10).evaluate("q", make_chunks(20), "a")
+    for estimator in ("stratified", "kernel"):
+        assert len(ShapleyValuator(AdditiveJudge(weights), estimator=estimator).evaluate("q", [], "a")) == 0
+
+def test_mc_never_overshoots_budget():
+    n = 12
+    weights = {f"w{i}": 0.05 for i in range(n)}
+    for budget in (5, 60, 100):
+        valuator = ShapleyValuator(AdditiveJudge(weights), estimator="permutation", mc_samples=50, budget=budget, seed=0, method=ValuationMethod.SHAPLEY_MC)
+        results = valuator.evaluate("q", make_chunks(n), "a")
+        assert valuator.last_run_stats["judge_calls"] <= max(budget, 2)
+        assert {r.method for r in results} == {ValuationMethod.SHAPLEY_MC}
+
+def test_unknown_estimator_rejected():
+    import pytest
+    with pytest.raises(ValueError):
+        ShapleyValuator(WordCountJudge(), estimator="banzhaf")
@@ -0,0 +1,32 @@
+import subprocess
+import sys
+import time
+from pathlib import Path
+import pytest
+from src.dv.algorithms.loo import LOOValuator
+from src.dv.registry import JUDGES, get_judge, get_valuator
+
+# Measured at ~0.25s for `rag-dv --help` (it was ~11s with eager judge imports);
+# the budget leaves headroom for slow CI machines
+STARTUP_BUDGET_S = 2.0
+REPO_ROOT = Path(__file__).resolve().parents[2]
+HEAVY_MODULES = ("torch", "transformers", "openai", "sklearn", "numpy")
+
+def test_cli_import_skips_heavy_modules():
+    code = (
+        "import sys; import src.dv.cli.main; "
+        f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    )
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True, cwd=REPO_ROOT)
+    assert out.stdout.strip() == ""
+
+def test_cli_help_within_startup_budget():
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-m", "src.dv.cli.main", "--help"], capture_output=True, check=True, cwd=REPO_ROOT)
+    assert time.perf_counter() - start < STARTUP_BUDGET_S
+
+def test_registry_resolves_on_lookup():
+    assert get_valuator("loo") is LOOValuator
+    assert "mnli" in JUDGES
+    with pytest.raises(ValueError):
+        get_judge("no-such-judge")
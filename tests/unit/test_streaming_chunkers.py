@@ -0,0 +1,75 @@
+import json
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+import pytest
+from src.dv import parallel
+from src.rag.chunking.recursive import recursive_chunker
+from src.rag.chunking.semantic import semantic_chunker
+from src.rag.chunking.simple import fixed_length_chunker
+from src.rag.chunking.streaming import (
+    chunk_directory,
+    stream_fixed_length_chunks,
+    stream_parts,
+    stream_recursive_chunks,
+    stream_semantic_chunks,
+)
+from src.utils.hashing import calculate_chunk_hash, set_chunk_digest
+
+TEXT = (
+    "Paris is the capital of France. The capital has many museums.\n\n"
+    "France is a country in Europe. It borders Spain and Italy.\nThe weather varies.\n\n"
+    "Unrelated text follows here. Cats sleep most of the day. Cats purr"
+)
+
+def blocks(text, size):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+def spans(chunks):
+    return [(c.text, c.start, c.end) for c in chunks]
+
+def test_streaming_matches_in_memory_chunkers():
+    for block_size in (1, 7, 64):
+        stream = blocks(TEXT, block_size)
+        assert spans(stream_recursive_chunks(stream, chunk_size=40)) == spans(recursive_chunker(TEXT, chunk_size=40))
+        assert spans(stream_fixed_length_chunks(stream, 50, 10)) == spans(fixed_length_chunker(TEXT, 50, 10))
+        assert spans(stream_semantic_chunks(stream, 0.2)) == spans(semantic_chunker(TEXT, 0.2))
+
+def test_offsets_point_into_source():
+    for chunk in stream_recursive_chunks(blocks(TEXT, 5), chunk_size=30):
+        assert TEXT[chunk.start:chunk.end] == chunk.text
+
+def test_separator_free_runs_are_bounded():
+    parts = list(stream_parts(blocks("x" * 1000, 10), "\n\n", max_buffer=100))
+    assert "".join(p for _, p in parts) == "x" * 1000
+    assert max(len(p) for _, p in parts) <= 110
+
+def test_chunk_directory_reads_files(tmp_path):
+    (tmp_path / "in").mkdir()
+    (tmp_path / "in" / "a.txt").write_text(TEXT)
+    counts = chunk_directory(str(tmp_path / "in"), str(tmp_path / "out"), chunk_size=40, executor="serial")
+
+    rows = [json.loads(line) for line in open(tmp_path / "out" / "a.txt.chunks.jsonl")]
+    assert list(counts.values()) == [len(rows)] == [len(recursive_chunker(TEXT, chunk_size=40))]
+    assert all(TEXT[r["start"]:r["end"]] == r["text"] for r in rows)
+
+def test_spawned_chunk_workers_use_the_configured_digest(tmp_path, monkeypatch):
+    spawn = partial(ProcessPoolExecutor, mp_context=multiprocessing.get_context("spawn"))
+    monkeypatch.setattr(parallel, "ProcessPoolExecutor", spawn)
+    (tmp_path / "in").mkdir()
+    (tmp_path / "in" / "a.txt").write_text(TEXT)
+    set_chunk_digest("blake2b")
+    try:
+        chunk_directory(str(tmp_path / "in"), str(tmp_path / "out"), chunk_size=40, workers=1)
+    finally:
+        set_chunk_digest("md5")
+
+    rows = [json.loads(line) for line in open(tmp_path / "out" / "a.txt.chunks.jsonl")]
+    assert [r["id"] for r in rows] == [calculate_chunk_hash(r["text"], "blake2b") for r in rows]
+
+def test_streamed_chunks_cannot_change_each_others_metadata():
+    for chunker in (stream_fixed_length_chunks, stream_recursive_chunks, stream_semantic_chunks):
+        chunks = list(chunker([TEXT]))
+        with pytest.raises(TypeError):
+            chunks[0].metadata["score"] = 1
+        assert "score" not in chunks[-1].metadata
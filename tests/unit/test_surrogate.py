@@ -0,0 +1,104 @@
+import math
+import pytest
+
+torch = pytest.importorskip("torch")
+pytest.importorskip("transformers")
+from src.dv.models.surrogate import LocalSignaler, find_attention_modules  # noqa: E402
+
+CORPUS = ["Question: what is the capital of France? Context: Paris is the capital of France. France is a country in Europe. Answer: Paris"]
+
+@pytest.fixture(scope="module")
+def tiny_lm(tmp_path_factory):
+    """Path of a randomly initialized 2-layer GPT-2 with a small byte-level BPE tokenizer."""
+    from tokenizers import Tokenizer, decoders, models, pre_tokenizers, trainers
+    from transformers import GPT2Config, GPT2LMHeadModel, PreTrainedTokenizerFast
+
+    tokenizer = Tokenizer(models.BPE())
+    tokenizer.pre_tokenizer = pre_tokenizers.ByteLevel(add_prefix_space=False)
+    tokenizer.decoder = decoders.ByteLevel()
+    trainer = trainers.BpeTrainer(vocab_size=300, initial_alphabet=pre_tokenizers.ByteLevel.alphabet(), special_tokens=["<eos>"])
+    tokenizer.train_from_iterator(CORPUS * 50, trainer)
+    fast = PreTrainedTokenizerFast(tokenizer_object=tokenizer, eos_token="<eos>")
+    torch.manual_seed(0)
+    model = GPT2LMHeadModel(GPT2Config(vocab_size=len(fast), n_embd=32, n_layer=2, n_head=2, n_positions=256))
+    path = str(tmp_path_factory.mktemp("tiny-gpt2"))
+    model.save_pretrained(path)
+    fast.save_pretrained(path)
+    return path
+
+class SelfAttention(torch.nn.Module):
+    def forward(self, x):
+        return x
+
+class Block(torch.nn.Module):
+    def __init__(self):
+        super().__init__()
+        self.attn = SelfAttention()
+        self.mixer = torch.nn.Linear(2, 2)
+
+class OuterAttention(torch.nn.Module):
+    def __init__(self):
+        super().__init__()
+        self.inner = SelfAttention()
+
+class TinyModel(torch.nn.Module):
+    def __init__(self):
+        super().__init__()
+        self.blocks = torch.nn.ModuleList([Block(), Block()])
+
+def test_find_attention_modules_by_class_or_name():
+    model = TinyModel()
+    assert find_attention_modules(model) == [model.blocks[0].attn, model.blocks[1].attn]
+    assert find_attention_modules(model, ["blocks.1.mixer"]) == [model.blocks[1].mixer]
+    wrapped = OuterAttention()
+    assert find_attention_modules(wrapped) == [wrapped.inner]
+
+    with pytest.raises(ValueError, match="blocks.2.mixer"):
+        find_attention_modules(model, ["blocks.2.mixer"])
+    # Nothing named "*Attention*" and no names given: fail loudly instead of scoring 0.0
+    with pytest.raises(ValueError, match="attention_modules"):
+        find_attention_modules(torch.nn.Sequential(torch.nn.Linear(2, 2)))
+
+def test_signals_cover_every_layer_and_single_token_answers(tiny_lm):
+    signaler = LocalSignaler(tiny_lm, device="cpu")
+    context = "Paris is the capital of France. France is a country in Europe."
+    spans = [(0, 31), (32, len(context))]
+    for answer in ["France", "Paris", "Paris is the capital", "the capital of France"]:
+        signals = signaler.get_signals("what is the capital of France?", context, answer, spans)
+        # Every layer is counted, even when a freed attention buffer is reused
+        assert signals["num_layers"] == 2
+        assert signals["num_answer_tokens"] >= 1
+        assert all(score > 0 for score in signals["chunk_scores"])
+        assert sum(signals["chunk_scores"]) <= 1 + 1e-6
+
+    last = LocalSignaler(tiny_lm, device="cpu", layers=[-1]).get_signals("q", context, "France", spans)
+    assert last["num_layers"] == 2
+    with pytest.raises(ValueError, match="No answer tokens"):
+        signaler.get_signals("q", context, "", spans)
+
+def full_log_likelihood(signaler, query, context, answer):
+    """Mean answer-token log-probability from one uncached forward pass."""
+    prompt_ids = signaler.tokenizer(f"Question: {query}\nContext: {context}\nAnswer: ")["input_ids"]
+    answer_ids = signaler.tokenizer(answer, add_special_tokens=False)["input_ids"]
+    with torch.no_grad():
+        logits = signaler.model(input_ids=torch.tensor([prompt_ids + answer_ids])).logits[0]
+    log_probs = torch.log_softmax(logits[len(prompt_ids) - 1:-1].float(), dim=-1)
+    return log_probs.gather(1, torch.tensor(answer_ids).unsqueeze(1)).mean().item()
+
+def test_cached_log_likelihoods_match_full_encoding(tiny_lm):
+    from src.dv.evaluation.judges import LikelihoodJudge
+    signaler = LocalSignaler(tiny_lm, device="cpu")
+    paris, france = "Paris is the capital of France.", "France is a country in Europe."
+    # Growing prefixes, a shorter context after a longer one, another query and a repeat
+    queries = ["what is the capital?"] * 4 + ["where is France?", "what is the capital?"]
+    contexts = [paris, f"{paris} {france}", f"{paris} {france} {paris}", france, f"{paris} {france}", paris]
+    answers = ["Paris", "Paris", "Paris is the capital", "Europe", "France is in Europe", "Paris"]
+
+    cached = signaler.answer_log_likelihoods(queries, contexts, answers)
+    expected = [full_log_likelihood(signaler, q, c, a) for q, c, a in zip(queries, contexts, answers)]
+    assert cached == pytest.approx(expected, abs=1e-4)
+    assert signaler.answer_log_likelihoods(["q"], [paris], [""]) == [float("-inf")]
+
+    judge = LikelihoodJudge(signaler=signaler)
+    assert judge.get_faithfulness_batch(queries, contexts, answers) == pytest.approx([math.exp(ll) for ll in expected], abs=1e-4)
+    assert judge.get_faithfulness(queries[3], contexts[3], answers[3]) == pytest.approx(math.exp(expected[3]), abs=1e-4)
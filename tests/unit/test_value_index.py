@@ -0,0 +1,52 @@
+from datetime import datetime
+import numpy as np
+from src.dv.evaluation.filtering import filter_negative_chunks
+from src.dv.evaluation.value_index import ChunkValueIndex
+from src.dv.models.entities import Chunk, ValuationMethod, ValuationResult
+from src.dv.models.results import ValuationResults
+from src.utils.hashing import calculate_chunk_hash
+
+CHUNKS = [Chunk(id=f"c{i}", text=f"chunk text {i}") for i in range(4)]
+
+def results(scores, method=ValuationMethod.LOO):
+    return ValuationResults.from_scores([c.id for c in CHUNKS[:len(scores)]], method, scores)
+
+def test_streaming_stats_match_batch_stats(tmp_path):
+    rng = np.random.default_rng(0)
+    runs = [rng.normal(size=4) for _ in range(5)]
+    index = ChunkValueIndex(str(tmp_path / "values.db"))
+    for scores in runs:
+        index.update(CHUNKS, results(scores))
+    index.update(CHUNKS, results([9.0, 9.0], ValuationMethod.SHAPLEY))
+    index.close()
+
+    index = ChunkValueIndex(str(tmp_path / "values.db"))
+    stats = index.lookup([calculate_chunk_hash(c.text) for c in CHUNKS])
+    history = np.array(runs)
+    for i, c in enumerate(CHUNKS):
+        s = stats[calculate_chunk_hash(c.text)]
+        assert s.count == 5
+        assert abs(s.mean - history[:, i].mean()) < 1e-12
+        assert abs(s.variance - history[:, i].var(ddof=1)) < 1e-12
+    assert set(index.lookup_chunks(CHUNKS, "SHAPLEY")) == {"c0", "c1"}
+    assert len(index) == 6
+
+def test_update_accepts_plain_results_and_repeats_within_a_batch():
+    index = ChunkValueIndex()
+    stamp = datetime(2024, 1, 2, 3, 4, 5)
+    plain = [ValuationResult("c0", ValuationMethod.LOO, 1.0, stamp), ValuationResult("c0", ValuationMethod.LOO, 3.0, stamp), ValuationResult("zz", ValuationMethod.LOO, 5.0)]
+    assert index.update(CHUNKS, plain) == 1
+    s = index.lookup_chunks(CHUNKS)["c0"]
+    assert (s.count, s.mean, s.variance, s.last_seen) == (2, 2.0, 2.0, stamp)
+
+def test_history_down_ranks_and_filters_without_judge():
+    index = ChunkValueIndex()
+    for _ in range(3):
+        index.update(CHUNKS, results([0.2, -0.3, 0.1, -0.1]))
+    assert [c.id for c in index.down_rank(CHUNKS)] == ["c0", "c2", "c1", "c3"]
+    assert [c.id for c in index.down_rank(CHUNKS, min_count=4)] == ["c0", "c1", "c2", "c3"]
+
+    # c2 and c3 have no fresh results, so their history decides
+    fresh = ValuationResults.from_scores(["c0", "c1"], ValuationMethod.LOO, [0.5, 0.5])
+    assert [c.id for c in filter_negative_chunks(CHUNKS, fresh)] == ["c0", "c1", "c2", "c3"]
+    assert [c.id for c in filter_negative_chunks(CHUNKS, fresh, index=index)] == ["c0", "c1", "c2"]
@@ -0,0 +1,96 @@
+import re
+from types import SimpleNamespace
+import pytest
+
+torch = pytest.importorskip("torch")
+pytest.importorskip("transformers")
+pytest.importorskip("openai")
+from src.dv.evaluation import judges  # noqa: E402
+from src.dv.evaluation.judges import WindowedNLIJudge  # noqa: E402
+
+class WordTokenizer:
+    """One token per whitespace-separated word; pair calls keep the raw texts for the model."""
+
+    model_max_length = 10 ** 30
+
+    def __call__(self, text, hypotheses=None, **kwargs):
+        if hypotheses is None:
+            return {"offset_mapping": [(m.start(), m.end()) for m in re.finditer(r"\S+", text)]}
+        return SimpleNamespace(to=lambda device: {"pairs": list(zip(text, hypotheses))})
+
+    def num_special_tokens_to_add(self, pair=False):
+        return 3
+
+class OverlapModel:
+    """Entails the hypothesis when every one of its words is in the premise."""
+
+    config = SimpleNamespace(label2id={"ENTAILMENT": 0, "NEUTRAL": 1, "CONTRADICTION": 2}, max_position_embeddings=12)
+
+    def __init__(self):
+        self.premises = []
+
+    def to(self, device):
+        return self
+
+    def eval(self):
+        return self
+
+    def __call__(self, pairs):
+        self.premises.extend(p for p, _ in pairs)
+        logits = [[5.0, 0.0, 0.0] if set(h.split()) <= set(p.split()) else [0.0, 0.0, 5.0] for p, h in pairs]
+        return SimpleNamespace(logits=torch.tensor(logits))
+
+@pytest.fixture
+def make_judge(monkeypatch):
+    def make(**kwargs):
+        model = OverlapModel()
+        monkeypatch.setattr(judges.AutoTokenizer, "from_pretrained", lambda name: WordTokenizer())
+        monkeypatch.setattr(judges.AutoModelForSequenceClassification, "from_pretrained", lambda name: model)
+        return WindowedNLIJudge("stub", device="cpu", **kwargs), model
+    return make
+
+def test_long_text_is_split_into_overlapping_token_windows(make_judge):
+    judge, _ = make_judge(stride=2)
+    words = [f"w{i}" for i in range(20)]
+    # 12 positions - 3 special tokens - 1 answer token
+    budget = judge._premise_budget("paris")
+    assert budget == 8
+
+    windows = judge._split_text(" ".join(words), budget)
+    assert windows == [" ".join(words[s:s + 8]) for s in (0, 6, 12)]
+    assert judge._split_text("short text", budget) == ["short text"]
+
+def test_coalition_windows_follow_chunk_boundaries(make_judge):
+    chunks = ["paris capital", "rome italy", "berlin germany", " ".join(f"w{i}" for i in range(10))]
+    judge, _ = make_judge(window_mode="pack", stride=2)
+    # Whole chunks are packed while they fit (2 tokens + 1 joining space each); the long chunk gets token windows
+    assert judge._coalition_windows(chunks, (0, 1, 2, 3), 8) == [
+        "paris capital rome italy",
+        "berlin germany",
+        "w0 w1 w2 w3 w4 w5 w6 w7",
+        "w6 w7 w8 w9",
+    ]
+    judge, _ = make_judge(window_mode="chunk")
+    assert judge._coalition_windows(chunks, (2, 0), 8) == ["berlin germany", "paris capital"]
+
+def test_chunk_windows_are_scored_once_and_combined(make_judge):
+    chunks = ["paris capital", "rome italy", "berlin germany"]
+    coalitions = [(), (0,), (1,), (0, 1), (1, 2), (0, 1, 2)]
+    judge, model = make_judge(combine="max")
+    best = judge.get_faithfulness_coalitions("q", chunks, coalitions, "paris")
+    assert sorted(model.premises) == sorted(chunks)
+    assert judge.model_calls == 3
+
+    entailed, other = best[1], best[2]
+    assert best == [0.0, entailed, other, entailed, other, entailed]
+    assert entailed > 0.9 > 0.1 > other
+
+    # Cached windows are not re-scored
+    calls = judge.model_calls
+    assert judge.get_faithfulness_coalitions("q", chunks, coalitions, "paris") == best
+    assert judge.model_calls == calls
+    assert judge.cache_hits > 0
+
+    judge, _ = make_judge(combine="mean")
+    mean = judge.get_faithfulness_coalitions("q", chunks, [(0, 1), (0, 1, 2)], "paris")
+    assert mean == pytest.approx([(entailed + other) / 2, (entailed + 2 * other) / 3])